@@ -1,5 +1,8 @@
 from flask import Flask, render_template, request, jsonify, g, session, Response, send_file
 from datetime import datetime, timedelta
+import io
+import logging
+import math
 import os
 import threading
 import subprocess
@@ -7,15 +10,23 @@ import time
 import requests
 from collections import deque
 import json
+import uuid
 from urllib.parse import unquote
 from flask_cors import CORS
 from config.languages import LANGUAGES
 from models.sim_resource import db, SimResource
 from modules.sim_resources.routes import sim_resources_bp
-from modules.montnet_api import MontNetAPI
-from modules.quadcell_api import QuadcellAPI
-from modules.simlessly_api import SimlesslyAPI
-from modules.worldmove_api import WorldMoveAPI
+from modules.montnet_api import MontNetAPI, request_validator as montnet_validator
+from modules.quadcell_api import QuadcellAPI, request_validator as quadcell_validator
+from modules.simlessly_api import SimlesslyAPI, request_validator as simlessly_validator
+from modules.worldmove_api import WorldMoveAPI, request_validator as worldmove_validator
+from modules.batch_jobs import batch_jobs
+from modules.batch_readers import BATCH_FILE_EXTENSIONS, batch_file_extension
+from modules.batch_results import build_partial_workbook
+from modules.batch_checkpoint import BatchCheckpoint, run_id_for
+from modules.http_transport import circuit_status
+from modules.app_logging import configure_logging, get_logger, vendor_logger
+from modules.metrics import registry as metrics_registry, route_seconds
 from modules.sim_resources.manager import SimResourceManager
 from modules.sim_resources.config_manager import SimConfigManager
 
@@ -25,6 +36,11 @@ CORS(app)
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
+# 日志经队列由后台线程写入控制台和logs/app.log，级别和供应商开关见config/logging_config.py
+configure_logging()
+logger = get_logger("app")
+route_loggers = {vendor: vendor_logger(vendor, "routes") for vendor in ('quadcell', 'montnet', 'simlessly', 'worldmove')}
+
 
 # 确保上传目录存在
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -72,12 +88,51 @@ def utility_processor():
 
 @app.before_request
 def before_request():
+    g.request_started_at = time.perf_counter()
     # 设置默认语言
     if 'language' not in session:
         session['language'] = 'zh-TW'  # Default繁體中文
     g.language = session['language']
     g.languages = LANGUAGES
 
+@app.after_request
+def record_route_latency(response):
+    """按路由规则记录响应时间（未匹配的URL归为unmatched，避免标签数量无限增长）"""
+    started_at = g.get('request_started_at')
+    if started_at is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        route_seconds.observe(time.perf_counter() - started_at, route, request.method, str(response.status_code))
+    return response
+
+
+def form_flag(name):
+    """表单中的开关参数（1/true/on为开启）"""
+    return request.form.get(name) in ('1', 'true', 'on')
+
+
+def batch_form_options():
+    """
+    批量上传表单中的并发参数，返回batch_process的关键字参数；参数无效时返回None
+    - maxWorkers/rateLimit: 最大并发数、每秒请求数，留空则沿用delay顺序处理
+    - asyncMode: 异步I/O模式，并发请求在共用事件循环上发送
+    - adaptiveConcurrency: 按供应商延迟和错误自动调节并发数，maxWorkers为上限
+    - bypassCache: 不读取响应缓存
+    """
+    try:
+        max_workers = int(request.form.get('maxWorkers') or 1)
+        rate_limit = float(request.form.get('rateLimit') or 0) or None
+    except ValueError:
+        return None
+    if max_workers < 1 or (rate_limit is not None and not (0 < rate_limit < math.inf)):
+        return None
+    return {
+        'max_workers': max_workers,
+        'rate_limit': rate_limit,
+        'async_io': form_flag('asyncMode'),
+        'adaptive': form_flag('adaptiveConcurrency'),
+        'bypass_cache': form_flag('bypassCache')
+    }
+
 # 添加语言切换路由
 @app.route('/set_language/<language>')
 def set_language(language):
@@ -125,21 +180,21 @@ def start_ngrok():
         
         if tunnels:
             public_url = tunnels[0].get('public_url')
-            print(f"Ngrok tunnel established: {public_url}")
+            logger.info("Ngrok tunnel established: %s", public_url)
             
-            # 打印回调URL供WorldMove使用
-            print("\nWorldMove回调URL:")
-            print(f"eSIM订单回调: {public_url}/Api/SOrder/eSIMOrderCallback")
-            print(f"eSIM订单和兑换回调: {public_url}/Api/SOrder/eSIMOrderandRedeemCallback")
-            print(f"兑换码兑换回调: {public_url}/Api/OrderRedemption/RedeemRedemptionCodeCallback")
-            print(f"充值回调: {public_url}/Api/SOrder/TopUpCallback")
-            print("\n请将这些URL提供给WorldMove技术支持")
+            # 输出回调URL供WorldMove使用
+            logger.info("WorldMove回调URL（请将这些URL提供给WorldMove技术支持）:\n"
+                        "eSIM订单回调: %s/Api/SOrder/eSIMOrderCallback\n"
+                        "eSIM订单和兑换回调: %s/Api/SOrder/eSIMOrderandRedeemCallback\n"
+                        "兑换码兑换回调: %s/Api/OrderRedemption/RedeemRedemptionCodeCallback\n"
+                        "充值回调: %s/Api/SOrder/TopUpCallback",
+                        public_url, public_url, public_url, public_url)
         else:
-            print("Failed to establish Ngrok tunnel")
+            logger.error("Failed to establish Ngrok tunnel")
             public_url = None
             
     except Exception as e:
-        print(f"Error starting Ngrok: {str(e)}")
+        logger.error("Error starting Ngrok: %s", e)
         public_url = None
 
 # 停止Ngrok隧道
@@ -148,7 +203,7 @@ def stop_ngrok():
     if ngrok_process:
         ngrok_process.terminate()
         ngrok_process = None
-        print("Ngrok tunnel stopped")
+        logger.info("Ngrok tunnel stopped")
         
 # 记录回调日志
 def log_callback(endpoint, data):
@@ -170,8 +225,12 @@ def log_callback(endpoint, data):
     with callback_lock:
         recent_callbacks.appendleft(callback_data)
     
-    print(f"Callback received from {endpoint} and saved to {filepath}")
-    print(f"Callback data: {json.dumps(data, ensure_ascii=False, indent=2)}")
+    # 回调内容已写入文件，日志只在DEBUG级别记录完整数据
+    callback_logger = route_loggers['worldmove']
+    callback_logger.info("Callback received from %s and saved to %s", endpoint, filepath,
+                         extra={"fields": {"endpoint": endpoint, "file": filepath}})
+    if callback_logger.isEnabledFor(logging.DEBUG):
+        callback_logger.debug("Callback data: %s", json.dumps(data, ensure_ascii=False))
     
     return callback_data      
 
@@ -239,7 +298,7 @@ def vendor_page(vendor):
             api = MontNetAPI()
             endpoints = api.get_endpoints()
         except Exception as e:
-            print(f"Error getting endpoints: {e}")
+            route_loggers['montnet'].error("Error getting endpoints: %s", e)
             endpoints = []
     elif vendor == 'quadcell':
         try:
@@ -247,21 +306,21 @@ def vendor_page(vendor):
             endpoints = api.get_endpoints()
             companies = api.load_company_mappings()
         except Exception as e:
-            print(f"Error getting endpoints: {e}")
+            route_loggers['quadcell'].error("Error getting endpoints: %s", e)
             endpoints = []
     elif vendor == 'worldmove':
         try:
             api = WorldMoveAPI()
             endpoints = api.get_endpoints()
         except Exception as e:
-            print(f"Error getting endpoints: {e}")
+            route_loggers['worldmove'].error("Error getting endpoints: %s", e)
             endpoints = []
     elif vendor == 'simlessly':
         try:
             api = SimlesslyAPI()
             endpoints = api.get_endpoints()
         except Exception as e:
-            print(f"Error getting endpoints: {e}")
+            route_loggers['simlessly'].error("Error getting endpoints: %s", e)
             endpoints = []            
     
     return render_template(f'{vendor}.html', 
@@ -272,6 +331,13 @@ def vendor_page(vendor):
                          quadcell_auth_key=QuadcellAPI.DEFAULT_AUTH_KEY if vendor == 'quadcell' else '',
                          full_width=False)
 
+def validation_error_response(validator, endpoint, payload):
+    """按端点配置校验单条请求，有错误时返回400响应，否则返回None"""
+    errors = validator.validate_payload(endpoint, payload)
+    if errors:
+        return jsonify({'error': '；'.join(errors), 'validation_errors': errors}), 400
+    return None
+
 # MontNet路由
 @app.route('/api/montnet/single', methods=['POST'])
 def montnet_single():
@@ -280,17 +346,22 @@ def montnet_single():
         endpoint = request.form.get('endpoint')
         payload = {}
         
-        # 构建payload，排除endpoint字段
+        # 构建payload，排除endpoint和bypassCache字段
         for key in request.form:
-            if key != 'endpoint':
+            if key not in ('endpoint', 'bypassCache'):
                 payload[key] = request.form.get(key)
         
         # 添加固定authKey
         payload['authKey'] = MontNetAPI.FIXED_AUTH_KEY
         
+        # 发送前校验必填参数和类型
+        invalid = validation_error_response(montnet_validator, endpoint, payload)
+        if invalid:
+            return invalid
+        
         # 发送请求
         api = MontNetAPI()
-        response = api.single_request(endpoint, payload)
+        response = api.single_request(endpoint, payload, bypass_cache=form_flag('bypassCache'))
         
         return jsonify(response)
         
@@ -309,32 +380,33 @@ def montnet_batch():
         if file.filename == '':
             return jsonify({'error': '没有选择文件'}), 400
         
-        # 检查文件扩展名
-        if not file.filename.lower().endswith(('.xlsx', '.xls')):
-            return jsonify({'error': '只支持Excel文件(.xlsx, .xls)'}), 400
+        # 检查文件扩展名（.csv.gz作为一个整体）
+        extension = batch_file_extension(file.filename)
+        if extension is None:
+            return jsonify({'error': f"只支持Excel、CSV或Parquet文件({', '.join(BATCH_FILE_EXTENSIONS)})"}), 400
+            
+        # 获取并发参数（先于保存文件校验，参数无效时不留下上传文件）
+        options = batch_form_options()
+        if options is None:
+            return jsonify({'error': 'maxWorkers必须为正整数，rateLimit必须为非负数'}), 400
             
         # 保存上传的文件
-        filename = f"montnet_{datetime.now().strftime('%Y%m%d_%H%M%S')}{os.path.splitext(file.filename)[1]}"
+        filename = f"montnet_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}{extension}"
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
         file.save(filepath)
         
         # 获取延迟参数
         delay = float(request.form.get('delay', 0.5))
         
-        # 处理请求
+        # 提交后台任务
         api = MontNetAPI()
-        result_path = api.batch_process(filepath, delay)
+        job = batch_jobs.submit('montnet', api, api.batch_process, filepath, delay, **options)
         
-        # 确保文件存在
-        if not os.path.exists(result_path):
-            return jsonify({'error': '结果文件生成失败'}), 500
-            
-        # 返回结果文件名（前端将使用此文件名下载）
-        result_filename = os.path.basename(result_path)
+        # 返回任务ID（前端通过 /api/batch/jobs/<job_id> 轮询进度）
         return jsonify({
             'success': True,
-            'filename': result_filename,
-            'message': f'处理完成，共处理了{api.processed_count}条请求'
+            'job_id': job.id,
+            'message': '任务已提交，正在后台处理'
         })
         
     except Exception as e:
@@ -346,7 +418,7 @@ def montnet_endpoint_params(endpoint):
     try:
         # 解码URL编码的端点
         endpoint = unquote(endpoint)
-        print(f"Getting params for endpoint: {endpoint}")
+        route_loggers['montnet'].debug("Getting params for endpoint: %s", endpoint)
         
         # 获取当前语言
         language = g.language
@@ -372,9 +444,7 @@ def montnet_endpoint_params(endpoint):
             
         return jsonify(translated_params)
     except Exception as e:
-        print(f"Error getting params for {endpoint}: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        route_loggers['montnet'].exception("Error getting params for %s: %s", endpoint, e)
         return jsonify({'error': str(e)}), 500
     
 # Quadcell路由
@@ -390,12 +460,18 @@ def quadcell_batch():
         if file.filename == '':
             return jsonify({'error': '没有选择文件'}), 400
         
-        # 检查文件扩展名
-        if not file.filename.lower().endswith(('.xlsx', '.xls')):
-            return jsonify({'error': '只支持Excel文件(.xlsx, .xls)'}), 400
+        # 检查文件扩展名（.csv.gz作为一个整体）
+        extension = batch_file_extension(file.filename)
+        if extension is None:
+            return jsonify({'error': f"只支持Excel、CSV或Parquet文件({', '.join(BATCH_FILE_EXTENSIONS)})"}), 400
+            
+        # 获取并发参数（先于保存文件校验，参数无效时不留下上传文件）
+        options = batch_form_options()
+        if options is None:
+            return jsonify({'error': 'maxWorkers必须为正整数，rateLimit必须为非负数'}), 400
             
         # 保存上传的文件
-        filename = f"quadcell_{datetime.now().strftime('%Y%m%d_%H%M%S')}{os.path.splitext(file.filename)[1]}"
+        filename = f"quadcell_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}{extension}"
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
         file.save(filepath)
         
@@ -403,20 +479,15 @@ def quadcell_batch():
         delay = float(request.form.get('delay', 0.5))
         company_name = request.form.get('companyName')
         
-        # 处理请求
+        # 提交后台任务
         api = QuadcellAPI()
-        result_path = api.batch_process(filepath, delay, company_name)
+        job = batch_jobs.submit('quadcell', api, api.batch_process, filepath, delay, company_name, **options)
         
-        # 确保文件存在
-        if not os.path.exists(result_path):
-            return jsonify({'error': '结果文件生成失败'}), 500
-            
-        # 返回结果文件名（前端将使用此文件名下载）
-        result_filename = os.path.basename(result_path)
+        # 返回任务ID（前端通过 /api/batch/jobs/<job_id> 轮询进度）
         return jsonify({
             'success': True,
-            'filename': result_filename,
-            'message': f'处理完成，共处理了{api.processed_count}条请求'
+            'job_id': job.id,
+            'message': '任务已提交，正在后台处理'
         })
         
     except Exception as e:
@@ -431,9 +502,9 @@ def quadcell_single():
         debug_mode = request.form.get('debug', 'false').lower() == 'true'  # 新增調試模式參數
         payload = {}
         
-        # 構建payload，排除endpoint、companyName和debug字段
+        # 構建payload，排除endpoint、companyName、debug和bypassCache字段
         for key in request.form:
-            if key not in ['endpoint', 'companyName', 'debug']:
+            if key not in ['endpoint', 'companyName', 'debug', 'bypassCache']:
                 payload[key] = request.form.get(key)
         
         # 根據公司名稱獲取authKey（優先級最高）
@@ -442,16 +513,21 @@ def quadcell_single():
             company_auth_key = api.get_company_authkey(company_name)
             if company_auth_key:
                 payload['authKey'] = company_auth_key
-                print(f"Using authKey from company: {company_name}")
+                route_loggers['quadcell'].debug("Using authKey from company: %s", company_name)
         
         # 如果沒有提供authKey，使用默認值
         if 'authKey' not in payload:
             payload['authKey'] = QuadcellAPI.DEFAULT_AUTH_KEY
-            print("Using default authKey")
+            route_loggers['quadcell'].debug("Using default authKey")
+        
+        # 發送前校驗必填參數和類型
+        invalid = validation_error_response(quadcell_validator, endpoint, payload)
+        if invalid:
+            return invalid
         
         # 發送請求，傳遞調試模式參數
         api = QuadcellAPI()
-        response = api.single_request(endpoint, payload, debug=debug_mode)
+        response = api.single_request(endpoint, payload, debug=debug_mode, bypass_cache=form_flag('bypassCache'))
         
         return jsonify(response)
         
@@ -464,7 +540,7 @@ def quadcell_endpoint_params(endpoint):
     try:
         # 解码URL编码的端点
         endpoint = unquote(endpoint)
-        print(f"Getting params for endpoint: {endpoint}")
+        route_loggers['quadcell'].debug("Getting params for endpoint: %s", endpoint)
         
         # 获取当前语言
         language = g.language
@@ -490,9 +566,7 @@ def quadcell_endpoint_params(endpoint):
             
         return jsonify(translated_params)
     except Exception as e:
-        print(f"Error getting params for {endpoint}: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        route_loggers['quadcell'].exception("Error getting params for %s: %s", endpoint, e)
         return jsonify({'error': str(e)}), 500 
 
 # 添加公司映射管理路由
@@ -587,7 +661,7 @@ def simlessly_endpoint_params(endpoint):
     try:
         # 解码URL编码的端点
         endpoint = unquote(endpoint)
-        print(f"Getting params for endpoint: {endpoint}")
+        route_loggers['simlessly'].debug("Getting params for endpoint: %s", endpoint)
         
         # 获取当前语言
         language = g.language
@@ -613,9 +687,7 @@ def simlessly_endpoint_params(endpoint):
             
         return jsonify(translated_params)
     except Exception as e:
-        print(f"Error getting params for {endpoint}: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        route_loggers['simlessly'].exception("Error getting params for %s: %s", endpoint, e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/simlessly/batch', methods=['POST'])
@@ -630,32 +702,33 @@ def simlessly_batch():
         if file.filename == '':
             return jsonify({'error': '没有选择文件'}), 400
         
-        # 检查文件扩展名
-        if not file.filename.lower().endswith(('.xlsx', '.xls')):
-            return jsonify({'error': '只支持Excel文件(.xlsx, .xls)'}), 400
+        # 检查文件扩展名（.csv.gz作为一个整体）
+        extension = batch_file_extension(file.filename)
+        if extension is None:
+            return jsonify({'error': f"只支持Excel、CSV或Parquet文件({', '.join(BATCH_FILE_EXTENSIONS)})"}), 400
+            
+        # 获取并发参数（先于保存文件校验，参数无效时不留下上传文件）
+        options = batch_form_options()
+        if options is None:
+            return jsonify({'error': 'maxWorkers必须为正整数，rateLimit必须为非负数'}), 400
             
         # 保存上传的文件
-        filename = f"simlessly_{datetime.now().strftime('%Y%m%d_%H%M%S')}{os.path.splitext(file.filename)[1]}"
+        filename = f"simlessly_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}{extension}"
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
         file.save(filepath)
         
         # 获取延迟参数
         delay = float(request.form.get('delay', 0.5))
         
-        # 处理请求
+        # 提交后台任务
         api = SimlesslyAPI()
-        result_path = api.batch_process(filepath, delay)
+        job = batch_jobs.submit('simlessly', api, api.batch_process, filepath, delay, **options)
         
-        # 确保文件存在
-        if not os.path.exists(result_path):
-            return jsonify({'error': '结果文件生成失败'}), 500
-            
-        # 返回结果文件名（前端将使用此文件名下载）
-        result_filename = os.path.basename(result_path)
+        # 返回任务ID（前端通过 /api/batch/jobs/<job_id> 轮询进度）
         return jsonify({
             'success': True,
-            'filename': result_filename,
-            'message': f'处理完成，共处理了{api.processed_count}条请求'
+            'job_id': job.id,
+            'message': '任务已提交，正在后台处理'
         })
         
     except Exception as e:
@@ -668,15 +741,20 @@ def simlessly_single():
         endpoint = request.form.get('endpoint')
         payload = {}
         
-        # 构建payload，排除endpoint字段
+        # 构建payload，排除endpoint和bypassCache字段
         for key in request.form:
-            if key != 'endpoint':
+            if key not in ('endpoint', 'bypassCache'):
                 value = request.form.get(key)
                 payload[key] = value
         
+        # 发送前校验必填参数和类型
+        invalid = validation_error_response(simlessly_validator, endpoint, payload)
+        if invalid:
+            return invalid
+        
         # 发送请求
         api = SimlesslyAPI()
-        response = api.single_request(endpoint, payload)
+        response = api.single_request(endpoint, payload, bypass_cache=form_flag('bypassCache'))
         
         return jsonify(response)
         
@@ -696,32 +774,33 @@ def worldmove_batch():
         if file.filename == '':
             return jsonify({'error': '没有选择文件'}), 400
         
-        # 检查文件扩展名
-        if not file.filename.lower().endswith(('.xlsx', '.xls')):
-            return jsonify({'error': '只支持Excel文件(.xlsx, .xls)'}), 400
+        # 检查文件扩展名（.csv.gz作为一个整体）
+        extension = batch_file_extension(file.filename)
+        if extension is None:
+            return jsonify({'error': f"只支持Excel、CSV或Parquet文件({', '.join(BATCH_FILE_EXTENSIONS)})"}), 400
+            
+        # 获取并发参数（先于保存文件校验，参数无效时不留下上传文件）
+        options = batch_form_options()
+        if options is None:
+            return jsonify({'error': 'maxWorkers必须为正整数，rateLimit必须为非负数'}), 400
             
         # 保存上传的文件
-        filename = f"worldmove_{datetime.now().strftime('%Y%m%d_%H%M%S')}{os.path.splitext(file.filename)[1]}"
+        filename = f"worldmove_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}{extension}"
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
         file.save(filepath)
         
         # 获取延迟参数
         delay = float(request.form.get('delay', 0.5))
         
-        # 处理请求
+        # 提交后台任务
         api = WorldMoveAPI()
-        result_path = api.batch_process(filepath, delay)
+        job = batch_jobs.submit('worldmove', api, api.batch_process, filepath, delay, **options)
         
-        # 确保文件存在
-        if not os.path.exists(result_path):
-            return jsonify({'error': '结果文件生成失败'}), 500
-            
-        # 返回结果文件名（前端将使用此文件名下载）
-        result_filename = os.path.basename(result_path)
+        # 返回任务ID（前端通过 /api/batch/jobs/<job_id> 轮询进度）
         return jsonify({
             'success': True,
-            'filename': result_filename,
-            'message': f'处理完成，共处理了{api.processed_count}条请求'
+            'job_id': job.id,
+            'message': '任务已提交，正在后台处理'
         })
         
     except Exception as e:
@@ -734,9 +813,9 @@ def worldmove_single():
         endpoint = request.form.get('endpoint')
         payload = {}
         
-        # 构建payload，处理所有参数
+        # 构建payload，处理所有参数（排除endpoint和bypassCache字段）
         for key in request.form:
-            if key != 'endpoint':
+            if key not in ('endpoint', 'bypassCache'):
                 value = request.form.get(key)
                 
                 # 尝试解析数组参数
@@ -765,20 +844,23 @@ def worldmove_single():
                     # 普通参数
                     payload[key] = value
         
-        # 打印调试信息
-        print(f"Endpoint: {endpoint}")
-        print(f"Payload: {json.dumps(payload, indent=2)}")
+        # 调试信息（DEBUG级别）
+        if route_loggers['worldmove'].isEnabledFor(logging.DEBUG):
+            route_loggers['worldmove'].debug("Endpoint: %s, payload: %s", endpoint, json.dumps(payload, ensure_ascii=False))
+        
+        # 发送前校验必填参数和类型
+        invalid = validation_error_response(worldmove_validator, endpoint, payload)
+        if invalid:
+            return invalid
         
         # 发送请求
         api = WorldMoveAPI()
-        response = api.single_request(endpoint, payload)
+        response = api.single_request(endpoint, payload, bypass_cache=form_flag('bypassCache'))
         
         return jsonify(response)
         
     except Exception as e:
-        print(f"Error in worldmove_single: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        route_loggers['worldmove'].exception("Error in worldmove_single: %s", e)
         return jsonify({'error': str(e)}), 500
 
 # WorldMove回调路由
@@ -850,7 +932,7 @@ def worldmove_endpoint_params(endpoint):
     try:
         # 解码URL编码的端点
         endpoint = unquote(endpoint)
-        print(f"Getting params for endpoint: {endpoint}")
+        route_loggers['worldmove'].debug("Getting params for endpoint: %s", endpoint)
         
         # 获取当前语言
         language = g.language
@@ -876,9 +958,7 @@ def worldmove_endpoint_params(endpoint):
             
         return jsonify(translated_params)
     except Exception as e:
-        print(f"Error getting params for {endpoint}: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        route_loggers['worldmove'].exception("Error getting params for %s: %s", endpoint, e)
         return jsonify({'error': str(e)}), 500
 
 # 修改WorldMove回调信息页面
@@ -944,6 +1024,171 @@ def download_callback_file(filename):
     except Exception as e:
         return jsonify({'error': str(e)}), 500    
 
+# 批量任务进度查询
+@app.route('/api/batch/jobs')
+def list_batch_jobs():
+    """获取批量任务列表，可按供应商过滤"""
+    vendor = request.args.get('vendor')
+    return jsonify([job.to_dict() for job in batch_jobs.list(vendor)])
+
+@app.route('/api/batch/jobs/<job_id>')
+def get_batch_job(job_id):
+    """获取单个批量任务的进度"""
+    job = batch_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': '任务不存在'}), 404
+    return jsonify(job.to_dict())
+
+# Prometheus指标
+@app.route('/metrics')
+def metrics():
+    """供应商调用、批量任务、路由延迟等指标（Prometheus文本格式）"""
+    return Response(metrics_registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# 供应商熔断器状态
+@app.route('/api/vendors/status')
+def vendor_status():
+    """获取各供应商熔断器状态"""
+    return jsonify(circuit_status())
+
+# 批量断点续传
+BATCH_API_CLASSES = {
+    'quadcell': QuadcellAPI,
+    'montnet': MontNetAPI,
+    'simlessly': SimlesslyAPI,
+    'worldmove': WorldMoveAPI
+}
+
+def _active_batch_run_ids():
+    """当前排队或运行中的任务所对应的批次ID"""
+    run_ids = set()
+    for job in batch_jobs.list():
+        output_path = getattr(job.api, 'output_path', None)
+        if job.status in ('queued', 'running') and output_path:
+            run_ids.add(run_id_for(output_path))
+    return run_ids
+
+@app.route('/api/batch/runs')
+def list_batch_runs():
+    """获取有断点记录的批次，可按供应商过滤；active=False且未完成的批次可续传"""
+    try:
+        vendor = request.args.get('vendor')
+        store = BatchCheckpoint(os.path.join(app.config['UPLOAD_FOLDER'], "Log"))
+        try:
+            runs = store.list_runs(vendor)
+        finally:
+            store.close()
+        active = _active_batch_run_ids()
+        for run in runs:
+            run['active'] = run['run_id'] in active
+            run['filename'] = os.path.basename(run['output_path'])
+        return jsonify(runs)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/batch/runs/<run_id>/resume', methods=['POST'])
+def resume_batch_run(run_id):
+    """续传中断的批次：已完成的行直接沿用，其余行继续发送"""
+    try:
+        store = BatchCheckpoint(os.path.join(app.config['UPLOAD_FOLDER'], "Log"))
+        try:
+            run = store.get_run(run_id)
+        finally:
+            store.close()
+        if run is None:
+            return jsonify({'error': '批次不存在'}), 404
+        if run['status'] == 'completed':
+            return jsonify({'error': '批次已完成，无需续传'}), 400
+        if run_id in _active_batch_run_ids():
+            return jsonify({'error': '批次正在处理中'}), 409
+        if not os.path.exists(run['input_path']):
+            return jsonify({'error': '原始上传文件不存在，无法续传'}), 400
+        
+        api = BATCH_API_CLASSES[run['vendor']]()
+        # 排队期间也能识别该批次正在处理
+        api.output_path = run['output_path']
+        job = batch_jobs.submit(run['vendor'], api, api.batch_process, run['input_path'],
+                                resume_run_id=run_id, **run['params'])
+
+        return jsonify({
+            'success': True,
+            'job_id': job.id,
+            'message': '任务已提交，正在后台处理'
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# 重试失败的行：由之前的结果文件重建请求，成功的行原样沿用，生成合并后的结果文件
+@app.route('/api/batch/runs/<run_id>/retry-failed', methods=['POST'])
+def retry_failed_batch_run(run_id):
+    """重新发送已完成批次中失败的行，沿用原批次的处理参数"""
+    try:
+        store = BatchCheckpoint(os.path.join(app.config['UPLOAD_FOLDER'], "Log"))
+        try:
+            run = store.get_run(run_id)
+        finally:
+            store.close()
+        if run is None:
+            return jsonify({'error': '批次不存在'}), 404
+        if run_id in _active_batch_run_ids():
+            return jsonify({'error': '批次正在处理中'}), 409
+        if run['status'] != 'completed':
+            return jsonify({'error': '批次未完成，请先续传'}), 400
+
+        api = BATCH_API_CLASSES[run['vendor']]()
+        params = dict(run['params'], retry_failed=True)
+        job = batch_jobs.submit(run['vendor'], api, api.batch_process, run['output_path'], **params)
+
+        return jsonify({
+            'success': True,
+            'job_id': job.id,
+            'message': '任务已提交，正在后台处理'
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/batch/retry-failed', methods=['POST'])
+def retry_failed_result_file():
+    """上传之前下载的结果文件（xlsx），重新发送其中失败的行"""
+    try:
+        vendor = request.form.get('vendor')
+        if vendor not in BATCH_API_CLASSES:
+            return jsonify({'error': f"vendor必须为{', '.join(BATCH_API_CLASSES)}之一"}), 400
+
+        # 检查文件上传
+        if 'file' not in request.files:
+            return jsonify({'error': '没有上传文件'}), 400
+
+        file = request.files['file']
+        if file.filename == '':
+            return jsonify({'error': '没有选择文件'}), 400
+        if not file.filename.lower().endswith('.xlsx'):
+            return jsonify({'error': '只支持批量结果文件(.xlsx)'}), 400
+
+        options = batch_form_options()
+        if options is None:
+            return jsonify({'error': 'maxWorkers必须为正整数，rateLimit必须为非负数'}), 400
+
+        # 保存到结果目录，合并后的结果文件也写在这里
+        log_dir = os.path.join(app.config['UPLOAD_FOLDER'], "Log")
+        os.makedirs(log_dir, exist_ok=True)
+        filename = f"{vendor}_retry_source_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}.xlsx"
+        filepath = os.path.join(log_dir, filename)
+        file.save(filepath)
+
+        delay = float(request.form.get('delay', 0.5))
+
+        api = BATCH_API_CLASSES[vendor]()
+        job = batch_jobs.submit(vendor, api, api.batch_process, filepath, delay, retry_failed=True, **options)
+
+        return jsonify({
+            'success': True,
+            'job_id': job.id,
+            'message': '任务已提交，正在后台处理'
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # 通用下载路由
 @app.route('/api/download/<vendor>/<filename>')
 def download_file(vendor, filename):
@@ -953,9 +1198,18 @@ def download_file(vendor, filename):
         safe_filename = os.path.basename(filename)
         file_path = os.path.join(app.config['UPLOAD_FOLDER'], "Log", safe_filename)
         
-        # 检查文件是否存在
+        # 批次仍在运行时，xlsx尚未生成，根据逐行结果日志生成当前快照
         if not os.path.exists(file_path):
-            return jsonify({'error': '文件不存在'}), 404
+            snapshot = io.BytesIO()
+            if build_partial_workbook(file_path, snapshot) is None:
+                return jsonify({'error': '文件不存在'}), 404
+            snapshot.seek(0)
+            return send_file(
+                snapshot,
+                as_attachment=True,
+                download_name=f"{vendor}_partial_result_{safe_filename}",
+                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            )
             
         # 返回文件
         return send_file(
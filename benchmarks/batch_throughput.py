@@ -0,0 +1,286 @@
+import argparse
+import contextlib
+import functools
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from collections import defaultdict
+from contextlib import contextmanager
+
+# 关闭批量处理中的tqdm进度条，避免干扰计时（须在导入供应商模块之前设置）
+os.environ.setdefault("TQDM_DISABLE", "1")
+
+import pandas as pd
+from benchmarks.common import REPO_ROOT, environment, write_results
+from modules import batch_rows, quadcell_api, montnet_api, simlessly_api, worldmove_api
+from modules.async_transport import AsyncVendorTransport
+from modules.batch_checkpoint import BatchCheckpoint, RunCheckpoint
+from modules.batch_readers import BatchFileReader
+from modules.batch_results import StreamingResultWriter
+from modules.batch_rows import ExpandedRows
+from modules.http_transport import VendorTransport
+from modules.mock_vendors import MockBehavior, MockVendorServer, LatencyModel, VENDOR_PATHS, point_clients_at
+
+# 批量处理端到端吞吐基准：用合成的Excel（含号码范围）对本地模拟供应商服务器运行各供应商的batch_process，
+# 按阶段统计耗时，结果输出为JSON，便于跨版本比较热点路径的回归
+#
+#   python -m benchmarks.batch_throughput --rows 1000 10000 100000 --output benchmarks/results/throughput.json
+
+PHASES = ("excel_parse", "normalize", "range_expansion", "payload_build", "encode_sign", "network", "decode",
+          "checkpoint", "result_write")
+
+# 各供应商的合成数据：端点、号码列、号码起始值，以及该列是否支持范围展开
+WORKLOADS = {
+    "quadcell": {"endpoint": "qrysub", "column": "imsi", "start": 454120000000000, "ranges": True},
+    "montnet": {"endpoint": "qrysub", "column": "imsi", "start": 454120000000000, "ranges": True},
+    "simlessly": {"endpoint": "profile/detail", "column": "iccid", "start": 8985200000000000000, "ranges": True},
+    # WorldMove端点没有imsi参数，不涉及范围展开
+    "worldmove": {"endpoint": "SimQuery/simExists", "column": "simNum", "start": 89852000000000000,
+                  "ranges": False}
+}
+
+API_CLASSES = {
+    "quadcell": quadcell_api.QuadcellAPI,
+    "montnet": montnet_api.MontNetAPI,
+    "simlessly": simlessly_api.SimlesslyAPI,
+    "worldmove": worldmove_api.WorldMoveAPI
+}
+
+
+class PhaseTimer:
+    """
+    按阶段累计耗时，嵌套的子阶段从父阶段中扣除（每个阶段只计自身耗时）
+    并发模式下各线程的耗时相加，可能超过总耗时
+    """
+
+    def __init__(self):
+        self.totals = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def _add(self, name, seconds):
+        with self.lock:
+            self.totals[name] += seconds
+            self.calls[name] += 1
+
+    @contextmanager
+    def phase(self, name):
+        stack = self.local.__dict__.setdefault("stack", [])
+        # 子阶段耗时累加到frame[0]
+        frame = [0.0]
+        stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            if stack:
+                stack[-1][0] += elapsed
+            self._add(name, elapsed - frame[0])
+
+    def wrap(self, name, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def wrap_coroutine(self, name, func):
+        """协程跨越await，不参与嵌套扣除，只累计从开始到完成的时间"""
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                self._add(name, time.perf_counter() - start)
+        return wrapper
+
+    def wrap_iter(self, name, iterable):
+        """每次取下一个元素的耗时计入该阶段"""
+        iterator = iter(iterable)
+        while True:
+            with self.phase(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def report(self, wall_seconds):
+        phases = {name: round(self.totals.get(name, 0.0), 4) for name in PHASES}
+        phases["other"] = round(max(wall_seconds - sum(self.totals.values()), 0.0), 4)
+        return phases
+
+
+@contextmanager
+def instrument(timer):
+    """在批量处理的各阶段入口挂上计时，退出时恢复原函数"""
+    patches = []
+
+    def patch(owner, name, wrapper_factory, static=False):
+        original = getattr(owner, name)
+        patches.append((owner, name, owner.__dict__[name] if isinstance(owner, type) else original))
+        wrapped = wrapper_factory(original)
+        setattr(owner, name, staticmethod(wrapped) if static else wrapped)
+
+    patch(BatchFileReader, "_iter_chunks",
+          lambda f: lambda self, *args: timer.wrap_iter("excel_parse", f(self, *args)))
+    patch(batch_rows, "normalize_frame", lambda f: timer.wrap("normalize", f))
+    patch(ExpandedRows, "__iter__", lambda f: lambda self: timer.wrap_iter("range_expansion", f(self)))
+    patch(RunCheckpoint, "skip_recorded",
+          lambda f: lambda self, items: f(self, timer.wrap_iter("payload_build", items)))
+
+    patch(quadcell_api.HttpApiCodec, "encode", lambda f: timer.wrap("encode_sign", f), static=True)
+    patch(montnet_api.HttpApiCodec, "encode", lambda f: timer.wrap("encode_sign", f), static=True)
+    patch(simlessly_api.HmacApiClient, "generate_signature", lambda f: timer.wrap("encode_sign", f), static=True)
+    patch(worldmove_api.Sha1ApiClient, "compute_signature", lambda f: timer.wrap("encode_sign", f), static=True)
+
+    patch(VendorTransport, "post", lambda f: timer.wrap("network", f))
+    patch(AsyncVendorTransport, "post", lambda f: timer.wrap_coroutine("network", f))
+
+    patch(quadcell_api.HttpApiClient, "_handle_response", lambda f: timer.wrap("decode", f), static=True)
+    patch(montnet_api.MHttpApiClient, "_handle_response", lambda f: timer.wrap("decode", f), static=True)
+    patch(simlessly_api.HmacApiClient, "_handle_response", lambda f: timer.wrap("decode", f), static=True)
+    patch(worldmove_api.Sha1ApiClient, "_handle_response", lambda f: timer.wrap("decode", f), static=True)
+
+    patch(BatchCheckpoint, "_save_row", lambda f: timer.wrap("checkpoint", f))
+    patch(BatchCheckpoint, "get_row_record", lambda f: timer.wrap("checkpoint", f))
+    patch(StreamingResultWriter, "write", lambda f: timer.wrap("result_write", f))
+    patch(StreamingResultWriter, "close", lambda f: timer.wrap("result_write", f))
+    try:
+        yield timer
+    finally:
+        for owner, name, original in reversed(patches):
+            setattr(owner, name, original)
+
+
+def build_workbook(path, vendor, rows, range_fraction, range_size):
+    """
+    生成合成Excel
+    :param rows: 展开后的请求总数
+    :param range_fraction: 由号码范围展开产生的请求比例（供应商不支持范围时为0）
+    """
+    workload = WORKLOADS[vendor]
+    column, number = workload["column"], workload["start"]
+    ranged = int(rows * range_fraction) if workload["ranges"] else 0
+    range_rows, remainder = divmod(ranged, range_size)
+    values = []
+    for _ in range(range_rows):
+        values.append(f"{number}-{number + range_size - 1}")
+        number += range_size
+    for _ in range(rows - range_rows * range_size):
+        values.append(str(number))
+        number += 1
+    pd.DataFrame({"endpoint": workload["endpoint"], column: values}).to_excel(path, index=False)
+    return len(values)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def mock_servers(latency_ms, in_process=False):
+    """
+    启动模拟供应商服务器并把客户端指向它
+    默认在子进程中运行，避免与被测的批量处理争用同一进程的GIL
+    """
+    behaviors = {"default": MockBehavior(LatencyModel("fixed", latency_ms))}
+    if in_process:
+        server = MockVendorServer(behaviors)
+        point_clients_at(server.start())
+        try:
+            yield
+        finally:
+            server.stop()
+        return
+
+    port = _free_port()
+    process = subprocess.Popen([sys.executable, "-m", "modules.mock_vendors", "--port", str(port),
+                                "--latency-ms", str(latency_ms)],
+                               cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        base = f"http://127.0.0.1:{port}"
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                urllib.request.urlopen(base + "/_stats", timeout=1).read()
+                break
+            except OSError:
+                if time.monotonic() > deadline or process.poll() is not None:
+                    raise RuntimeError("模拟供应商服务器启动失败")
+                time.sleep(0.1)
+        point_clients_at({vendor: base + path for vendor, path in VENDOR_PATHS.items()})
+        yield
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def run_case(vendor, rows, work_dir, args):
+    """运行一个供应商、一种行数的批量处理，返回计时结果"""
+    input_path = os.path.join(work_dir, f"{vendor}_{rows}.xlsx")
+    workbook_rows = build_workbook(input_path, vendor, rows, args.range_fraction, args.range_size)
+
+    api = API_CLASSES[vendor]()
+    kwargs = {"delay": 0, "max_workers": args.workers, "async_io": args.async_io}
+
+    timer = PhaseTimer()
+    # WorldMove等供应商的批量处理会打印逐条日志，计时期间丢弃输出
+    with instrument(timer), contextlib.redirect_stdout(open(os.devnull, "w")):
+        start = time.perf_counter()
+        api.batch_process(input_path, **kwargs)
+        wall = time.perf_counter() - start
+
+    return {
+        "vendor": vendor,
+        "rows": rows,
+        "workbook_rows": workbook_rows,
+        "success": api.success_count,
+        "failed": api.failed_count,
+        "wall_seconds": round(wall, 4),
+        "rows_per_second": round(rows / wall, 1) if wall else None,
+        "phases_seconds": timer.report(wall)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="供应商批量处理端到端吞吐基准")
+    parser.add_argument("--vendors", nargs="+", default=list(WORKLOADS), choices=list(WORKLOADS))
+    parser.add_argument("--rows", nargs="+", type=int, default=[1000, 10000, 100000])
+    parser.add_argument("--range-fraction", type=float, default=0.5, help="由号码范围展开产生的请求比例")
+    parser.add_argument("--range-size", type=int, default=100, help="每个号码范围包含的号码数")
+    parser.add_argument("--latency-ms", type=float, default=0, help="模拟服务器的固定响应延迟")
+    parser.add_argument("--workers", type=int, default=1, help="批量的最大并发数")
+    parser.add_argument("--async-io", action="store_true", help="批量使用异步I/O模式")
+    parser.add_argument("--in-process", action="store_true", help="模拟服务器与基准在同一进程中运行")
+    parser.add_argument("--output", help="结果JSON路径，未指定时输出到stdout")
+    args = parser.parse_args()
+
+    results = {
+        "benchmark": "batch_throughput",
+        "environment": environment(),
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "cases": []
+    }
+    with tempfile.TemporaryDirectory() as work_dir, mock_servers(args.latency_ms, args.in_process):
+        for vendor in args.vendors:
+            for rows in args.rows:
+                case = run_case(vendor, rows, work_dir, args)
+                results["cases"].append(case)
+                print(f"▶ {vendor} {rows} rows: {case['rows_per_second']} rows/s", file=sys.stderr)
+    write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import argparse
+import contextlib
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from benchmarks.common import environment, write_results
+from modules import montnet_api, quadcell_api
+from modules.simlessly_api import HmacApiClient
+from modules.worldmove_api import Sha1ApiClient
+
+# 加密与签名热点路径的微基准：各供应商编解码和签名函数在100B~64KB负载下的每秒次数和每次调用的内存分配，
+# 与保存的基线比较，吞吐下降或分配增加超过阈值时以非零状态退出
+#
+#   python -m benchmarks.crypto_micro                      # 与基线比较
+#   python -m benchmarks.crypto_micro --save-baseline      # 优化确认后更新基线
+
+# Quadcell/MontNet报文长度字段为2字节，单条报文不超过65535字节，最大负载取65000
+SIZES = (100, 1024, 4096, 16384, 65000)
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "crypto_micro.json")
+DEFAULT_THRESHOLD = 0.2
+
+MONTNET_KEY_IDX = "01"
+SIMLESSLY_SECRET = "benchmark-secret-key"
+
+
+def json_payload(size):
+    """生成序列化后约size字节的JSON请求体"""
+    payload = {"authKey": "SYtest21", "imsi": "454120000000001", "data": ""}
+    filler = size - len(json.dumps(payload))
+    payload["data"] = "x" * max(filler, 0)
+    return json.dumps(payload)
+
+
+def worldmove_payload(size):
+    """生成prodList序列化后约size字节的WorldMove请求"""
+    product = {"wmproductId": "WM000123", "qty": 1}
+    count = max(size // len(json.dumps(product)), 1)
+    return {"prodList": [dict(product, qty=i + 1) for i in range(count)]}
+
+
+def build_cases(size):
+    """
+    每个用例为 (名称, 无参函数)；输入在计时之外预先构造
+    """
+    plain = json_payload(size)
+    quadcell_encoded = quadcell_api.HttpApiCodec.encode(plain)
+    montnet_encoded = montnet_api.HttpApiCodec.encode(plain, MONTNET_KEY_IDX)
+    montnet_key = montnet_api.HttpApiCodec.get_secret_key(MONTNET_KEY_IDX)
+    montnet_body = montnet_api.HttpApiCodec.encrypt_text(plain, montnet_key)
+    worldmove = worldmove_payload(size)
+    return [
+        ("quadcell.encode", lambda: quadcell_api.HttpApiCodec.encode(plain)),
+        ("quadcell.decode", lambda: quadcell_api.HttpApiCodec.decode(quadcell_encoded, verbose=False)),
+        ("montnet.encode", lambda: montnet_api.HttpApiCodec.encode(plain, MONTNET_KEY_IDX)),
+        ("montnet.decode", lambda: montnet_api.HttpApiCodec.decode(montnet_encoded)),
+        ("montnet.gen_mac", lambda: montnet_api.HttpApiCodec.gen_mac(MONTNET_KEY_IDX, montnet_key, montnet_body)),
+        ("simlessly.generate_signature", lambda: HmacApiClient.generate_signature(plain, SIMLESSLY_SECRET)),
+        ("worldmove.compute_signature", lambda: Sha1ApiClient.compute_signature("SOrder/mybuyesim", worldmove))
+    ]
+
+
+def measure_ops(func, min_seconds, repeat):
+    """先确定每轮调用次数使单轮不短于min_seconds，取repeat轮中最快的一轮计算每秒次数"""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            break
+        number *= 2 if elapsed <= 0 else min(max(int(min_seconds / elapsed * 1.2), 2), 10)
+    best = elapsed
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return number / best
+
+
+def measure_allocations(func, calls):
+    """
+    tracemalloc统计每次调用的分配：allocated_bytes为调用期间的峰值增量，
+    retained_bytes为调用结束后仍未释放的增量（用于发现缓存无限增长）
+    """
+    func()
+    gc.collect()
+    peaks, retained = [], 0
+    tracemalloc.start()
+    try:
+        for _ in range(calls):
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            func()
+            after, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained += after - before
+    finally:
+        tracemalloc.stop()
+    return sorted(peaks)[len(peaks) // 2], retained / calls
+
+
+def run(sizes, min_seconds, repeat, alloc_calls, only=None):
+    cases = {}
+    # 旧版本的WorldMove签名函数会打印调试信息，计时期间丢弃输出，以便与基线比较
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        for size in sizes:
+            for name, func in build_cases(size):
+                if only and not any(pattern in name for pattern in only):
+                    continue
+                ops = measure_ops(func, min_seconds, repeat)
+                allocated, retained = measure_allocations(func, alloc_calls)
+                cases[f"{name}@{size}"] = {
+                    "function": name,
+                    "payload_bytes": size,
+                    "ops_per_second": round(ops, 1),
+                    "allocated_bytes_per_call": allocated,
+                    "retained_bytes_per_call": round(retained, 1)
+                }
+                print(f"▶ {name}@{size}: {ops:,.0f} ops/s, {allocated:,} B/call", file=sys.stderr)
+    return cases
+
+
+def compare(cases, baseline, threshold):
+    """
+    与基线逐项比较，返回回归列表
+    吞吐低于基线(1 - threshold)倍，或每次调用分配高于基线(1 + threshold)倍视为回归
+    """
+    regressions = []
+    for key, case in cases.items():
+        base = baseline.get("cases", {}).get(key)
+        if not base:
+            continue
+        ops_ratio = case["ops_per_second"] / base["ops_per_second"]
+        case["ops_vs_baseline"] = round(ops_ratio, 3)
+        if ops_ratio < 1 - threshold:
+            regressions.append(f"{key}: ops/s {base['ops_per_second']:,.0f} → {case['ops_per_second']:,.0f} "
+                               f"({ops_ratio - 1:+.0%})")
+        # 小于1KB的分配变化视为噪声
+        base_bytes = base["allocated_bytes_per_call"]
+        if case["allocated_bytes_per_call"] > max(base_bytes * (1 + threshold), base_bytes + 1024):
+            regressions.append(f"{key}: allocated {base_bytes:,} B → {case['allocated_bytes_per_call']:,} B")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="加密与签名热点路径微基准")
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(SIZES), help="负载大小（字节）")
+    parser.add_argument("--only", nargs="+", help="只运行名称包含这些字符串的用例，如 quadcell montnet.gen_mac")
+    parser.add_argument("--min-seconds", type=float, default=0.2, help="每轮计时的最短时间")
+    parser.add_argument("--repeat", type=int, default=5, help="计时轮数（取最快一轮）")
+    parser.add_argument("--alloc-calls", type=int, default=20, help="统计内存分配的调用次数")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="基线JSON路径")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="回归阈值（相对基线的比例，默认0.2即20%%）")
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果保存为基线")
+    parser.add_argument("--output", help="结果JSON路径，未指定时输出到stdout")
+    args = parser.parse_args()
+
+    results = {
+        "benchmark": "crypto_micro",
+        "environment": environment(),
+        "cases": run(args.sizes, args.min_seconds, args.repeat, args.alloc_calls, args.only)
+    }
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    if args.save_baseline:
+        # 只运行部分用例时合并到已有基线，其余用例保持不变
+        if baseline:
+            results["cases"] = dict(baseline.get("cases", {}), **results["cases"])
+        write_results(results, args.baseline)
+        print(f"✅ 基线已保存: {args.baseline}", file=sys.stderr)
+        return
+
+    regressions = []
+    if baseline:
+        # 基线与本机环境不同时吞吐数字不可直接比较
+        for key in ("python", "platform", "cpu_count"):
+            if baseline.get("environment", {}).get(key) != results["environment"][key]:
+                print(f"⚠️ 基线的运行环境不同({key})，比较结果仅供参考", file=sys.stderr)
+                break
+        regressions = compare(results["cases"], baseline, args.threshold)
+        results["threshold"] = args.threshold
+        results["regressions"] = regressions
+    else:
+        print(f"⚠️ 基线不存在，未比较: {args.baseline}", file=sys.stderr)
+    write_results(results, args.output)
+
+    if regressions:
+        print("❌ 性能回归:", file=sys.stderr)
+        for line in regressions:
+            print(f"  {line}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
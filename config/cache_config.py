@@ -0,0 +1,34 @@
+# 查询类端点的响应缓存（默认关闭，环境变量 RESPONSE_CACHE_ENABLED=1 也可开启）
+# 单条请求和批量请求共用同一缓存；键为 供应商 + 端点 + authKey + 规整后的请求参数
+# 单条请求表单带 bypassCache=1、批量上传带 bypassCache=1 时不读缓存，但仍以新结果更新缓存
+RESPONSE_CACHE_CONFIG = {
+    "enabled": False,
+    # 缓存条目上限，超出时淘汰最久未使用的条目
+    "max_entries": 10000,
+    # 号码类字段：修改类端点请求中出现的号码，会使同一供应商下带有相同号码的缓存失效
+    # 未单独配置的供应商使用default
+    "identifier_fields": {
+        "default": ["imsi", "iccid", "msisdn"],
+        "worldmove": ["simNum", "rcode"]
+    },
+    # 可缓存的端点及其缓存秒数，只有idempotency=query的端点会被缓存
+    "ttl_seconds": {
+        "quadcell": {
+            "qrysub": 120,
+            "qrypacklist": 120,
+            "qryquota": 60
+        },
+        "montnet": {
+            "qrysub": 120,
+            "qrypacklist": 120,
+            "queryQosQuota": 60
+        },
+        "simlessly": {
+            "profile/detail": 120
+        },
+        "worldmove": {
+            "SimQuery/simExists": 300,
+            "UseageDetail/queryBasicInfo": 120
+        }
+    }
+}
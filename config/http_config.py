@@ -0,0 +1,83 @@
+# 各供应商HTTP连接池配置
+# pool_size: 保持的keep-alive连接数（并发批量时应不小于最大并发数）
+# async_pool_size: 异步传输（aiohttp）的最大连接数，即异步批量的在途请求上限
+# connect_timeout / read_timeout: 建立连接和等待响应的超时秒数
+HTTP_CONNECTION_CONFIG = {
+    "default": {
+        "pool_size": 10,
+        "async_pool_size": 200,
+        "connect_timeout": 5,
+        "read_timeout": 30
+    },
+    "quadcell": {
+        "pool_size": 20
+    },
+    "montnet": {},
+    "simlessly": {},
+    "worldmove": {}
+}
+
+# 各供应商熔断器配置
+# failure_threshold: 连续失败多少次后熔断
+# error_rate_threshold / window_size / min_calls: 最近window_size次请求（至少min_calls次）的失败率达到阈值也熔断
+# open_seconds: 熔断后等待多久放行半开探测请求
+# half_open_max_calls: 半开状态同时放行的探测请求数
+CIRCUIT_BREAKER_CONFIG = {
+    "default": {
+        "failure_threshold": 5,
+        "error_rate_threshold": 0.5,
+        "window_size": 20,
+        "min_calls": 10,
+        "open_seconds": 30,
+        "half_open_max_calls": 1
+    },
+    "quadcell": {},
+    "montnet": {},
+    "simlessly": {},
+    "worldmove": {}
+}
+
+# 各供应商自动重试配置（指数退避 + 随机抖动）
+# max_retries: 首次请求之外最多重试几次
+# backoff_base / backoff_max: 第n次重试前等待 random(0, min(backoff_max, backoff_base * 2^(n-1))) 秒
+# query_retry_statuses: 查询类端点（idempotency=query）可重试的HTTP状态码，连接失败和超时也会重试
+# mutating_retry_statuses: 修改类端点只在确定请求未被处理时重试，另外只重试无法建立连接的错误
+RETRY_CONFIG = {
+    "default": {
+        "max_retries": 3,
+        "backoff_base": 0.5,
+        "backoff_max": 8,
+        "query_retry_statuses": [429, 500, 502, 503, 504],
+        "mutating_retry_statuses": [429]
+    },
+    "quadcell": {},
+    "montnet": {},
+    "simlessly": {},
+    "worldmove": {}
+}
+
+# 自适应并发（AIMD）配置，按供应商 + base URL 分别调节
+# initial_limit / min_limit / max_limit: 初始、最小和最大并发数（批次指定最大并发数时以批次为准）
+# target_p95_seconds / target_error_rate: p95延迟和错误率（5xx、超时、连接失败）的目标，均未超出时每个窗口加increase_step
+# latency_rise_ratio: p95比观测到的最低p95上升超过此倍数时视为延迟上升
+# decrease_factor: 超出目标、延迟上升或收到429时上限乘以此系数
+# window_size: 计算p95的最近延迟样本数
+# min_samples: 每次评估至少需要的样本数（并发数较小时避免按少量样本调节）
+ADAPTIVE_CONCURRENCY_CONFIG = {
+    "default": {
+        "initial_limit": 4,
+        "min_limit": 1,
+        "max_limit": 50,
+        "target_p95_seconds": 2.0,
+        "target_error_rate": 0.05,
+        "latency_rise_ratio": 2.0,
+        "increase_step": 1,
+        "decrease_factor": 0.7,
+        "window_size": 100,
+        "min_samples": 20
+    },
+    "quadcell": {},
+    "montnet": {},
+    "simlessly": {},
+    "worldmove": {}
+}
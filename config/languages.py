@@ -17,11 +17,22 @@ LANGUAGES = {
         'enpoint_info': 'Endpoint Info.',
         'send_request': 'Send Request',
         'response_result': 'Response Result',
-        'select_Excel_File': 'Select Excel File',
+        'select_Excel_File': 'Select File (Excel, CSV or Parquet)',
         'upload_excel': 'Upload Excel File',
         'select_company': 'Select Company',
         'request_interval': 'Request Interval (seconds)',
         'request_interval_note': 'Setting it to 0 means no interval, leaving it blank defaults to 0',
+        'max_concurrency': 'Max Concurrent Requests',
+        'max_concurrency_note': 'Requests in flight at the same time; 1 sends one by one using the interval above',
+        'rate_limit': 'Rate Limit (requests/second)',
+        'rate_limit_note': 'Leave blank for no limit; when concurrency is enabled the rate limit replaces the interval',
+        'async_io_mode': 'Async I/O mode',
+        'async_io_mode_note': 'Send concurrent requests as asyncio tasks on one event loop instead of worker threads; suited to large concurrency',
+        'adaptive_concurrency': 'Adaptive concurrency',
+        'adaptive_concurrency_note': 'Automatically raise concurrency while vendor latency and errors stay low and back off on 429/5xx, timeouts or rising latency; max concurrency above is the upper bound',
+        'bypass_cache': 'Bypass response cache',
+        'bypass_cache_note': 'Always send query requests to the vendor instead of using cached responses (fresh results still refresh the cache); only applies when the response cache is enabled',
+        'batch_job_concurrency': 'Concurrency',
         'start_processing': 'Start Processing',
         'processing': 'Processing',
         'add_new_company': 'Add New Company',
@@ -67,12 +78,17 @@ LANGUAGES = {
         'batch_title': 'Batch Processing Instructions',
         'choose_file': 'Choose File',
         'no_file_selected': 'No file selected',
-        'excel_files_only': 'Excel files only (.xlsx, .xls)',
+        'excel_files_only': 'Excel, CSV or Parquet files only (.xlsx, .xls, .csv, .csv.gz, .parquet)',
         'set_to_zero': 'Set to 0 for no delay, leave blank defaults to 0',
         'click_to_download': 'Click to download',
         'process_completed': 'Processing completed',
         'result_file_generated': 'Result file has been generated, ',
         'processing_please_wait': 'Processing, please wait...',
+        'batch_job_processed': 'Processed',
+        'batch_job_failed_count': 'Failed',
+        'batch_job_eta': 'Estimated time remaining',
+        'batch_job_queued': 'Queued, waiting for a free worker...',
+        'circuit_open_paused': 'Vendor circuit breaker open, sending paused until the vendor recovers',
         'request_processing': 'Request processing, please wait...',
         'debug_mode': 'Debug Mode',
         'debug_mode_description': 'Enable to show detailed API request information for troubleshooting',
@@ -360,10 +376,21 @@ LANGUAGES = {
         'send_request': '发送请求',
         'response_result': '响应结果',
         'upload_excel': '上传Excel文件',
-        'select_Excel_File': '选择Excel文件',        
+        'select_Excel_File': '选择文件（Excel、CSV或Parquet）',        
         'select_company': '选择公司',
         'request_interval': '请求间隔（秒）',
         'request_interval_note': '设置为0表示无间隔，留空默认为0',
+        'max_concurrency': '最大并发请求数',
+        'max_concurrency_note': '同时发送的请求数，1表示按上方间隔逐条发送',
+        'rate_limit': '速率限制（每秒请求数）',
+        'rate_limit_note': '留空表示不限速，启用并发后以速率限制取代请求间隔',
+        'async_io_mode': '异步I/O模式',
+        'async_io_mode_note': '并发请求在单个事件循环上以asyncio任务发送，不再占用工作线程，适合大并发',
+        'adaptive_concurrency': '自适应并发',
+        'adaptive_concurrency_note': '供应商延迟和错误率较低时自动提高并发数，遇到429/5xx、超时或延迟上升时降低；上方的最大并发数为上限',
+        'bypass_cache': '不使用响应缓存',
+        'bypass_cache_note': '查询类请求总是发送给供应商，不读取缓存的响应（新结果仍会更新缓存）；仅在启用响应缓存时有效',
+        'batch_job_concurrency': '并发数',
         'start_processing': '开始处理',
         'processing': '处理中',
         'add_new_company': '添加新公司',
@@ -409,12 +436,17 @@ LANGUAGES = {
         'batch_title': '批量处理说明',
         'choose_file': '选择文件',
         'no_file_selected': '没有选择文件',
-        'excel_files_only': '只支持Excel文件(.xlsx, .xls)',
+        'excel_files_only': '只支持Excel、CSV或Parquet文件(.xlsx, .xls, .csv, .csv.gz, .parquet)',
         'set_to_zero': '设置为0表示无间隔，留空默认为0',
         'click_to_download': '点击下载',
         'process_completed': '处理完成',
         'result_file_generated': '结果文件已生成，',
         'processing_please_wait': '正在处理中，请稍候...',
+        'batch_job_processed': '已处理',
+        'batch_job_failed_count': '失败',
+        'batch_job_eta': '预计剩余时间',
+        'batch_job_queued': '已排队，等待空闲的处理线程...',
+        'circuit_open_paused': '供应商熔断中，暂停发送，等待恢复',
         'request_processing': '请求处理中，请稍候...',
         'debug_mode': '调试模式',
         'debug_mode_description': '启用后将显示API请求的详细资讯，用于故障排查',
@@ -679,10 +711,21 @@ LANGUAGES = {
         'send_request': '發送請求',
         'response_result': '響應結果',
         'upload_excel': '上傳Excel檔案',
-        'select_Excel_File': '選擇Excel文件',        
+        'select_Excel_File': '選擇文件（Excel、CSV或Parquet）',        
         'select_company': '選擇公司',
         'request_interval': '請求間隔（秒）',
         'request_interval_note': '設置為0表示無間隔，留空默認為0',
+        'max_concurrency': '最大並發請求數',
+        'max_concurrency_note': '同時發送的請求數，1表示按上方間隔逐條發送',
+        'rate_limit': '速率限制（每秒請求數）',
+        'rate_limit_note': '留空表示不限速，啟用並發後以速率限制取代請求間隔',
+        'async_io_mode': '非同步I/O模式',
+        'async_io_mode_note': '並發請求在單個事件循環上以asyncio任務發送，不再佔用工作線程，適合大並發',
+        'adaptive_concurrency': '自適應並發',
+        'adaptive_concurrency_note': '供應商延遲和錯誤率較低時自動提高並發數，遇到429/5xx、超時或延遲上升時降低；上方的最大並發數為上限',
+        'bypass_cache': '不使用響應緩存',
+        'bypass_cache_note': '查詢類請求總是發送給供應商，不讀取緩存的響應（新結果仍會更新緩存）；僅在啟用響應緩存時有效',
+        'batch_job_concurrency': '並發數',
         'start_processing': '開始處理',
         'processing': '處理中',
         'add_new_company': '新增公司',
@@ -728,12 +771,17 @@ LANGUAGES = {
         'batch_title': '批量處理説明',        
         'choose_file': '選擇檔案',
         'no_file_selected': '沒有選擇檔案',
-        'excel_files_only': '只支援Excel檔案(.xlsx, .xls)',
+        'excel_files_only': '只支援Excel、CSV或Parquet檔案(.xlsx, .xls, .csv, .csv.gz, .parquet)',
         'set_to_zero': '設置為0表示無間隔，留空預設為0',
         'click_to_download': '點擊下載',
         'process_completed': '處理完成',
         'result_file_generated': '結果檔案已生成，',
         'processing_please_wait': '正在處理中，請稍候...',
+        'batch_job_processed': '已處理',
+        'batch_job_failed_count': '失敗',
+        'batch_job_eta': '預計剩餘時間',
+        'batch_job_queued': '已排隊，等待空閒的處理線程...',
+        'circuit_open_paused': '供應商熔斷中，暫停發送，等待恢復',
         'request_processing': '請求處理中，請稍候...',
         'debug_mode': '調試模式',
         'debug_mode_description': '啟用後將顯示API請求的詳細資訊，用於故障排查',
@@ -0,0 +1,27 @@
+# 日志配置
+# 日志记录先进入内存队列，由后台线程写入控制台和按大小轮转的文件，请求线程不做同步I/O
+# 环境变量 LOG_LEVEL 覆盖全局级别，<VENDOR>_LOG_LEVEL（如 QUADCELL_LOG_LEVEL=DEBUG）覆盖单个供应商的级别
+LOGGING_CONFIG = {
+    "level": "INFO",
+    "console": True,
+    "file": {
+        "path": "logs/app.log",
+        "max_bytes": 10 * 1024 * 1024,
+        "backup_count": 5
+    },
+    # 队列满时丢弃新记录（不阻塞请求线程），丢弃数量记入统计
+    "queue_size": 10000,
+    # 按级别采样的保留比例，只作用于WARNING以下，1.0为全部保留
+    "sample_rates": {
+        "DEBUG": 1.0,
+        "INFO": 1.0
+    },
+    # 各供应商的日志级别；设为DEBUG输出请求、响应、签名和编解码明细
+    # 可加 "sample_rates": {"DEBUG": 0.1} 单独设置该供应商的采样比例
+    "vendors": {
+        "quadcell": {"level": "INFO"},
+        "montnet": {"level": "INFO"},
+        "simlessly": {"level": "INFO"},
+        "worldmove": {"level": "INFO"}
+    }
+}
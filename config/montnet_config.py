@@ -1,5 +1,9 @@
+# idempotency: 幂等类别，决定请求失败时能否自动重试
+#   query    - 只读查询，连接失败、超时、5xx、429都可重试
+#   mutating - 会修改数据，只在确定请求未被处理时重试（无法建立连接、429等）
 MONTNET_ENDPOINT_CONFIG = {
     "heartbeat": {
+        "idempotency": "query",
         "params": [
             {
                 "name": "authKey",
@@ -10,6 +14,7 @@ MONTNET_ENDPOINT_CONFIG = {
         ]
     },
     "qrysub": {
+        "idempotency": "query",
         "params": [
             {
                 "name": "imsi",
@@ -32,6 +37,7 @@ MONTNET_ENDPOINT_CONFIG = {
         ]
     },
     "qrypacklist": {
+        "idempotency": "query",
         "params": [
             {
                 "name": "imsi",
@@ -66,6 +72,7 @@ MONTNET_ENDPOINT_CONFIG = {
         ]
     },
     "queryQosQuota": {
+        "idempotency": "query",
         "params": [
             {
                 "name": "imsi",
@@ -100,6 +107,7 @@ MONTNET_ENDPOINT_CONFIG = {
         ]
     },        
     "addpack": {
+        "idempotency": "mutating",
         "params": [
             {
                 "name": "imsi",
@@ -128,6 +136,7 @@ MONTNET_ENDPOINT_CONFIG = {
         ]
     },
     "delpack": {
+        "idempotency": "mutating",
         "params": [
             {
                 "name": "imsi",
@@ -156,6 +165,7 @@ MONTNET_ENDPOINT_CONFIG = {
         ]
     },
     "quota/topup": {
+        "idempotency": "mutating",
         "params": [
             {
                 "name": "imsi",
@@ -190,6 +200,7 @@ MONTNET_ENDPOINT_CONFIG = {
         ]
     },        
     "suspend": {
+        "idempotency": "mutating",
         "params": [
             {
                 "name": "imsi",
@@ -212,6 +223,7 @@ MONTNET_ENDPOINT_CONFIG = {
         ]
     },
     "recover": {
+        "idempotency": "mutating",
         "params": [
             {
                 "name": "imsi",
@@ -234,6 +246,7 @@ MONTNET_ENDPOINT_CONFIG = {
         ]
     },
     "qryLocation": {
+        "idempotency": "query",
         "params": [
             {
                 "name": "imsi",
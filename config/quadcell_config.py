@@ -1,5 +1,9 @@
+# idempotency: 幂等类别，决定请求失败时能否自动重试
+#   query    - 只读查询，连接失败、超时、5xx、429都可重试
+#   mutating - 会修改数据，只在确定请求未被处理时重试（无法建立连接、429等）
 QUADCELL_ENDPOINT_CONFIG = {
     "qrysub": {
+        "idempotency": "query",
         "params": [
             {"name": "imsi", "type": "string", "required": False, "description_key": "quadcell_param_imsi"},
             {"name": "iccid", "type": "string", "required": False, "description_key": "quadcell_param_iccid"},
@@ -7,6 +11,7 @@ QUADCELL_ENDPOINT_CONFIG = {
         ]
     },
     "qryusage": {
+        "idempotency": "query",
         "params": [
             {"name": "imsi", "type": "string", "required": False, "description_key": "quadcell_param_imsi"},
             {"name": "iccid", "type": "string", "required": False, "description_key": "quadcell_param_iccid"},
@@ -16,22 +21,26 @@ QUADCELL_ENDPOINT_CONFIG = {
         ]
     },
     "qrypacklist": {
+        "idempotency": "query",
         "params": [
             {"name": "imsi", "type": "string", "required": True, "description_key": "quadcell_param_imsi"}
         ]
     },
     "qrypackquota": {
+        "idempotency": "query",
         "params": [
             {"name": "imsi", "type": "string", "required": True, "description_key": "quadcell_param_imsi"},
             {"name": "packCode", "type": "string", "required": False, "description_key": "quadcell_param_packCode"}
         ]
     },
     "qryquota": {
+        "idempotency": "query",
         "params": [
             {"name": "imsi", "type": "string", "required": True, "description_key": "quadcell_param_imsi"}
         ]
     },
     "addsub": {
+        "idempotency": "mutating",
         "params": [
             {"name": "imsi", "type": "string", "required": True, "description_key": "quadcell_param_imsi"},
             {"name": "iccid", "type": "string", "required": False, "description_key": "quadcell_param_iccid"},
@@ -43,23 +52,27 @@ QUADCELL_ENDPOINT_CONFIG = {
         ]
     },
     "delsub": {
+        "idempotency": "mutating",
         "params": [
             {"name": "imsi", "type": "string", "required": True, "description_key": "quadcell_param_imsi"}
         ]
     },
     "suspend": {
+        "idempotency": "mutating",
         "params": [
             {"name": "imsi", "type": "string", "required": True, "description_key": "quadcell_param_imsi"},
             {"name": "serviceId", "type": "string", "required": False, "description_key": "quadcell_param_serviceId"}
         ]
     },
     "recover": {
+        "idempotency": "mutating",
         "params": [
             {"name": "imsi", "type": "string", "required": True, "description_key": "quadcell_param_imsi"},
             {"name": "serviceId", "type": "string", "required": False, "description_key": "quadcell_param_serviceId"}
         ]
     },
     "extend": {
+        "idempotency": "mutating",
         "params": [
             {"name": "imsi", "type": "string", "required": True, "description_key": "quadcell_param_imsi"},
             {"name": "append", "type": "int", "required": True, "description_key": "quadcell_param_append"},
@@ -67,6 +80,7 @@ QUADCELL_ENDPOINT_CONFIG = {
         ]
     },
     "v2/addpack": {
+        "idempotency": "mutating",
         "params": [
             {"name": "imsi", "type": "string", "required": True, "description_key": "quadcell_param_imsi"},
             {"name": "packCode", "type": "string", "required": True, "description_key": "quadcell_param_packCode"},
@@ -76,6 +90,7 @@ QUADCELL_ENDPOINT_CONFIG = {
         ]
     },
     "delpack": {
+        "idempotency": "mutating",
         "params": [
             {"name": "imsi", "type": "string", "required": True, "description_key": "quadcell_param_imsi"},
             {"name": "packCode", "type": "string", "required": True, "description_key": "quadcell_param_packCode"},
@@ -84,6 +99,7 @@ QUADCELL_ENDPOINT_CONFIG = {
         ]
     },
     "rechargepackquota": {
+        "idempotency": "mutating",
         "params": [
             {"name": "imsi", "type": "string", "required": True, "description_key": "quadcell_param_imsi"},
             {"name": "packCode", "type": "string", "required": True, "description_key": "quadcell_param_packCode"},
@@ -92,6 +108,7 @@ QUADCELL_ENDPOINT_CONFIG = {
         ]
     },
     "resetquota": {
+        "idempotency": "mutating",
         "params": [
             {"name": "imsi", "type": "string", "required": True, "description_key": "quadcell_param_imsi"},
             {"name": "packCode", "type": "string", "required": False, "description_key": "quadcell_param_packCode"},
@@ -99,6 +116,7 @@ QUADCELL_ENDPOINT_CONFIG = {
         ]
     },
     "clearquota": {
+        "idempotency": "mutating",
         "params": [
             {"name": "imsi", "type": "string", "required": True, "description_key": "quadcell_param_imsi"},
             {"name": "packCode", "type": "string", "required": False, "description_key": "quadcell_param_packCode"},
@@ -106,6 +124,7 @@ QUADCELL_ENDPOINT_CONFIG = {
         ]
     },
     "rechargequota": {
+        "idempotency": "mutating",
         "params": [
             {"name": "imsi", "type": "string", "required": True, "description_key": "quadcell_param_imsi"},
             {"name": "rechargeValue", "type": "int", "required": True, "description_key": "quadcell_param_rechargeValue"},
@@ -114,6 +133,7 @@ QUADCELL_ENDPOINT_CONFIG = {
         ]
     },
     "addFupCode": {
+        "idempotency": "mutating",
         "params": [
             {"name": "imsi", "type": "string", "required": True, "description_key": "quadcell_param_imsi"},
             {"name": "packCode", "type": "string", "required": True, "description_key": "quadcell_param_packCode"},
@@ -122,6 +142,7 @@ QUADCELL_ENDPOINT_CONFIG = {
         ]
     },
     "delFupCode": {
+        "idempotency": "mutating",
         "params": [
             {"name": "imsi", "type": "string", "required": True, "description_key": "quadcell_param_imsi"},
             {"name": "packCode", "type": "string", "required": True, "description_key": "quadcell_param_packCode"},
@@ -129,12 +150,14 @@ QUADCELL_ENDPOINT_CONFIG = {
         ]
     },
     "cancelLoc": {
+        "idempotency": "mutating",
         "params": [
             {"name": "imsi", "type": "string", "required": False, "description_key": "quadcell_param_imsi"},
             {"name": "msisdn", "type": "string", "required": False, "description_key": "quadcell_param_msisdn"}
         ]
     },
     "submitsms": {
+        "idempotency": "mutating",
         "params": [
             {"name": "smsMt", "type": "string", "required": True, "description_key": "quadcell_param_smsMt"},
             {"name": "smsMo", "type": "string", "required": True, "description_key": "quadcell_param_smsMo"},
@@ -142,11 +165,13 @@ QUADCELL_ENDPOINT_CONFIG = {
         ]
     },
     "qrystatus": {
+        "idempotency": "query",
         "params": [
             {"name": "iccid", "type": "string", "required": True, "description_key": "quadcell_param_iccid"}
         ]
     },
     "esim/order": {
+        "idempotency": "mutating",
         "params": [
             {"name": "account", "type": "string", "required": True, "description_key": "quadcell_param_account"},
             {"name": "imsiType", "type": "string", "required": True, "description_key": "quadcell_param_imsiType"},
@@ -160,11 +185,13 @@ QUADCELL_ENDPOINT_CONFIG = {
         ]
     },
     "esim/qryaccount": {
+        "idempotency": "query",
         "params": [
             {"name": "account", "type": "string", "required": True, "description_key": "quadcell_param_account"}
         ]
     },
     "qryorderhistory": {
+        "idempotency": "query",
         "params": [
             {"name": "imsi", "type": "string", "required": True, "description_key": "quadcell_param_imsi"},
             {"name": "page", "type": "int", "required": False, "description_key": "quadcell_param_page"},
@@ -1,5 +1,9 @@
+# idempotency: 幂等类别，决定请求失败时能否自动重试
+#   query    - 只读查询，连接失败、超时、5xx、429都可重试
+#   mutating - 会修改数据，只在确定请求未被处理时重试（无法建立连接、429等）
 SIMLESSLY_ENDPOINT_CONFIG = {
     "profile/detail": {
+        "idempotency": "query",
         "params": [
             {
                 "name": "iccid",
@@ -10,6 +14,7 @@ SIMLESSLY_ENDPOINT_CONFIG = {
         ]
     },
     "profile/log": {
+        "idempotency": "query",
         "params": [
             {
                 "name": "iccid",
@@ -32,6 +37,7 @@ SIMLESSLY_ENDPOINT_CONFIG = {
         ]
     },
     "profile/delete": {
+        "idempotency": "mutating",
         "params": [
             {
                 "name": "iccid",
@@ -42,6 +48,7 @@ SIMLESSLY_ENDPOINT_CONFIG = {
         ]
     },
     "profile/updateParam": {
+        "idempotency": "mutating",
         "params": [
             {
                 "name": "iccid",
@@ -82,6 +89,7 @@ SIMLESSLY_ENDPOINT_CONFIG = {
         ]
     },    
     "ac/generate": {
+        "idempotency": "mutating",
         "params": [
             {
                 "name": "iccid",
@@ -1,11 +1,16 @@
+# idempotency: 幂等类别，决定请求失败时能否自动重试
+#   query    - 只读查询，连接失败、超时、5xx、429都可重试
+#   mutating - 会修改数据，只在确定请求未被处理时重试（无法建立连接、429等）
 WORLDMOVE_ENDPOINT_CONFIG = {
     "QuoteMg/myQueryAll": {
+        "idempotency": "query",
         "params": [
             {"name": "merchantId", "type": "string", "required": False, "description_key": "worldmove_param_merchantId"},
             {"name": "token", "type": "string", "required": False, "description_key": "worldmove_param_token"}
         ]
     },
     "SOrder/mybuyesim": {
+        "idempotency": "mutating",
         "params": [
             {"name": "email", "type": "string", "required": True, "description_key": "worldmove_param_email"},
             {
@@ -22,11 +27,13 @@ WORLDMOVE_ENDPOINT_CONFIG = {
         ]
     },
     "SOrder/querybuyesim": {
+        "idempotency": "query",
         "params": [
             {"name": "orderId", "type": "string", "required": True, "description_key": "worldmove_param_orderId"}
         ]
     },
     "SOrder/mybuyesimRedemption": {
+        "idempotency": "mutating",
         "params": [
             {"name": "qrcodeType", "type": "string", "required": True, "description_key": "worldmove_param_qrcodeType"},
             {
@@ -42,12 +49,14 @@ WORLDMOVE_ENDPOINT_CONFIG = {
         ]
     },
     "OrderRedemption/redemption": {
+        "idempotency": "mutating",
         "params": [
             {"name": "rcode", "type": "string", "required": True, "description_key": "worldmove_param_rcode"},
             {"name": "qrcodeType", "type": "string", "required": True, "description_key": "worldmove_param_qrcodeType"}
         ]
     },
     "SOrder/mybuysim": {
+        "idempotency": "mutating",
         "params": [
             {"name": "invoiceType", "type": "string", "required": True, "description_key": "worldmove_param_invoiceType"},
             {"name": "taxId", "type": "string", "required": True, "description_key": "worldmove_param_taxId"},
@@ -69,6 +78,7 @@ WORLDMOVE_ENDPOINT_CONFIG = {
         ]
     },
     "SOrder/mydeposit": {
+        "idempotency": "mutating",
         "params": [
             {
                 "name": "prodList", 
@@ -84,6 +94,7 @@ WORLDMOVE_ENDPOINT_CONFIG = {
         ]
     },
     "SimOperate/simRemoteActiv": {
+        "idempotency": "mutating",
         "params": [
             {"name": "simNum", "type": "string", "required": True, "description_key": "worldmove_param_simNum"},
             {"name": "orderId", "type": "string", "required": True, "description_key": "worldmove_param_orderId"},
@@ -91,28 +102,33 @@ WORLDMOVE_ENDPOINT_CONFIG = {
         ]
     },
     "SimOperate/simTrafficReset": {
+        "idempotency": "mutating",
         "params": [
             {"name": "simNum", "type": "string", "required": True, "description_key": "worldmove_param_simNum"},
             {"name": "orderId", "type": "string", "required": True, "description_key": "worldmove_param_orderId"}
         ]
     },
     "UseageDetail/queryUsage": {
+        "idempotency": "query",
         "params": [
             {"name": "simNum", "type": "string", "required": True, "description_key": "worldmove_param_simNum"},
             {"name": "orderId", "type": "string", "required": True, "description_key": "worldmove_param_orderId"}
         ]
     },
     "UseageDetail/queryBasicInfo": {
+        "idempotency": "query",
         "params": [
             {"name": "rcode", "type": "string", "required": True, "description_key": "worldmove_param_rcode"}
         ]
     },
     "UseageDetail/queryEsimProgresses": {
+        "idempotency": "query",
         "params": [
             {"name": "rcode", "type": "string", "required": True, "description_key": "worldmove_param_rcode"}
         ]
     },
     "SimQuery/simExists": {
+        "idempotency": "query",
         "params": [
             {"name": "simNum", "type": "string", "required": True, "description_key": "worldmove_param_simNum"}
         ]
@@ -0,0 +1,158 @@
+import math
+import threading
+from collections import deque
+from config.http_config import ADAPTIVE_CONCURRENCY_CONFIG
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD自适应并发上限
+    每完成一个窗口（limit条，至少min_samples条）的请求评估一次：
+    - 窗口内错误率（5xx、超时、连接失败）不超过target_error_rate，且p95延迟低于target_p95_seconds、
+      也没有比观测到的最低p95上升latency_rise_ratio倍以上时，上限加increase_step
+    - 否则上限乘以decrease_factor；收到429时立即收缩（每个窗口最多收缩一次）
+    """
+
+    def __init__(self, key, initial_limit=4, min_limit=1, max_limit=50, target_p95_seconds=2.0,
+                 target_error_rate=0.05, latency_rise_ratio=2.0, increase_step=1, decrease_factor=0.7,
+                 window_size=100, min_samples=20):
+        self.key = key
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_p95_seconds = target_p95_seconds
+        self.target_error_rate = target_error_rate
+        self.latency_rise_ratio = latency_rise_ratio
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.min_samples = min_samples
+        self.current = float(min(max(initial_limit, min_limit), max_limit))
+        self.in_flight = 0
+        self.latencies = deque(maxlen=window_size)
+        self.baseline_p95 = None
+        self.last_p95 = None
+        self.window_count = 0
+        self.window_errors = 0
+        # 上次收缩之后完成的请求数，同一批在途请求的429只收缩一次
+        self.since_decrease = self.limit
+        self.increases = 0
+        self.decreases = 0
+        self.cond = threading.Condition()
+
+    @property
+    def limit(self):
+        return max(self.min_limit, int(self.current))
+
+    def set_max_limit(self, max_limit):
+        """更新上限（新批次的最大并发数）"""
+        with self.cond:
+            self.max_limit = max(self.min_limit, int(max_limit))
+            self.current = min(self.current, self.max_limit)
+
+    def try_acquire(self):
+        """占用一个并发名额，已达上限时返回False"""
+        with self.cond:
+            if self.in_flight < self.limit:
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self):
+        """阻塞直到占用一个并发名额"""
+        with self.cond:
+            while self.in_flight >= self.limit:
+                self.cond.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self.cond:
+            self.in_flight = max(self.in_flight - 1, 0)
+            self.cond.notify_all()
+
+    def record(self, latency, status_code=None):
+        """
+        记录一次请求的结果（由传输层在每次发送后调用，重试也计入）
+        :param status_code: None表示超时或连接失败
+        """
+        with self.cond:
+            self.latencies.append(latency)
+            self.window_count += 1
+            self.since_decrease += 1
+            if status_code == 429:
+                if self.since_decrease >= self.limit:
+                    self._decrease()
+                return
+            if status_code is None or status_code >= 500:
+                self.window_errors += 1
+            if self.window_count >= max(self.limit, self.min_samples):
+                self._evaluate()
+
+    def _p95(self):
+        ordered = sorted(self.latencies)
+        return ordered[max(math.ceil(len(ordered) * 0.95) - 1, 0)]
+
+    def _evaluate(self):
+        p95 = self._p95()
+        self.last_p95 = p95
+        error_rate = self.window_errors / self.window_count
+        latency_rising = self.baseline_p95 is not None and p95 > self.baseline_p95 * self.latency_rise_ratio
+        if error_rate > self.target_error_rate or p95 > self.target_p95_seconds or latency_rising:
+            self._decrease()
+            return
+        self.baseline_p95 = p95 if self.baseline_p95 is None else min(self.baseline_p95, p95)
+        if self.current < self.max_limit:
+            self.current = min(self.max_limit, self.current + self.increase_step)
+            self.increases += 1
+            self.cond.notify_all()
+        self._reset_window()
+
+    def _decrease(self):
+        self.current = max(self.min_limit, self.current * self.decrease_factor)
+        self.decreases += 1
+        self.since_decrease = 0
+        # 收缩后延迟样本作废，等新上限下的样本再评估
+        self.latencies.clear()
+        self._reset_window()
+
+    def _reset_window(self):
+        self.window_count = 0
+        self.window_errors = 0
+
+    def snapshot(self):
+        """当前状态，用于任务进度"""
+        with self.cond:
+            return {
+                'key': self.key,
+                'limit': self.limit,
+                'max_limit': self.max_limit,
+                'in_flight': self.in_flight,
+                'p95_ms': round(self.last_p95 * 1000) if self.last_p95 is not None else None,
+                'increases': self.increases,
+                'decreases': self.decreases
+            }
+
+
+# 每个供应商 + base URL 一个限流器（同一供应商的正式和UAT环境分别调节），跨批次保留调节结果
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def _limiter_config(vendor):
+    config = dict(ADAPTIVE_CONCURRENCY_CONFIG["default"])
+    config.update(ADAPTIVE_CONCURRENCY_CONFIG.get(vendor, {}))
+    return config
+
+
+def get_adaptive_limiter(vendor, base_url, max_limit=None):
+    """
+    获取供应商 + base URL 的自适应并发上限
+    :param max_limit: 本批次允许的最大并发数，为None时使用配置文件（不沿用之前批次指定的上限）
+    """
+    key = f"{vendor} {base_url}"
+    config = _limiter_config(vendor)
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = AdaptiveConcurrencyLimiter(key, **config)
+            _limiters[key] = limiter
+    limiter.set_max_limit(max_limit or config["max_limit"])
+    return limiter
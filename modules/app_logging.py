@@ -0,0 +1,205 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime
+from config.logging_config import LOGGING_CONFIG
+from modules.metrics import registry
+
+# 应用日志的根记录器，供应商相关的日志在 mvno.vendor.<vendor> 之下，级别可按供应商单独设置
+ROOT_LOGGER = "mvno"
+VENDOR_PREFIX = f"{ROOT_LOGGER}.vendor."
+
+# 日志文件的相对路径以应用根目录为准，不受启动时工作目录的影响
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def get_logger(name):
+    """应用日志记录器 mvno.<name>"""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def vendor_logger(vendor, component=None):
+    """
+    供应商日志记录器 mvno.vendor.<vendor>[.<component>]
+    :param component: 子模块（如 codec、transport），级别继承该供应商的设置
+    """
+    name = f"vendor.{vendor}"
+    if component:
+        name += f".{component}"
+    return get_logger(name)
+
+
+def vendor_of(logger_name):
+    """从记录器名称取供应商，非供应商日志返回None"""
+    if logger_name.startswith(VENDOR_PREFIX):
+        return logger_name[len(VENDOR_PREFIX):].split(".", 1)[0]
+    return None
+
+
+def mask_secret(value, visible=2):
+    """日志中隐藏authKey等凭据，只保留首尾各visible个字符"""
+    value = str(value)
+    if len(value) <= visible * 2:
+        return "*" * len(value)
+    return f"{value[:visible]}***{value[-visible:]}"
+
+
+class SamplingFilter(logging.Filter):
+    """WARNING以下的记录按级别比例采样，供应商可单独设置比例；WARNING及以上全部保留"""
+
+    def __init__(self, sample_rates, vendor_rates=None):
+        super().__init__()
+        self.sample_rates = self._by_level(sample_rates)
+        self.vendor_rates = {vendor: self._by_level(rates) for vendor, rates in (vendor_rates or {}).items()}
+        self.sampled_out = 0
+
+    @staticmethod
+    def _by_level(rates):
+        return {logging.getLevelName(level): rate for level, rate in rates.items()}
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rates = self.vendor_rates.get(vendor_of(record.name), {})
+        rate = rates.get(record.levelno, self.sample_rates.get(record.levelno, 1.0))
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        self.sampled_out += 1
+        return False
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """队列满时丢弃记录，不阻塞调用线程"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """每条记录一行JSON：时间、级别、记录器、供应商、消息，以及extra={"fields": {...}}中的结构化字段"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        vendor = vendor_of(record.name)
+        if vendor:
+            entry["vendor"] = vendor
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+CONSOLE_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
+
+_lock = threading.Lock()
+_state = {"listener": None, "handler": None, "sampler": None}
+
+
+def configure_logging(config=None):
+    """
+    配置日志：记录经队列交给后台线程写入控制台和轮转文件
+    应用启动时调用一次；重复调用时先停止原来的后台线程
+    :param config: 日志配置，为None时使用LOGGING_CONFIG；file.path为相对路径时位于应用根目录下
+    """
+    config = config or LOGGING_CONFIG
+    with _lock:
+        _stop()
+        handlers = []
+        if config.get("console", True):
+            console = logging.StreamHandler(sys.stdout)
+            console.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+            handlers.append(console)
+        file_config = config.get("file")
+        if file_config:
+            path = os.path.join(APP_ROOT, file_config["path"])
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            file_handler = logging.handlers.RotatingFileHandler(
+                path, maxBytes=file_config.get("max_bytes", 0),
+                backupCount=file_config.get("backup_count", 0), encoding="utf-8")
+            file_handler.setFormatter(JsonFormatter())
+            handlers.append(file_handler)
+
+        vendors = config.get("vendors", {})
+        sampler = SamplingFilter(config.get("sample_rates", {}),
+                                 {vendor: settings["sample_rates"] for vendor, settings in vendors.items()
+                                  if "sample_rates" in settings})
+        handler = DroppingQueueHandler(queue.Queue(config.get("queue_size", 10000)))
+        handler.addFilter(sampler)
+        listener = logging.handlers.QueueListener(handler.queue, *handlers, respect_handler_level=True)
+        listener.start()
+
+        root = logging.getLogger(ROOT_LOGGER)
+        root.handlers = [handler]
+        root.propagate = False
+        root.setLevel(os.environ.get("LOG_LEVEL", config.get("level", "INFO")).upper())
+        for vendor, settings in vendors.items():
+            level = os.environ.get(f"{vendor.upper()}_LOG_LEVEL") or settings.get("level")
+            vendor_logger(vendor).setLevel(level.upper() if level else logging.NOTSET)
+
+        if _state["listener"] is None and _state["handler"] is None:
+            atexit.register(shutdown_logging)
+        _state.update(listener=listener, handler=handler, sampler=sampler)
+
+
+def set_vendor_level(vendor, level):
+    """运行中切换供应商的日志级别（如 "DEBUG" 输出请求/响应明细）"""
+    vendor_logger(vendor).setLevel(level.upper() if isinstance(level, str) else level)
+
+
+def _stop():
+    listener = _state["listener"]
+    if listener is not None:
+        # stop()会先写完队列中剩余的记录
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+        _state["listener"] = None
+
+
+def shutdown_logging():
+    """写完队列中的日志并停止后台线程（进程退出时自动调用）"""
+    with _lock:
+        _stop()
+        logging.getLogger(ROOT_LOGGER).handlers = []
+
+
+def logging_stats():
+    """日志队列的积压、丢弃和采样丢弃数量"""
+    handler, sampler = _state["handler"], _state["sampler"]
+    return {
+        "queued": handler.queue.qsize() if handler else 0,
+        "dropped": handler.dropped if handler else 0,
+        "sampled_out": sampler.sampled_out if sampler else 0
+    }
+
+
+def _logging_metrics():
+    stats = logging_stats()
+    return [
+        ("log_queue_size", "gauge", "Log records waiting to be written", (), [((), stats["queued"])]),
+        ("log_records_dropped_total", "counter", "Log records dropped because the queue was full", (),
+         [((), stats["dropped"])]),
+        ("log_records_sampled_out_total", "counter", "Log records discarded by sampling", (),
+         [((), stats["sampled_out"])])
+    ]
+
+
+registry.add_collector(_logging_metrics)
@@ -0,0 +1,177 @@
+import asyncio
+import atexit
+import json
+import threading
+import time
+import weakref
+import aiohttp
+from modules.http_transport import (
+    MUTATING, PRE_SEND, TRANSIENT, RetryPolicy, _vendor_config, get_breaker, log_retry, record_outcome,
+    waits_for_circuit
+)
+
+# 熔断等待期间轮询熔断器的最长间隔（秒）
+_CIRCUIT_POLL_SECONDS = 0.5
+
+
+class AsyncRuntime:
+    """
+    共用的后台事件循环线程
+    同步代码（Flask路由、批量任务线程）通过run()/submit()把协程交给这个循环执行，
+    所有异步传输和异步批量都在同一个循环上运行，不必为每次调用新建事件循环
+    """
+
+    def __init__(self, name="vendor-async"):
+        self.name = name
+        self.loop = None
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self.lock:
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                self.thread = threading.Thread(target=self.loop.run_forever, name=self.name, daemon=True)
+                self.thread.start()
+                atexit.register(self.stop)
+            return self.loop
+
+    def stop(self):
+        """关闭循环上的异步传输并停止循环（进程退出时自动调用）"""
+        with self.lock:
+            loop, self.loop = self.loop, None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(close_async_transports(), loop).result(5)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+
+    def submit(self, coro):
+        """提交协程，返回concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_started())
+
+    def run(self, coro, timeout=None):
+        """在后台循环上执行协程并阻塞等待结果"""
+        return self.submit(coro).result(timeout)
+
+
+runtime = AsyncRuntime()
+
+
+class AsyncResponse:
+    """已读取完整响应体的异步响应，提供供应商客户端用到的requests.Response接口"""
+
+    def __init__(self, status_code, text, headers, attempts=1):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers
+        self.attempts = attempts
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class AsyncVendorTransport:
+    """
+    供应商异步HTTP传输（aiohttp）
+    与VendorTransport共用熔断器和重试策略，连接失败、超时和状态码的处理方式相同；
+    单个事件循环即可维持数千个在途请求，不受线程数限制
+    """
+
+    def __init__(self, vendor, pool_size, connect_timeout, read_timeout):
+        self.vendor = vendor
+        self.pool_size = pool_size
+        # aiohttp的ClientSession必须在事件循环内创建
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=pool_size, limit_per_host=pool_size),
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=connect_timeout, sock_read=read_timeout)
+        )
+        self.breaker = get_breaker(vendor)
+        self.retry = RetryPolicy(vendor)
+
+    async def post(self, url, idempotency=MUTATING, data=None, headers=None, verify=True):
+        """
+        发送POST请求，重试规则与VendorTransport.post相同
+        :param verify: 是否校验TLS证书
+        :return: AsyncResponse，attempts属性为实际发送次数
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            can_retry = attempt <= self.retry.max_retries
+            try:
+                response = await self._send(url, data, headers, verify)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if not (can_retry and self.retry.retryable_error(_failure_kind(e), idempotency)):
+                    raise
+                reason = type(e).__name__
+                delay = self.retry.backoff(attempt)
+            else:
+                if not (can_retry and self.retry.retryable_status(response.status_code, idempotency)):
+                    response.attempts = attempt
+                    return response
+                reason = f"HTTP {response.status_code}"
+                delay = self.retry.retry_after(response.headers) or self.retry.backoff(attempt)
+            log_retry(self.vendor, attempt, self.retry.max_retries, delay, reason, url)
+            await asyncio.sleep(delay)
+
+    async def _admit(self):
+        """发送前经过熔断器：批量处理中以asyncio.sleep等待恢复，不阻塞事件循环"""
+        if waits_for_circuit():
+            while not self.breaker.allow():
+                retry_in = self.breaker.snapshot()['retry_in_seconds'] or 0
+                await asyncio.sleep(min(max(retry_in, 0.05), _CIRCUIT_POLL_SECONDS))
+        else:
+            self.breaker.check()
+
+    async def _send(self, url, data, headers, verify):
+        """经熔断器发送一次请求并读取完整响应体"""
+        await self._admit()
+        started_at = time.monotonic()
+        try:
+            async with self.session.post(url, data=data, headers=headers, ssl=None if verify else False) as resp:
+                text = await resp.text()
+                response = AsyncResponse(resp.status, text, resp.headers)
+        except BaseException:
+            # 任务被取消时也要记录，释放半开状态的探测名额
+            record_outcome(self.breaker, started_at)
+            raise
+        record_outcome(self.breaker, started_at, response.status_code)
+        return response
+
+    async def close(self):
+        await self.session.close()
+
+
+def _failure_kind(error):
+    """aiohttp异常的失败类型，与http_transport._failure_kind的划分一致"""
+    if isinstance(error, (aiohttp.ClientConnectorError, aiohttp.ConnectionTimeoutError)):
+        return PRE_SEND
+    if isinstance(error, (aiohttp.ClientConnectionError, asyncio.TimeoutError)):
+        return TRANSIENT
+    return None
+
+
+# {事件循环: {供应商: AsyncVendorTransport}}，aiohttp会话只能在创建它的循环上使用
+_async_transports = weakref.WeakKeyDictionary()
+
+
+def get_async_transport(vendor):
+    """获取当前事件循环上的供应商异步传输（首次使用时按配置创建），须在协程中调用"""
+    loop = asyncio.get_running_loop()
+    transports = _async_transports.setdefault(loop, {})
+    transport = transports.get(vendor)
+    if transport is None:
+        config = _vendor_config(vendor, {})
+        transport = AsyncVendorTransport(vendor, config["async_pool_size"],
+                                         config["connect_timeout"], config["read_timeout"])
+        transports[vendor] = transport
+    return transport
+
+
+async def close_async_transports():
+    """关闭当前事件循环上的所有异步传输（使用自建事件循环时在循环结束前调用）"""
+    transports = _async_transports.pop(asyncio.get_running_loop(), {})
+    for transport in transports.values():
+        await transport.close()
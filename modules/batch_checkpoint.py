@@ -0,0 +1,222 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from modules.batch_executor import PrecomputedResult
+
+# 断点记录数据库，放在批量结果目录（uploads/Log）下
+CHECKPOINT_DB_NAME = "batch_checkpoints.db"
+
+# 进程在请求发送期间中断时，该行的记录内容
+INTERRUPTED_RESPONSE = "ERROR: 请求发送期间处理中断，供应商是否已处理未知，续传时未重新发送"
+
+
+def run_id_for(output_path):
+    """批次ID即结果文件名（不含扩展名）"""
+    return os.path.splitext(os.path.basename(output_path))[0]
+
+
+class BatchCheckpoint:
+    """
+    批量任务断点记录（SQLite）
+    - batch_runs: 每个批次的输入文件、结果文件和处理参数，用于续传
+    - batch_rows: 每个展开行的状态，sending=已开始发送，done=已完成；两种状态都保存该行的结果记录
+    """
+
+    def __init__(self, log_dir):
+        self.db_path = os.path.join(log_dir, CHECKPOINT_DB_NAME)
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.lock = threading.Lock()
+        with self.lock:
+            # WAL + NORMAL：应用进程崩溃不会丢失已提交的记录，且每行提交无需fsync
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS batch_runs (
+                    run_id TEXT PRIMARY KEY,
+                    vendor TEXT NOT NULL,
+                    input_path TEXT NOT NULL,
+                    output_path TEXT NOT NULL,
+                    params TEXT,
+                    status TEXT NOT NULL,
+                    created_at TEXT,
+                    updated_at TEXT
+                )
+            """)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS batch_rows (
+                    run_id TEXT NOT NULL,
+                    row_index INTEGER NOT NULL,
+                    state TEXT NOT NULL,
+                    record TEXT,
+                    PRIMARY KEY (run_id, row_index)
+                )
+            """)
+            self.conn.commit()
+
+    @staticmethod
+    def _now():
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def start_run(self, run_id, vendor, input_path, output_path, params):
+        """登记新批次，或将续传的批次重新标记为运行中"""
+        with self.lock:
+            self.conn.execute("""
+                INSERT INTO batch_runs (run_id, vendor, input_path, output_path, params, status, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, 'running', ?, ?)
+                ON CONFLICT(run_id) DO UPDATE SET status = 'running', updated_at = excluded.updated_at
+            """, (run_id, vendor, input_path, output_path, json.dumps(params, ensure_ascii=False),
+                  self._now(), self._now()))
+            self.conn.commit()
+
+    def finish_run(self, run_id, status='completed'):
+        with self.lock:
+            self.conn.execute("UPDATE batch_runs SET status = ?, updated_at = ? WHERE run_id = ?",
+                              (status, self._now(), run_id))
+            self.conn.commit()
+
+    def _run_to_dict(self, row):
+        run = dict(row)
+        run['params'] = json.loads(run['params']) if run['params'] else {}
+        return run
+
+    def get_run(self, run_id):
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM batch_runs WHERE run_id = ?", (run_id,)).fetchone()
+        return self._run_to_dict(row) if row else None
+
+    def list_runs(self, vendor=None):
+        """按创建时间倒序列出批次，附带已完成行数"""
+        sql = """
+            SELECT r.*, (SELECT COUNT(*) FROM batch_rows b WHERE b.run_id = r.run_id AND b.state = 'done') AS done_count
+            FROM batch_runs r
+        """
+        args = ()
+        if vendor:
+            sql += " WHERE r.vendor = ?"
+            args = (vendor,)
+        sql += " ORDER BY r.created_at DESC"
+        with self.lock:
+            rows = self.conn.execute(sql, args).fetchall()
+        return [self._run_to_dict(row) for row in rows]
+
+    def get_row_record(self, run_id, row_index):
+        """返回该行已保存的结果记录；未处理过的行返回None"""
+        with self.lock:
+            row = self.conn.execute("SELECT record FROM batch_rows WHERE run_id = ? AND row_index = ?",
+                                    (run_id, row_index)).fetchone()
+        return json.loads(row['record']) if row else None
+
+    def mark_sending(self, run_id, row_index, pending_record):
+        """发送前记录该行，pending_record为中断时应写入结果文件的记录"""
+        self._save_row(run_id, row_index, 'sending', pending_record)
+
+    def mark_done(self, run_id, row_index, record):
+        self._save_row(run_id, row_index, 'done', record)
+
+    def _save_row(self, run_id, row_index, state, record):
+        with self.lock:
+            self.conn.execute("""
+                INSERT OR REPLACE INTO batch_rows (run_id, row_index, state, record)
+                VALUES (?, ?, ?, ?)
+            """, (run_id, row_index, state, json.dumps(record, ensure_ascii=False, default=str)))
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class RunCheckpoint:
+    """绑定到单个批次的断点记录，包装批量处理的请求流和发送函数"""
+
+    def __init__(self, store, run_id, resuming=False):
+        self.store = store
+        self.run_id = run_id
+        self.resuming = resuming
+        # 异步批量的断点写入线程（SQLite提交不在事件循环上执行），首次使用时创建
+        self._writer = None
+
+    def skip_recorded(self, items):
+        """
+        按行号遍历请求，已有记录的行（已完成或中断时正在发送）直接产出保存的结果，不再发送
+        :param items: 按行顺序产出的请求，PrecomputedResult条目（如重试时成功的行）原样产出
+        :return: 依次产出 PrecomputedResult 或 (row_index, item)
+        """
+        for row_index, item in enumerate(items):
+            record = self.store.get_row_record(self.run_id, row_index) if self.resuming else None
+            if record is not None:
+                yield PrecomputedResult(record)
+            elif isinstance(item, PrecomputedResult):
+                yield item
+            else:
+                yield row_index, item
+
+    def wrap(self, send_func, pending_record_func):
+        """
+        包装发送函数：发送前记录sending状态，完成后记录结果
+        :param send_func: send_func(item) -> 结果记录
+        :param pending_record_func: pending_record_func(item) -> 中断时的结果记录
+        """
+        def send(indexed_item):
+            row_index, item = indexed_item
+            self.store.mark_sending(self.run_id, row_index, pending_record_func(item))
+            record = send_func(item)
+            self.store.mark_done(self.run_id, row_index, record)
+            return record
+        return send
+
+    def wrap_async(self, send_func, pending_record_func):
+        """wrap的异步版本，send_func为协程函数；断点写入在单独的线程中按顺序执行"""
+        if self._writer is None:
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint-writer")
+
+        async def send(indexed_item):
+            loop = asyncio.get_running_loop()
+            row_index, item = indexed_item
+            await loop.run_in_executor(self._writer, self.store.mark_sending, self.run_id, row_index,
+                                       pending_record_func(item))
+            record = await send_func(item)
+            await loop.run_in_executor(self._writer, self.store.mark_done, self.run_id, row_index, record)
+            return record
+        return send
+
+    def recorded(self, row_index):
+        """该行已保存的结果记录"""
+        return self.store.get_row_record(self.run_id, row_index)
+
+    def record(self, row_index, record):
+        """记录未经发送得到的结果（如批内重复的请求）"""
+        self.store.mark_done(self.run_id, row_index, record)
+
+    def finish(self, status='completed'):
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
+        self.store.finish_run(self.run_id, status)
+        self.store.close()
+
+
+def open_run(log_dir, vendor, input_path, output_path, params, resume_run_id=None):
+    """
+    开始新批次或续传已有批次
+    :param output_path: 新批次的结果文件路径（续传时沿用原批次的结果文件）
+    :param params: 批量处理参数，续传时原样传回batch_process
+    :return: (RunCheckpoint, output_path)
+    """
+    store = BatchCheckpoint(log_dir)
+    if resume_run_id:
+        run = store.get_run(resume_run_id)
+        if run is None:
+            store.close()
+            raise ValueError(f"批次不存在: {resume_run_id}")
+        if run['status'] == 'completed':
+            store.close()
+            raise ValueError(f"批次已完成，无需续传: {resume_run_id}")
+        output_path = run['output_path']
+    run_id = run_id_for(output_path)
+    store.start_run(run_id, vendor, input_path, output_path, params)
+    return RunCheckpoint(store, run_id, resuming=bool(resume_run_id)), output_path
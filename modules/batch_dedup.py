@@ -0,0 +1,61 @@
+import hashlib
+import json
+from collections import deque
+
+# 批内去重：查询类端点的相同请求只发送一次，重复的行复制首次请求的结果
+
+
+class BatchDeduplicator:
+    """
+    包装批量的请求流和结果流
+    - unique(): 过滤请求流，(端点, authKey, 参数) 与之前某行相同的查询请求不发送
+    - fan_out(): 按行顺序产出结果，在被过滤的行的位置插入由首次请求的结果生成的记录
+    首次请求总在重复行之前，产出重复行时其结果已经返回；只保存键摘要到行号的映射，结果从断点中读取
+    """
+
+    def __init__(self, key_func):
+        """:param key_func: key_func(item) -> 可JSON序列化的去重键，不参与去重时返回None"""
+        self.key_func = key_func
+        self.first_rows = {}
+        # 按行顺序排列：None为发送的行，(行号, 请求, 首次请求的行号)为重复的行
+        self.plan = deque()
+        self.saved = 0
+
+    @staticmethod
+    def _digest(key):
+        return hashlib.blake2b(json.dumps(key, ensure_ascii=False).encode('utf-8'), digest_size=16).digest()
+
+    def unique(self, indexed_items):
+        """
+        :param indexed_items: 依次为 (row_index, item) 或 PrecomputedResult（续传时已有结果的行，原样产出）
+        """
+        for indexed_item in indexed_items:
+            if isinstance(indexed_item, tuple):
+                row_index, item = indexed_item
+                key = self.key_func(item)
+                if key is not None:
+                    digest = self._digest(key)
+                    first_row = self.first_rows.get(digest)
+                    if first_row is not None:
+                        self.plan.append((row_index, item, first_row))
+                        self.saved += 1
+                        continue
+                    self.first_rows[digest] = row_index
+            self.plan.append(None)
+            yield indexed_item
+
+    def fan_out(self, results, duplicate_record):
+        """
+        :param results: unique()产出的请求按顺序得到的结果
+        :param duplicate_record: duplicate_record(row_index, item, first_row) -> 重复行的结果记录
+        """
+        for result in results:
+            yield from self._duplicates(duplicate_record)
+            self.plan.popleft()
+            yield result
+        # 请求流结束时plan已完整，剩下的都是最后一个发送的行之后的重复行
+        yield from self._duplicates(duplicate_record)
+
+    def _duplicates(self, duplicate_record):
+        while self.plan and self.plan[0] is not None:
+            yield duplicate_record(*self.plan.popleft())
@@ -0,0 +1,283 @@
+import asyncio
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from modules.async_transport import runtime
+from modules.http_transport import observe_requests, wait_for_circuit
+
+
+class TokenBucket:
+    """令牌桶限流器，rate为每秒请求数，capacity为允许的突发请求数"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity else max(1.0, self.rate)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def set_rate(self, rate, capacity=None):
+        """更新速率（同一供应商的新批次可能使用不同设置）"""
+        with self.lock:
+            self.rate = float(rate)
+            self.capacity = float(capacity) if capacity else max(1.0, self.rate)
+            self.tokens = min(self.tokens, self.capacity)
+
+    def try_acquire(self):
+        """尝试取一个令牌，成功返回0，否则返回还需等待的秒数"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        """阻塞直到获得一个令牌"""
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """异步等待一个令牌，不阻塞事件循环"""
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+
+# 每个供应商共用一个令牌桶，同时运行的多个批次共享同一速率上限
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(vendor, rate):
+    """获取供应商的令牌桶限流器"""
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(vendor)
+        if limiter is None:
+            limiter = TokenBucket(rate)
+            _rate_limiters[vendor] = limiter
+        elif limiter.rate != float(rate):
+            limiter.set_rate(rate)
+        return limiter
+
+
+class PrecomputedResult:
+    """已有结果的条目（如续传时已完成的行），按顺序直接产出，不发送请求也不占用限流配额"""
+
+    def __init__(self, result):
+        self.result = result
+
+
+class BatchExecutor:
+    """
+    批量请求执行器
+    - 顺序模式: max_workers<=1且未设置rate_limit时，逐条发送并在每条之后sleep(delay)
+    - 并发模式: 固定大小的线程池 + 供应商级令牌桶限流，取代固定的sleep
+    - 自适应: 指定adaptive（AdaptiveConcurrencyLimiter）时，实际在途请求数由AIMD上限控制，max_workers为最大值
+    无论哪种模式，结果都按输入顺序返回；供应商熔断时暂停发送，等待熔断器探测恢复
+    """
+
+    def __init__(self, vendor, max_workers=1, rate_limit=None, delay=0, adaptive=None):
+        self.vendor = vendor
+        self.adaptive = adaptive
+        self.max_workers = max(1, int(max_workers or 1))
+        if adaptive is not None:
+            self.max_workers = max(self.max_workers, adaptive.max_limit)
+        self.rate_limit = float(rate_limit) if rate_limit else None
+        self.delay = delay or 0
+
+    @property
+    def concurrent(self):
+        return self.max_workers > 1 or self.rate_limit is not None
+
+    def describe(self):
+        """返回执行模式的简短描述，用于日志"""
+        if not self.concurrent:
+            return f"{self.delay}s delay"
+        rate = f"{self.rate_limit} req/s" if self.rate_limit else "unlimited rate"
+        return f"{_describe_workers(self.max_workers, self.adaptive)} workers, {rate}"
+
+    def _call(self, func, item):
+        with wait_for_circuit(), observe_requests(self.adaptive):
+            if self.adaptive is None:
+                return func(item)
+            self.adaptive.acquire()
+            try:
+                return func(item)
+            finally:
+                self.adaptive.release()
+
+    def map(self, func, items):
+        """对items逐个调用func，按输入顺序产出结果；PrecomputedResult条目直接产出其结果"""
+        if not self.concurrent:
+            for item in items:
+                if isinstance(item, PrecomputedResult):
+                    yield item.result
+                    continue
+                yield self._call(func, item)
+                time.sleep(self.delay)
+            return
+
+        limiter = get_rate_limiter(self.vendor, self.rate_limit) if self.rate_limit else None
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for item in items:
+                # 在途请求达到上限时，先取回最早提交的结果以保持顺序
+                if len(pending) >= self.max_workers:
+                    yield pending.popleft().result()
+                if isinstance(item, PrecomputedResult):
+                    done = Future()
+                    done.set_result(item.result)
+                    pending.append(done)
+                    continue
+                if limiter:
+                    limiter.acquire()
+                pending.append(pool.submit(self._call, func, item))
+            while pending:
+                yield pending.popleft().result()
+
+
+def _describe_workers(max_workers, adaptive):
+    if adaptive is None:
+        return str(max_workers)
+    return f"adaptive {adaptive.limit}-{max_workers}"
+
+
+# 自适应上限已满时轮询空闲名额的间隔（秒）
+_ADAPTIVE_POLL_SECONDS = 0.005
+
+
+class _Failure:
+    def __init__(self, error):
+        self.error = error
+
+
+_DONE = object()
+
+# 异步批量每次在工作线程中从请求流取出的条目数（请求流含读取文件、断点查询等阻塞操作，不在事件循环上执行）
+_PULL_CHUNK = 64
+
+
+def _pull(items, count):
+    return list(itertools.islice(items, count))
+
+
+def _put_blocking(results, value, closed):
+    """结果队列已满时在工作线程中等待，调用方停止遍历（closed）后放弃"""
+    while not closed.is_set():
+        try:
+            results.put(value, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+
+
+class AsyncBatchExecutor:
+    """
+    异步批量请求执行器
+    在共用的后台事件循环上以asyncio任务并发发送，单个线程即可维持max_in_flight个在途请求；
+    接口与BatchExecutor.map相同（func为协程函数），结果按输入顺序产出，熔断时暂停发送；
+    指定adaptive时在途请求数由AIMD上限控制，max_in_flight为最大值
+    """
+
+    def __init__(self, vendor, max_in_flight=100, rate_limit=None, adaptive=None):
+        self.vendor = vendor
+        self.adaptive = adaptive
+        self.max_in_flight = max(1, int(max_in_flight or 1))
+        if adaptive is not None:
+            self.max_in_flight = max(self.max_in_flight, adaptive.max_limit)
+        self.rate_limit = float(rate_limit) if rate_limit else None
+
+    def describe(self):
+        """返回执行模式的简短描述，用于日志"""
+        rate = f"{self.rate_limit} req/s" if self.rate_limit else "unlimited rate"
+        return f"asyncio, {_describe_workers(self.max_in_flight, self.adaptive)} in flight, {rate}"
+
+    async def _run_adaptive(self, func, item):
+        try:
+            return await func(item)
+        finally:
+            self.adaptive.release()
+
+    async def _submit(self, func, item):
+        """创建请求任务；自适应模式下先等待空闲名额"""
+        if self.adaptive is None:
+            return asyncio.ensure_future(func(item))
+        while not self.adaptive.try_acquire():
+            await asyncio.sleep(_ADAPTIVE_POLL_SECONDS)
+        return asyncio.ensure_future(self._run_adaptive(func, item))
+
+    @staticmethod
+    async def _put(results, value, closed):
+        """放入结果队列；队列已满时在工作线程中等待，不阻塞事件循环"""
+        try:
+            results.put_nowait(value)
+        except queue.Full:
+            await asyncio.get_running_loop().run_in_executor(None, _put_blocking, results, value, closed)
+
+    async def _drive(self, func, items, results, closed):
+        """
+        在事件循环上提交请求，按输入顺序把结果放入results队列
+        请求流在工作线程中分块读取；结果队列有上限，调用方处理较慢时暂停提交
+        """
+        loop = asyncio.get_running_loop()
+        limiter = get_rate_limiter(self.vendor, self.rate_limit) if self.rate_limit else None
+        items = iter(items)
+        pending = deque()
+        try:
+            # 在此范围内创建的任务继承上下文，熔断时等待恢复，发送结果报告给自适应上限
+            with wait_for_circuit(), observe_requests(self.adaptive):
+                while True:
+                    chunk = await loop.run_in_executor(None, _pull, items, _PULL_CHUNK)
+                    if not chunk:
+                        break
+                    for item in chunk:
+                        # 在途请求达到上限时，先取回最早提交的结果以保持顺序
+                        if len(pending) >= self.max_in_flight:
+                            await self._put(results, await pending.popleft(), closed)
+                        if isinstance(item, PrecomputedResult):
+                            done = loop.create_future()
+                            done.set_result(item.result)
+                            pending.append(done)
+                            continue
+                        if limiter:
+                            await limiter.acquire_async()
+                        pending.append(await self._submit(func, item))
+            while pending:
+                await self._put(results, await pending.popleft(), closed)
+        except BaseException as e:
+            for task in pending:
+                task.cancel()
+            await self._put(results, _Failure(e), closed)
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            await self._put(results, _DONE, closed)
+
+    def map(self, func, items):
+        """对items逐个调用协程函数func，按输入顺序产出结果；PrecomputedResult条目直接产出其结果"""
+        results = queue.Queue(maxsize=self.max_in_flight)
+        closed = threading.Event()
+        future = runtime.submit(self._drive(func, items, results, closed))
+        try:
+            while True:
+                result = results.get()
+                if result is _DONE:
+                    break
+                if isinstance(result, _Failure):
+                    raise result.error
+                yield result
+        finally:
+            # 调用方提前停止遍历时取消剩余请求
+            closed.set()
+            future.cancel()
@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from modules.http_transport import get_breaker
+from modules.app_logging import get_logger
+from modules.metrics import batch_jobs_finished, batch_rows, registry
+from modules.request_validation import BatchValidationError
+
+logger = get_logger("batch")
+
+
+class BatchJob:
+    """后台批量任务，进度直接读取供应商API对象上的计数"""
+
+    def __init__(self, vendor, api):
+        self.id = uuid.uuid4().hex
+        self.vendor = vendor
+        self.api = api
+        self.status = 'queued'
+        self.result_path = None
+        self.error = None
+        # 发送前校验失败的行 [{"row", "endpoint", "errors"}]
+        self.validation_errors = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def _eta_seconds(self, processed, total):
+        """按已用时间和已处理条数估算剩余时间"""
+        if self.status != 'running' or not processed or not total:
+            return None
+        elapsed = time.time() - self.started_at
+        return round(elapsed / processed * max(total - processed, 0), 1)
+
+    def _concurrency(self):
+        limiter = getattr(self.api, 'concurrency_limiter', None)
+        return limiter.snapshot() if limiter is not None else None
+
+    def to_dict(self):
+        processed = getattr(self.api, 'processed_count', 0)
+        total = getattr(self.api, 'total_count', 0)
+        end_time = self.finished_at or time.time()
+        # 运行中也返回结果文件名，可通过下载接口获取部分结果
+        result_path = self.result_path or getattr(self.api, 'output_path', None)
+        return {
+            'job_id': self.id,
+            'vendor': self.vendor,
+            'status': self.status,
+            'total': total,
+            'processed_count': processed,
+            'success_count': getattr(self.api, 'success_count', 0),
+            'failed_count': getattr(self.api, 'failed_count', 0),
+            'eta_seconds': self._eta_seconds(processed, total),
+            'elapsed_seconds': round(end_time - self.started_at, 1) if self.started_at else 0,
+            'filename': os.path.basename(result_path) if result_path else None,
+            'error': self.error,
+            'validation_errors': self.validation_errors,
+            # 供应商熔断器状态（熔断期间批量暂停发送）
+            'circuit': get_breaker(self.vendor).snapshot(),
+            # 自适应并发的当前上限（未启用时为None）
+            'concurrency': self._concurrency(),
+            'message': f'处理完成，共处理了{processed}条请求' if self.status == 'completed' else None,
+            'created_at': datetime.fromtimestamp(self.created_at).strftime("%Y-%m-%d %H:%M:%S")
+        }
+
+
+class BatchJobManager:
+    """
+    批量任务队列
+    上传请求只负责提交任务并立即返回job_id，实际处理在后台线程池中进行
+    """
+
+    def __init__(self, max_workers=4, max_history=200):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='batch-job')
+        self.max_history = max_history
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+
+    def submit(self, vendor, api, func, *args, **kwargs):
+        """提交任务，func为api上的batch_process（返回结果文件路径）"""
+        job = BatchJob(vendor, api)
+        with self.lock:
+            self.jobs[job.id] = job
+            self._trim_history()
+        self.executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def list(self, vendor=None):
+        """按提交时间倒序列出任务"""
+        with self.lock:
+            jobs = list(self.jobs.values())
+        if vendor:
+            jobs = [job for job in jobs if job.vendor == vendor]
+        return list(reversed(jobs))
+
+    def _run(self, job, func, args, kwargs):
+        job.status = 'running'
+        job.started_at = time.time()
+        try:
+            result_path = func(*args, **kwargs)
+            if not result_path or not os.path.exists(result_path):
+                raise RuntimeError('结果文件生成失败')
+            job.result_path = result_path
+            job.status = 'completed'
+        except BatchValidationError as e:
+            logger.warning("Batch job %s (%s) rejected: %s invalid rows", job.id, job.vendor, e.invalid_rows,
+                           extra={"fields": {"job_id": job.id, "vendor": job.vendor, "invalid_rows": e.invalid_rows}})
+            job.error = str(e)
+            job.validation_errors = e.errors
+            job.status = 'failed'
+        except Exception as e:
+            logger.exception("Batch job %s (%s) failed: %s", job.id, job.vendor, e,
+                             extra={"fields": {"job_id": job.id, "vendor": job.vendor}})
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            job.finished_at = time.time()
+            batch_jobs_finished.inc(job.vendor, job.status)
+            batch_rows.inc(job.vendor, 'success', amount=getattr(job.api, 'success_count', 0))
+            batch_rows.inc(job.vendor, 'failed', amount=getattr(job.api, 'failed_count', 0))
+
+    def collect_metrics(self):
+        """/metrics 抓取时按供应商汇总运行中的任务数和吞吐（条/秒）"""
+        running = {}
+        throughput = {}
+        now = time.time()
+        for job in self.list():
+            if job.status != 'running' or not job.started_at:
+                continue
+            running[job.vendor] = running.get(job.vendor, 0) + 1
+            elapsed = max(now - job.started_at, 1e-6)
+            processed = getattr(job.api, 'processed_count', 0)
+            throughput[job.vendor] = throughput.get(job.vendor, 0) + processed / elapsed
+        return [
+            ("batch_jobs_running", "gauge", "Batch jobs currently running", ("vendor",),
+             [((vendor,), count) for vendor, count in sorted(running.items())]),
+            ("batch_rows_per_second", "gauge", "Throughput of running batch jobs (rows/s)", ("vendor",),
+             [((vendor,), round(rate, 3)) for vendor, rate in sorted(throughput.items())])
+        ]
+
+    def _trim_history(self):
+        """只保留最近的任务记录，运行中的任务不会被清除"""
+        while len(self.jobs) > self.max_history:
+            for job_id, job in self.jobs.items():
+                if job.status in ('completed', 'failed'):
+                    del self.jobs[job_id]
+                    break
+            else:
+                break
+
+
+# 全局任务队列，供所有供应商的批量路由共用
+batch_jobs = BatchJobManager()
+registry.add_collector(batch_jobs.collect_metrics)
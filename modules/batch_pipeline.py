@@ -0,0 +1,290 @@
+import json
+import os
+import uuid
+from datetime import datetime
+from tqdm import tqdm
+from modules.adaptive_concurrency import get_adaptive_limiter
+from modules.app_logging import vendor_logger
+from modules.batch_checkpoint import open_run
+from modules.batch_dedup import BatchDeduplicator
+from modules.batch_executor import AsyncBatchExecutor, BatchExecutor
+from modules.batch_readers import BatchFileReader
+from modules.batch_results import TIMING_COLUMNS, StreamingResultWriter, timed, timed_async
+from modules.batch_retry import FailedRows
+from modules.batch_rows import ChunkedRows, STRING_FIELDS, iter_payloads
+from modules.http_transport import QUERY, ensure_pool_size, idempotency_of
+from modules.metrics import batch_stage_seconds
+from modules.response_cache import cache_key
+
+
+class BatchStages:
+    """
+    供应商批量处理的各阶段规则，供应商API类继承并按需覆盖
+    - 校验: validator 为由端点配置编译的EndpointValidator，发送前校验整个文件
+    - 读取: read() 打开上传文件（xlsx、xls、csv、csv.gz、parquet），遍历时分块产出DataFrame
+    - 展开: expand() 逐块规整数据并惰性展开号码范围（string_fields、range_fields）
+    - 构建: build_requests() 由展开后的行产出 (endpoint, payload)
+    - 传输: _send_batch_request() / _send_batch_request_async() 发送一条请求并返回结果记录
+    - 去重: dedup_key() 为查询类端点的请求生成去重键，批内相同的请求只发送一次
+    - 输出: result_columns 为结果表的列，request_record() 为结果记录中的请求列，batch_summary() 为Summary表的附加信息
+    并发、限流、断点续传、流式输出和指标由BatchPipeline负责
+    """
+
+    vendor = None
+    # 结果表的列（计时列由引擎追加）
+    result_columns = ("Endpoint", "JSON", "Response", "Status")
+    # 需要以字符串发送的号码类字段
+    string_fields = STRING_FIELDS
+    # 需要展开的范围字段 {字段名: 最大长度或None}
+    range_fields = {}
+    # 不发送给供应商的列
+    skip_columns = ("endpoint",)
+    # 结果文件名前缀
+    output_prefix = ""
+    # 参数校验器（None时不校验）
+    validator = None
+    # 端点配置，用于判断端点是否为查询类（批内去重）
+    endpoint_config = {}
+    # 不在payload中的凭据（与响应缓存的auth相同）
+    request_auth = None
+    # 结果记录中保存请求参数的列（重复行沿用自己的请求参数，重试失败行时由此重建请求）
+    payload_column = "JSON"
+
+    def __init__(self):
+        self.processed_count = 0
+        self.total_count = 0
+        self.success_count = 0
+        self.failed_count = 0
+        self.output_path = None
+        self.concurrency_limiter = None
+        self.bypass_cache = False
+
+    @property
+    def base_url(self):
+        """供应商base URL（自适应并发按供应商 + base URL 调节）"""
+        raise NotImplementedError
+
+    def read(self, input_path):
+        return BatchFileReader(input_path, self.string_fields)
+
+    def validate(self, input_path):
+        """
+        发送前逐块校验整个文件的必填参数和类型
+        :raises BatchValidationError: 有错误行时抛出，此时未发送任何请求
+        """
+        if self.validator is None:
+            return
+        source = self.read(input_path)
+        if 'endpoint' not in source.columns:
+            raise ValueError("上传文件必须包含'endpoint'列")
+        self.validator.validate_source(source)
+
+    def expand(self, source):
+        if 'endpoint' not in source.columns:
+            raise ValueError("上传文件必须包含'endpoint'列")
+        return ChunkedRows(source, self.range_fields, self.string_fields)
+
+    def build_requests(self, rows):
+        """逐行构建 (endpoint, payload)"""
+        return iter_payloads(rows, skip_columns=self.skip_columns)
+
+    def dedup_key(self, item):
+        """查询类请求的去重键 (供应商, 端点, authKey, 规整后的参数)，修改类请求返回None"""
+        endpoint, payload = item
+        if idempotency_of(self.endpoint_config, endpoint.strip("/")) != QUERY:
+            return None
+        return cache_key(self.vendor, endpoint, payload, self.request_auth)
+
+    def _send_batch_request(self, item):
+        raise NotImplementedError
+
+    async def _send_batch_request_async(self, item):
+        raise NotImplementedError
+
+    def request_record(self, item):
+        """结果记录中的请求列（Endpoint和payload_column），用于中断行和批内重复行"""
+        endpoint, payload = item
+        return {"Endpoint": endpoint, self.payload_column: json.dumps(payload, ensure_ascii=False)}
+
+    def _interrupted_batch_record(self, item):
+        """请求发送期间中断时该行的结果记录"""
+        raise NotImplementedError
+
+    def log_batch_start(self, rows):
+        """开始发送前输出供应商相关的信息（如使用的authKey）"""
+
+    def batch_summary(self, rows):
+        """Summary表中供应商相关的附加信息 {列名: [值]}"""
+        return {}
+
+    def batch_process(self, input_path, delay=0.5, max_workers=1, rate_limit=None, resume_run_id=None,
+                      async_io=False, adaptive=False, bypass_cache=False, retry_failed=False):
+        """
+        批量处理Excel文件中的请求
+        :param delay: 顺序模式下每条请求之后的间隔秒数
+        :param max_workers: 最大并发请求数（大于1时启用并发模式）
+        :param rate_limit: 每秒最大请求数（设置后启用并发模式，取代delay）
+        :param async_io: 并发请求在共用事件循环上以asyncio任务发送（max_workers为在途请求数）
+        :param adaptive: 按供应商延迟和错误自动调节并发数（AIMD），max_workers为上限（为1时使用配置的上限）
+        :param bypass_cache: 不读取响应缓存（仍以新结果更新缓存）
+        :param resume_run_id: 续传的批次ID，已有记录的行不再发送
+        :param retry_failed: input_path为之前的结果文件，只重新发送其中失败的行，生成合并后的结果文件
+        """
+        params = {'delay': delay, 'max_workers': max_workers, 'rate_limit': rate_limit,
+                  'async_io': async_io, 'adaptive': adaptive, 'bypass_cache': bypass_cache,
+                  'retry_failed': retry_failed}
+        return BatchPipeline(self).run(input_path, params, resume_run_id)
+
+
+class BatchPipeline:
+    """
+    批量处理引擎：校验 → 读取 → 展开 → 构建 → 去重 → 发送 → 写出
+    结果按输入行顺序逐条写入JSONL并在结束时生成xlsx；进度计数写在stages对象上，由批量任务管理器读取
+    重试模式（retry_failed）下由之前的结果文件代替校验到构建的各阶段，成功的行原样沿用
+    """
+
+    def __init__(self, stages):
+        self.stages = stages
+        self.vendor = stages.vendor
+        self.logger = vendor_logger(stages.vendor, "batch")
+
+    def run(self, input_path, params, resume_run_id=None):
+        """
+        :param params: 批量处理参数（delay、max_workers、rate_limit、async_io、adaptive、bypass_cache
+                       及供应商自己的参数），原样保存到断点，续传时传回batch_process
+        :return: 结果xlsx路径
+        """
+        stages = self.stages
+        stages.processed_count = 0
+        stages.success_count = 0
+        stages.failed_count = 0
+        stages.concurrency_limiter = None
+        stages.bypass_cache = params.get('bypass_cache', False)
+
+        retry = params.get('retry_failed', False)
+        if retry:
+            # 重试时结果写在原结果文件所在的目录
+            with batch_stage_seconds.time(self.vendor, "read"):
+                rows = FailedRows(input_path, stages.payload_column)
+            items = rows.requests()
+            log_dir = os.path.dirname(input_path)
+        else:
+            rows = self._open_rows(input_path)
+            items = stages.build_requests(rows)
+            log_dir = os.path.join(os.path.dirname(input_path), "Log")
+        stages.total_count = rows.estimated_length()
+
+        # 结果目录和输出文件名（带随机后缀，避免同一秒内启动的任务互相覆盖）
+        os.makedirs(log_dir, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        output_path = os.path.join(log_dir, f"{stages.output_prefix}{timestamp}_{uuid.uuid4().hex[:6]}.xlsx")
+
+        # 登记断点（续传时沿用原批次的结果文件）
+        checkpoint, output_path = open_run(log_dir, self.vendor, input_path, output_path, params, resume_run_id)
+
+        # 结果逐行写入JSONL，结束时再生成xlsx
+        stages.output_path = output_path
+        writer = StreamingResultWriter(output_path, list(stages.result_columns) + TIMING_COLUMNS)
+
+        executor, send = self._executor(checkpoint, params)
+        # 请求数在读取和展开完成后才确定，此处为估计值（准确的总数见结束日志）
+        self.logger.info("▶ Processing ~%s requests (estimated until the input is fully read) with %s...",
+                         stages.total_count, executor.describe())
+        if retry:
+            self.logger.info("▶ Retrying failed rows of %s", os.path.basename(input_path))
+        else:
+            stages.log_batch_start(rows)
+
+        # 结果按行顺序返回，已记录的行直接沿用，批内重复的查询复制首次请求的结果；
+        # 总行数随读取进度更新，读完后为准确值
+        dedup = BatchDeduplicator(stages.dedup_key)
+        duplicate_record = self._duplicate_record(checkpoint)
+        try:
+            with batch_stage_seconds.time(self.vendor, "send"):
+                requests = dedup.unique(checkpoint.skip_recorded(items))
+                results = dedup.fan_out(executor.map(send, requests), duplicate_record)
+                progress = tqdm(results, total=stages.total_count)
+                for result in progress:
+                    writer.write(result)
+                    stages.processed_count += 1
+                    stages.total_count = rows.estimated_length()
+                    if progress.total != stages.total_count:
+                        progress.total = stages.total_count
+                    if result["Status"] == "SUCCESS":
+                        stages.success_count += 1
+                    else:
+                        stages.failed_count += 1
+        except Exception:
+            checkpoint.finish('interrupted')
+            raise
+
+        summary_data = {
+            '总请求数': [stages.total_count],
+            '成功数': [stages.success_count],
+            '失败数': [stages.failed_count],
+            '去重节省的调用数': [dedup.saved],
+            '处理时间': [datetime.now().strftime("%Y-%m-%d %H:%M:%S")]
+        }
+        if retry:
+            summary_data.update({'重试的结果文件': [os.path.basename(input_path)],
+                                 '重新发送的失败行数': [rows.failed_rows]})
+        else:
+            summary_data.update(stages.batch_summary(rows))
+        with batch_stage_seconds.time(self.vendor, "write"):
+            writer.close(summary_data)
+        checkpoint.finish()
+
+        self.logger.info("✅ Batch finished: %s requests, %s succeeded, %s failed, %s duplicate calls saved, "
+                         "result file: %s", stages.total_count, stages.success_count, stages.failed_count,
+                         dedup.saved, output_path,
+                         extra={"fields": {"total": stages.total_count, "success": stages.success_count,
+                                           "failed": stages.failed_count, "deduplicated": dedup.saved,
+                                           "result_file": output_path}})
+        return output_path
+
+    def _open_rows(self, input_path):
+        """校验整个文件后打开并展开，有错误行时整批拒绝；数据在发送过程中分块读取和展开（计入send阶段）"""
+        stages = self.stages
+        with batch_stage_seconds.time(self.vendor, "validate"):
+            stages.validate(input_path)
+        with batch_stage_seconds.time(self.vendor, "read"):
+            source = stages.read(input_path)
+        with batch_stage_seconds.time(self.vendor, "expand"):
+            return stages.expand(source)
+
+    def _duplicate_record(self, checkpoint):
+        """返回生成重复行结果记录的函数：复制首次请求的结果，请求列用该行自己的请求，不计发送时间"""
+        stages = self.stages
+
+        def duplicate_record(row_index, item, first_row):
+            record = dict(checkpoint.recorded(first_row))
+            record.update(stages.request_record(item))
+            record.update({"Sent At": None, "Latency (ms)": None, "Attempts": 0})
+            checkpoint.record(row_index, record)
+            return record
+        return duplicate_record
+
+    def _executor(self, checkpoint, params):
+        """按并发参数选择执行器，返回 (executor, 包装了计时和断点的发送函数)"""
+        stages = self.stages
+        max_workers = params.get('max_workers') or 1
+        rate_limit = params.get('rate_limit')
+
+        # 自适应并发上限按供应商 + base URL 调节，进度中显示当前上限
+        if params.get('adaptive'):
+            stages.concurrency_limiter = get_adaptive_limiter(
+                self.vendor, stages.base_url, max_limit=max_workers if max_workers > 1 else None)
+
+        if params.get('async_io'):
+            executor = AsyncBatchExecutor(self.vendor, max_in_flight=max_workers, rate_limit=rate_limit,
+                                          adaptive=stages.concurrency_limiter)
+            send = checkpoint.wrap_async(timed_async(stages._send_batch_request_async),
+                                         stages._interrupted_batch_record)
+            return executor, send
+
+        executor = BatchExecutor(self.vendor, max_workers=max_workers, rate_limit=rate_limit,
+                                 delay=params.get('delay', 0), adaptive=stages.concurrency_limiter)
+        send = checkpoint.wrap(timed(stages._send_batch_request), stages._interrupted_batch_record)
+        # 连接池不小于并发数，避免超出部分的连接用完即弃
+        ensure_pool_size(self.vendor, executor.max_workers)
+        return executor, send
@@ -0,0 +1,189 @@
+import gzip
+import os
+import queue
+import threading
+import pandas as pd
+from openpyxl import load_workbook
+from modules.batch_rows import STRING_FIELDS
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+# 批量上传文件的分块读取：前面的行开始发送时，后面的行仍在后台线程中解析，内存占用与文件大小无关
+
+# 批量上传支持的文件格式（.csv.gz作为一个整体）
+BATCH_FILE_EXTENSIONS = ('.xlsx', '.xls', '.csv', '.csv.gz', '.parquet')
+
+# 每块读取的行数
+READ_CHUNK_ROWS = 5000
+# 后台线程最多预读的块数
+READ_AHEAD_CHUNKS = 2
+
+
+def batch_file_extension(filename):
+    """返回文件的批量格式扩展名，不支持的格式返回None"""
+    name = filename.lower()
+    for extension in BATCH_FILE_EXTENSIONS:
+        if name.endswith(extension):
+            return extension
+    return None
+
+
+def _string_dtypes(columns, string_fields):
+    """号码类列按字符串读取，避免长号码被解析为数值而丢失精度或前导0"""
+    string_columns = {field.lower() for field in string_fields}
+    return {col: str for col in columns if str(col).lower() in string_columns}
+
+
+def _count_lines(path):
+    """按换行符计数（带引号的字段内换行也会计入），只用于进度估算"""
+    opener = gzip.open if path.lower().endswith('.gz') else open
+    lines = 0
+    with opener(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            lines += block.count(b'\n')
+    return lines
+
+
+def _csv_chunks(path, chunk_rows, string_fields):
+    """CSV（.csv.gz按扩展名自动解压）"""
+    columns = list(pd.read_csv(path, nrows=0).columns)
+    yield columns, max(_count_lines(path) - 1, 0)
+    with pd.read_csv(path, chunksize=chunk_rows, dtype=_string_dtypes(columns, string_fields)) as reader:
+        yield from reader
+
+
+def _xlsx_chunks(path, chunk_rows, string_fields):
+    """xlsx：openpyxl只读模式逐行解析，只取第一个工作表，跳过整行为空的行"""
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        # 文件声明的范围（不准确时仅影响进度估算），读取时按实际内容
+        row_hint = sheet.max_row - 1 if sheet.max_row else None
+        sheet.reset_dimensions()
+        rows = sheet.iter_rows(values_only=True)
+
+        header = list(next(rows, ()))
+        while header and header[-1] is None:
+            header.pop()
+        columns = [value if value is not None else f"Unnamed: {i}" for i, value in enumerate(header)]
+        yield columns, row_hint
+
+        width = len(columns)
+        chunk, positions = [], []
+        for position, row in enumerate(rows):
+            row = row[:width]
+            if all(value is None for value in row):
+                continue
+            chunk.append(row + (None,) * (width - len(row)))
+            positions.append(position)
+            if len(chunk) >= chunk_rows:
+                yield pd.DataFrame(chunk, columns=columns, index=positions)
+                chunk, positions = [], []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=columns, index=positions)
+    finally:
+        workbook.close()
+
+
+def _xls_chunks(path, chunk_rows, string_fields):
+    """旧版xls不支持流式读取，整表读取后作为一块"""
+    df = pd.read_excel(path)
+    yield list(df.columns), len(df)
+    yield df
+
+
+def _parquet_chunks(path, chunk_rows, string_fields):
+    """Parquet按record batch分块读取（需要pyarrow）"""
+    if pq is None:
+        raise ValueError("读取Parquet文件需要安装pyarrow")
+    parquet_file = pq.ParquetFile(path)
+    try:
+        yield list(parquet_file.schema_arrow.names), parquet_file.metadata.num_rows
+        offset = 0
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows):
+            df = batch.to_pandas()
+            df.index = pd.RangeIndex(offset, offset + len(df))
+            offset += len(df)
+            yield df
+    finally:
+        parquet_file.close()
+
+
+_CHUNK_READERS = {
+    '.xlsx': _xlsx_chunks,
+    '.xls': _xls_chunks,
+    '.csv': _csv_chunks,
+    '.csv.gz': _csv_chunks,
+    '.parquet': _parquet_chunks
+}
+
+_END = object()
+
+
+class _ReadError:
+    def __init__(self, error):
+        self.error = error
+
+
+class BatchFileReader:
+    """
+    批量上传文件的分块读取器，遍历时按块产出DataFrame（只能遍历一次）
+    创建时即读取表头，文件不存在或格式错误在读取阶段报错；
+    遍历时由后台线程预读后续的块，异步模式下解析不占用共用的事件循环
+    - columns: 表头
+    - 各块DataFrame的索引为数据行在文件中的序号（表头之后的第一行为0），用于报告出错的行号
+    - row_hint: 文件声明或粗略统计的数据行数（未知时为None），仅用于进度估算
+    """
+
+    def __init__(self, path, string_fields=STRING_FIELDS, chunk_rows=READ_CHUNK_ROWS):
+        extension = batch_file_extension(path)
+        if extension is None:
+            raise ValueError(f"不支持的文件格式: {os.path.basename(path)}，"
+                             f"支持 {', '.join(BATCH_FILE_EXTENSIONS)}")
+        self.path = path
+        self._chunks = self._iter_chunks(extension, chunk_rows, string_fields)
+        self.columns, self.row_hint = next(self._chunks)
+
+    def _iter_chunks(self, extension, chunk_rows, string_fields):
+        """先产出 (表头, 行数)，之后逐块产出DataFrame"""
+        return _CHUNK_READERS[extension](self.path, chunk_rows, string_fields)
+
+    def __iter__(self):
+        chunks = queue.Queue(maxsize=READ_AHEAD_CHUNKS)
+        stopped = threading.Event()
+
+        def put(item):
+            # 遍历方提前停止时不再等待队列空位
+            while not stopped.is_set():
+                try:
+                    chunks.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def read():
+            try:
+                for chunk in self._chunks:
+                    if not put(chunk):
+                        return
+                put(_END)
+            except Exception as e:
+                put(_ReadError(e))
+            finally:
+                self._chunks.close()
+
+        threading.Thread(target=read, name="batch-reader", daemon=True).start()
+        try:
+            while True:
+                chunk = chunks.get()
+                if chunk is _END:
+                    return
+                if isinstance(chunk, _ReadError):
+                    raise chunk.error
+                yield chunk
+        finally:
+            stopped.set()
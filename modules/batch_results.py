@@ -0,0 +1,273 @@
+import json
+import os
+import time
+from datetime import datetime
+from functools import wraps
+from openpyxl import Workbook, load_workbook
+from modules.http_transport import count_sends
+from modules.metrics import Histogram, exponential_buckets, histogram_quantile
+
+# 每行结果的计时列：发送时间、耗时（含重试和熔断等待）、实际发送次数
+TIMING_COLUMNS = ["Sent At", "Latency (ms)", "Attempts"]
+
+# Summary中按端点统计延迟的桶：1ms起每桶增加10%，最大约2分钟，分位数误差不超过10%
+SUMMARY_LATENCY_BUCKETS = exponential_buckets(0.001, 1.1, 123)
+SUMMARY_QUANTILES = (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))
+
+
+def _timestamp():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+
+def _add_timing(record, sent_at, started, counter):
+    record.update({
+        "Sent At": sent_at,
+        "Latency (ms)": round((time.perf_counter() - started) * 1000, 1),
+        "Attempts": counter.sends
+    })
+    return record
+
+
+def timed(send_func):
+    """包装批量发送函数，在结果记录中加入TIMING_COLUMNS"""
+    @wraps(send_func)
+    def send(item):
+        sent_at, started = _timestamp(), time.perf_counter()
+        with count_sends() as counter:
+            record = send_func(item)
+        return _add_timing(record, sent_at, started, counter)
+    return send
+
+
+def timed_async(send_func):
+    """timed的异步版本，send_func为协程函数"""
+    @wraps(send_func)
+    async def send(item):
+        sent_at, started = _timestamp(), time.perf_counter()
+        with count_sends() as counter:
+            record = await send_func(item)
+        return _add_timing(record, sent_at, started, counter)
+    return send
+
+
+def sidecar_path_for(output_path):
+    """结果xlsx对应的逐行追加日志（JSONL）路径"""
+    return os.path.splitext(output_path)[0] + ".jsonl"
+
+
+def iter_sidecar_records(sidecar_path):
+    """逐行读取JSONL结果，忽略进程崩溃或写入中途留下的不完整末行"""
+    with open(sidecar_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.endswith('\n'):
+                break
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                break
+
+
+def write_workbook(output_path, columns, records, summary_data=None, endpoint_summary=None):
+    """
+    使用openpyxl write-only模式逐行写出xlsx，内存占用与行数无关
+    :param output_path: 输出路径或可写的文件对象
+    :param columns: Results表的列名
+    :param records: 可迭代的结果字典
+    :param summary_data: Summary表数据 {列名: [值]}，为None时不写Summary
+    :param endpoint_summary: 按端点的统计 [{列名: 值}]，空一行后写在Summary表下方
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Results')
+    ws.append(columns)
+    for record in records:
+        ws.append([record.get(col) for col in columns])
+
+    if summary_data is not None:
+        summary_ws = wb.create_sheet('Summary')
+        summary_ws.append(list(summary_data.keys()))
+        summary_ws.append([values[0] for values in summary_data.values()])
+        if endpoint_summary:
+            summary_ws.append([])
+            summary_ws.append(list(endpoint_summary[0].keys()))
+            for row in endpoint_summary:
+                summary_ws.append(list(row.values()))
+
+    if isinstance(output_path, str):
+        # 先写临时文件再替换，避免下载到写了一半的xlsx
+        tmp_path = output_path + '.tmp'
+        wb.save(tmp_path)
+        os.replace(tmp_path, output_path)
+    else:
+        wb.save(output_path)
+    return output_path
+
+
+class LatencyStats:
+    """
+    批量结果的吞吐和延迟统计
+    延迟按端点累计到分桶直方图，内存占用与行数无关；分位数由桶计数插值估算
+    吞吐只计算本次运行发送的行（续传时沿用的记录发送时间早于本次开始）
+    """
+
+    def __init__(self):
+        self.histogram = Histogram("batch_latency_seconds", "", ("endpoint",), SUMMARY_LATENCY_BUCKETS)
+        # {端点: [请求数, 失败数, 本次发送数, 最大延迟ms]}
+        self.endpoints = {}
+        self.started_at = _timestamp()
+        self.started = time.perf_counter()
+        self.finished = self.started
+        self.sent = 0
+
+    def add(self, record):
+        endpoint = record.get("Endpoint")
+        stats = self.endpoints.setdefault(endpoint, [0, 0, 0, None])
+        stats[0] += 1
+        if record.get("Status") != "SUCCESS":
+            stats[1] += 1
+        latency = record.get("Latency (ms)")
+        if latency is None:
+            return
+        self.histogram.observe(latency / 1000, endpoint)
+        stats[3] = latency if stats[3] is None else max(stats[3], latency)
+        if record.get("Sent At", "") >= self.started_at:
+            stats[2] += 1
+            self.sent += 1
+            self.finished = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return self.finished - self.started
+
+    def throughput(self, count=None):
+        """本次运行的每秒完成请求数"""
+        count = self.sent if count is None else count
+        return round(count / self.elapsed, 2) if self.elapsed > 0 else None
+
+    def summary_data(self):
+        """加入Summary表的总体统计"""
+        return {
+            '本次发送数': [self.sent],
+            '发送耗时(秒)': [round(self.elapsed, 3)],
+            '吞吐量(请求/秒)': [self.throughput()]
+        }
+
+    def endpoint_summary(self):
+        """按端点的请求数、失败数、吞吐量和延迟分位数（ms）"""
+        snapshot = self.histogram.snapshot()
+        rows = []
+        for endpoint, (count, failed, sent, max_latency) in self.endpoints.items():
+            counts, total, observed = snapshot.get((endpoint,), ([], 0, 0))
+            row = {
+                '端点': endpoint,
+                '请求数': count,
+                '失败数': failed,
+                '吞吐量(请求/秒)': self.throughput(sent) if sent else None,
+                '平均延迟(ms)': round(total / observed * 1000, 1) if observed else None
+            }
+            for name, q in SUMMARY_QUANTILES:
+                value = histogram_quantile(q, SUMMARY_LATENCY_BUCKETS, counts) if observed else None
+                # 桶内插值可能超过实际最大值
+                row[f'{name}(ms)'] = min(round(value * 1000, 1), max_latency) if value is not None else None
+            row['最大延迟(ms)'] = max_latency
+            rows.append(row)
+        return rows
+
+
+class StreamingResultWriter:
+    """
+    批量结果流式写入器
+    每条结果完成后立即追加到JSONL并flush，进程中断也不会丢失已完成的结果；
+    结束时再从JSONL流式生成最终的xlsx，Summary中附加吞吐量和按端点的延迟分位数
+    """
+
+    def __init__(self, output_path, columns):
+        self.output_path = output_path
+        self.columns = columns
+        self.sidecar_path = sidecar_path_for(output_path)
+        self.stats = LatencyStats()
+        # 续传时会按行顺序重新产出全部结果，因此总是重写JSONL
+        self.file = open(self.sidecar_path, 'w', encoding='utf-8')
+
+    def write(self, record):
+        """追加一条结果"""
+        self.file.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+        self.file.flush()
+        self.stats.add(record)
+
+    def close(self, summary_data=None):
+        """关闭JSONL并生成最终xlsx，返回xlsx路径"""
+        if not self.file.closed:
+            self.file.close()
+        endpoint_summary = None
+        if summary_data is not None:
+            summary_data = dict(summary_data, **self.stats.summary_data())
+            endpoint_summary = self.stats.endpoint_summary()
+        return write_workbook(self.output_path, self.columns,
+                              iter_sidecar_records(self.sidecar_path), summary_data, endpoint_summary)
+
+
+def _xlsx_result_records(result_path):
+    """逐行读取结果xlsx的Results表（openpyxl只读模式）"""
+    workbook = load_workbook(result_path, read_only=True, data_only=True)
+    try:
+        if 'Results' not in workbook.sheetnames:
+            raise ValueError(f"结果文件中没有Results表: {os.path.basename(result_path)}")
+        sheet = workbook['Results']
+        # write-only模式生成的xlsx不记录范围，此时行数未知
+        rows = sheet.iter_rows(values_only=True)
+        columns = [col for col in next(rows, ()) if col is not None]
+        yield columns, sheet.max_row - 1 if sheet.max_row else None
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            yield dict(zip(columns, row))
+    finally:
+        workbook.close()
+
+
+def open_result_records(result_path):
+    """
+    读取已完成批次的结果，JSONL存在时优先读取（与xlsx内容相同，保留原始类型）
+    :return: (列名, 行数（未知时为None）, 记录迭代器)
+    """
+    sidecar_path = sidecar_path_for(result_path)
+    if os.path.exists(sidecar_path):
+        with open(sidecar_path, 'rb') as f:
+            row_hint = sum(1 for _ in f)
+        records = iter_sidecar_records(sidecar_path)
+        first = next(records, None)
+        columns = list(first.keys()) if first else []
+
+        def all_records():
+            if first is not None:
+                yield first
+            yield from records
+        return columns, row_hint, all_records()
+    if not os.path.exists(result_path):
+        raise ValueError(f"结果文件不存在: {os.path.basename(result_path)}")
+    records = _xlsx_result_records(result_path)
+    columns, row_hint = next(records)
+    return columns, row_hint, records
+
+
+def build_partial_workbook(output_path, target):
+    """
+    根据仍在运行的批次的JSONL生成当前结果快照
+    :param output_path: 批次最终的xlsx路径
+    :param target: 快照的输出路径或文件对象
+    :return: target；JSONL不存在时返回None
+    """
+    sidecar_path = sidecar_path_for(output_path)
+    if not os.path.exists(sidecar_path):
+        return None
+
+    records = iter_sidecar_records(sidecar_path)
+    first = next(records, None)
+    columns = list(first.keys()) if first else []
+
+    def all_records():
+        if first is not None:
+            yield first
+        yield from records
+
+    return write_workbook(target, columns, all_records())
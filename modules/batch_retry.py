@@ -0,0 +1,56 @@
+import json
+from modules.batch_executor import PrecomputedResult
+from modules.batch_results import open_result_records
+
+# 重试上一次批量中失败的行：由结果文件重建请求，不再读取和展开原始上传文件
+
+FAILED_STATUS = "FAILED"
+
+
+class FailedRows:
+    """
+    上一次批量结果中的行，按原顺序产出
+    - Status为FAILED的行: 由Endpoint和请求列（JSON/Payload）重建的 (endpoint, payload)，重新发送
+    - 其余行: PrecomputedResult，原样写入新的结果文件
+    请求列无法解析的失败行保留原记录
+    """
+
+    def __init__(self, result_path, request_column="JSON"):
+        self.result_path = result_path
+        self.request_column = request_column
+        self.columns, self.row_hint, self._records = open_result_records(result_path)
+        missing = [col for col in ("Endpoint", request_column, "Status") if col not in self.columns]
+        if missing:
+            raise ValueError(f"结果文件缺少列: {', '.join(missing)}")
+        self.source_rows = 0
+        self.failed_rows = 0
+        self.unreadable_rows = 0
+        self.exhausted = False
+
+    def estimated_length(self):
+        """总行数：读取完成后为准确值，之前为结果文件的行数（未知时为已读取的行数）"""
+        if self.exhausted:
+            return self.source_rows
+        return max(self.row_hint or 0, self.source_rows)
+
+    def _payload(self, record):
+        try:
+            payload = json.loads(record[self.request_column])
+        except (TypeError, ValueError):
+            return None
+        return payload if isinstance(payload, dict) else None
+
+    def requests(self):
+        for record in self._records:
+            self.source_rows += 1
+            if record.get("Status") != FAILED_STATUS:
+                yield PrecomputedResult(record)
+                continue
+            payload = self._payload(record)
+            if payload is None:
+                self.unreadable_rows += 1
+                yield PrecomputedResult(record)
+                continue
+            self.failed_rows += 1
+            yield record["Endpoint"], payload
+        self.exhausted = True
@@ -0,0 +1,166 @@
+import re
+import pandas as pd
+from modules.app_logging import get_logger
+
+logger = get_logger("batch")
+
+# 号码范围格式: 起始号码-结束号码
+RANGE_PATTERN = re.compile(r'^\d+-\d+$')
+
+# 需要以字符串发送的号码类字段（不区分大小写）
+STRING_FIELDS = ('imsi', 'iccid', 'msisdn', 'packCode')
+
+
+def _to_text(value):
+    """号码类字段转换为字符串，整数值的浮点数不保留小数位"""
+    if isinstance(value, float) and value.is_integer():
+        value = str(int(value))
+    elif isinstance(value, (int, float)):
+        value = str(value)
+    else:
+        value = str(value).strip()
+    return value or None
+
+
+def _is_blank(value):
+    return isinstance(value, str) and not value.strip()
+
+
+def normalize_frame(df, string_fields=STRING_FIELDS):
+    """
+    按列一次性规整批量数据，代替逐行逐列判断
+    - string_fields 中的列转换为字符串（去除首尾空白，整数值的浮点数不保留小数位）
+    - 其他列中的空白字符串视为缺失
+    - 缺失值统一为None，数值转换为Python原生类型
+    :return: object类型的DataFrame，每个值都可直接json序列化或为None
+    """
+    string_columns = {field.lower() for field in string_fields}
+    columns = {}
+    for col in df.columns:
+        series = df[col].astype(object)
+        if str(col).lower() in string_columns:
+            series = series.map(_to_text, na_action='ignore')
+        elif not pd.api.types.is_numeric_dtype(df[col]):
+            series = series.mask(series.map(_is_blank).astype(bool))
+        # map后pandas可能推断为字符串类型，需转回object才能以None表示缺失
+        series = series.astype(object)
+        columns[col] = series.where(series.notna(), None)
+    return pd.DataFrame(columns, index=df.index, dtype=object)
+
+
+def iter_payloads(rows, skip_columns=('endpoint',)):
+    """
+    由规整后的行产出 (endpoint, payload)
+    payload 只包含非空字段，可直接json序列化
+    """
+    skip_columns = set(skip_columns)
+    for row in rows:
+        payload = {col: value for col, value in row.items() if value is not None and col not in skip_columns}
+        yield row['endpoint'], payload
+
+
+class ExpandedRows:
+    """
+    批量请求行的惰性范围展开
+    按行产出 {列名: 值} 字典，范围值 (start-end) 在遍历时逐个号码展开，
+    不再为每个号码复制一行DataFrame，内存占用与范围大小无关；
+    len() 根据范围直接计算展开后的总行数，无需先展开
+    """
+
+    def __init__(self, df, range_fields):
+        """
+        :param df: 原始数据
+        :param range_fields: {字段名: 最大长度或None}，列名包含字段名（不区分大小写）即视为该字段；
+                             每行只展开按此顺序第一个为范围值的字段
+        """
+        self.df = df
+        self.columns = list(df.columns)
+        # {列名: (字段名, 最大长度)}
+        self.range_columns = {}
+        for field, max_length in range_fields.items():
+            for col in self.columns:
+                if field in str(col).lower():
+                    self.range_columns[col] = (field, max_length)
+                    break
+        self._length = None
+
+    def _find_range(self, row):
+        """返回该行第一个范围值 (列名, 字段名, start, end, 是否被截断)，没有范围值时返回None"""
+        for col, (field, max_length) in self.range_columns.items():
+            value = row[col]
+            if isinstance(value, str) and RANGE_PATTERN.match(value.strip()):
+                start, end = map(int, value.split('-'))
+                # 号码递增，超过最大长度之后的号码都被跳过
+                clipped = bool(max_length) and end >= 10 ** max_length
+                if clipped:
+                    end = 10 ** max_length - 1
+                return col, field, start, end, clipped
+        return None
+
+    def _iter_source_rows(self):
+        """逐行产出原始数据（Python原生类型）"""
+        for values in self.df.itertuples(index=False, name=None):
+            yield dict(zip(self.columns, values))
+
+    def __iter__(self):
+        for row in self._iter_source_rows():
+            found = self._find_range(row) if self.range_columns else None
+            if found is None:
+                yield row
+                continue
+
+            col, field, start, end, clipped = found
+            if clipped:
+                logger.warning("%s range %s exceeds maximum length %s, values after %s skipped",
+                               field, row[col], self.range_columns[col][1], end)
+            for num in range(start, end + 1):
+                expanded = dict(row)
+                expanded[col] = str(num)
+                yield expanded
+
+    def __len__(self):
+        if self._length is None:
+            if not self.range_columns:
+                self._length = len(self.df)
+            else:
+                cols = list(self.range_columns)
+                length = 0
+                for values in self.df[cols].itertuples(index=False, name=None):
+                    found = self._find_range(dict(zip(cols, values)))
+                    length += max(found[3] - found[2] + 1, 0) if found else 1
+                self._length = length
+        return self._length
+
+
+class ChunkedRows:
+    """
+    分块读取的批量请求行：逐块规整并惰性展开范围，遍历时按行产出 {列名: 值} 字典（只能遍历一次）
+    总行数在读完之前未知，estimated_length() 按已读取块的展开行数加上文件声明的剩余行数估算
+    """
+
+    def __init__(self, source, range_fields, string_fields=STRING_FIELDS):
+        """
+        :param source: BatchFileReader等可遍历的DataFrame块，带columns和row_hint
+        :param range_fields: 同ExpandedRows
+        """
+        self.source = source
+        self.columns = list(source.columns)
+        self.range_fields = range_fields
+        self.string_fields = string_fields
+        self.source_rows = 0
+        self.expanded_rows = 0
+        self.exhausted = False
+
+    def __iter__(self):
+        for chunk in self.source:
+            rows = ExpandedRows(normalize_frame(chunk, self.string_fields), self.range_fields)
+            self.source_rows += len(chunk)
+            self.expanded_rows += len(rows)
+            yield from rows
+        self.exhausted = True
+
+    def estimated_length(self):
+        """读完后为展开后的准确行数"""
+        if self.exhausted or not self.source.row_hint:
+            return self.expanded_rows
+        return self.expanded_rows + max(self.source.row_hint - self.source_rows, 0)
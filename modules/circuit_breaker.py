@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from modules.app_logging import vendor_logger
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """熔断器打开期间请求被直接拒绝"""
+
+    def __init__(self, vendor, retry_in):
+        self.vendor = vendor
+        self.retry_in = retry_in
+        super().__init__(f"{vendor} 熔断中，请求未发送（约{retry_in:.0f}秒后探测恢复）")
+
+
+class CircuitBreaker:
+    """
+    供应商熔断器
+    - closed: 正常放行；连续失败达到failure_threshold，或最近窗口内失败率达到error_rate_threshold时打开
+    - open: 拒绝请求；open_seconds之后转为half_open
+    - half_open: 只放行少量探测请求，探测成功则关闭，失败则重新打开
+    """
+
+    def __init__(self, vendor, failure_threshold=5, error_rate_threshold=0.5, window_size=20,
+                 min_calls=10, open_seconds=30, half_open_max_calls=1):
+        self.vendor = vendor
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CLOSED
+        self.window = deque(maxlen=window_size)
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.opened_wall_time = None
+        self.probes_in_flight = 0
+        self.trip_count = 0
+        self.cond = threading.Condition()
+
+    def _retry_in(self, now):
+        return max(self.opened_at + self.open_seconds - now, 0)
+
+    def _error_rate(self):
+        if not self.window:
+            return 0.0
+        return self.window.count(False) / len(self.window)
+
+    def _open(self, now):
+        self.state = OPEN
+        self.opened_at = now
+        self.opened_wall_time = time.time()
+        self.probes_in_flight = 0
+        self.trip_count += 1
+        vendor_logger(self.vendor, "circuit").warning(
+            "⚠️ %s circuit opened (consecutive failures: %d, error rate: %.0f%%)",
+            self.vendor, self.consecutive_failures, self._error_rate() * 100,
+            extra={"fields": {"state": OPEN, "consecutive_failures": self.consecutive_failures}})
+
+    def _close(self):
+        self.state = CLOSED
+        self.window.clear()
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.opened_wall_time = None
+        self.probes_in_flight = 0
+        vendor_logger(self.vendor, "circuit").info("✅ %s circuit closed", self.vendor,
+                                                   extra={"fields": {"state": CLOSED}})
+
+    def allow(self):
+        """是否放行一个请求；放行的请求必须随后调用record()"""
+        with self.cond:
+            if self.state == CLOSED:
+                return True
+            now = time.monotonic()
+            if self.state == OPEN:
+                if self._retry_in(now) > 0:
+                    return False
+                self.state = HALF_OPEN
+                self.probes_in_flight = 0
+            if self.probes_in_flight < self.half_open_max_calls:
+                self.probes_in_flight += 1
+                return True
+            return False
+
+    def check(self):
+        """放行请求，否则抛出CircuitOpenError"""
+        if not self.allow():
+            with self.cond:
+                retry_in = self._retry_in(time.monotonic()) if self.opened_at else 0
+            raise CircuitOpenError(self.vendor, retry_in)
+
+    def record(self, success):
+        """记录放行请求的结果"""
+        with self.cond:
+            if self.state == HALF_OPEN:
+                self.probes_in_flight = max(self.probes_in_flight - 1, 0)
+                if success:
+                    self._close()
+                else:
+                    self._open(time.monotonic())
+            elif self.state == CLOSED:
+                self.window.append(success)
+                self.consecutive_failures = 0 if success else self.consecutive_failures + 1
+                if not success and (
+                        self.consecutive_failures >= self.failure_threshold or
+                        (len(self.window) >= self.min_calls and self._error_rate() >= self.error_rate_threshold)):
+                    self._open(time.monotonic())
+            self.cond.notify_all()
+
+    def wait_ready(self, timeout=None):
+        """
+        阻塞直到可以发送（已关闭，或熔断等待结束且有空闲的探测名额），供批量处理暂停使用
+        :return: 是否已可发送（超时返回False）
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self.cond:
+            while True:
+                now = time.monotonic()
+                if self.state == CLOSED:
+                    return True
+                if self.state == OPEN:
+                    wait = self._retry_in(now)
+                    if wait <= 0:
+                        return True
+                elif self.probes_in_flight < self.half_open_max_calls:
+                    return True
+                else:
+                    wait = None
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        return False
+                    wait = remaining if wait is None else min(wait, remaining)
+                self.cond.wait(wait)
+
+    def snapshot(self):
+        """当前状态，用于进度和状态接口"""
+        with self.cond:
+            now = time.monotonic()
+            return {
+                'vendor': self.vendor,
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'error_rate': round(self._error_rate(), 3),
+                'recent_calls': len(self.window),
+                'opened_at': datetime.fromtimestamp(self.opened_wall_time).strftime("%Y-%m-%d %H:%M:%S")
+                if self.opened_wall_time else None,
+                'retry_in_seconds': round(self._retry_in(now), 1) if self.state == OPEN else None,
+                'trip_count': self.trip_count
+            }
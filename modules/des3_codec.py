@@ -0,0 +1,44 @@
+from functools import lru_cache
+from Crypto.Cipher import DES3
+
+
+@lru_cache(maxsize=None)
+def get_cipher(hex_key):
+    """
+    按十六进制密钥缓存3DES-ECB cipher，密钥解析和扩展只做一次
+    ECB模式没有链接状态，同一cipher可在多个线程间共用
+    """
+    key_bytes = bytes.fromhex(hex_key)
+    if len(key_bytes) == 16:
+        # K1 + K2 + K1
+        key_bytes = key_bytes + key_bytes[:8]
+    return DES3.new(key_bytes, DES3.MODE_ECB)
+
+
+def to_bytes(data):
+    """str按UTF-8编码，bytes/bytearray/memoryview原样使用"""
+    if isinstance(data, str):
+        return data.encode('utf-8')
+    return data
+
+
+def ff_pad(data):
+    """以0xFF补齐到8字节边界"""
+    padding_len = (8 - (len(data) % 8)) % 8
+    return bytes(data) + b'\xFF' * padding_len
+
+
+def ff_unpad(data):
+    """去除末尾的0xFF补位"""
+    return bytes(data).rstrip(b'\xFF')
+
+
+def ff_pad_last_block(data):
+    """
+    ff_pad(data) 的最后一个8字节块
+    ECB各块独立加密，只需要密文最后8字节时不必加密整段数据
+    """
+    tail = len(data) % 8
+    if tail == 0:
+        return bytes(data[-8:])
+    return bytes(data[-tail:]) + b'\xFF' * (8 - tail)
@@ -0,0 +1,381 @@
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+from config.http_config import CIRCUIT_BREAKER_CONFIG, HTTP_CONNECTION_CONFIG, RETRY_CONFIG
+from modules.app_logging import vendor_logger
+from modules.metrics import registry
+from modules.circuit_breaker import CircuitBreaker
+
+# 端点幂等类别（在各供应商的 *_ENDPOINT_CONFIG 中声明，未声明的按mutating处理）
+QUERY = "query"
+MUTATING = "mutating"
+
+# 失败类型：pre_send=确定未发出（无法建立连接），transient=可能已发出的连接中断或超时
+PRE_SEND = "pre_send"
+TRANSIENT = "transient"
+
+# 批量处理（线程或asyncio任务）在熔断时等待恢复，而不是直接失败
+_wait_for_circuit = ContextVar("wait_for_circuit", default=False)
+
+# 接收每次发送的延迟和状态码（如批量的自适应并发上限），None表示不观测
+_request_observer = ContextVar("request_observer", default=None)
+
+# 统计实际发送次数（含重试），None表示不统计
+_send_counter = ContextVar("send_counter", default=None)
+
+# 记录最后一次发送的状态码，None表示不记录
+_status_recorder = ContextVar("status_recorder", default=None)
+
+
+class RetryPolicy:
+    """按端点幂等类别决定是否重试，以及重试前的等待时间（同步和异步传输共用）"""
+
+    def __init__(self, vendor):
+        self.config = dict(RETRY_CONFIG["default"])
+        self.config.update(RETRY_CONFIG.get(vendor, {}))
+
+    @property
+    def max_retries(self):
+        return self.config["max_retries"]
+
+    def retryable_error(self, failure_kind, idempotency):
+        """
+        :param failure_kind: PRE_SEND / TRANSIENT，其他错误为None（不重试）
+        """
+        if idempotency == QUERY:
+            return failure_kind in (PRE_SEND, TRANSIENT)
+        return failure_kind == PRE_SEND
+
+    def retryable_status(self, status_code, idempotency):
+        key = "query_retry_statuses" if idempotency == QUERY else "mutating_retry_statuses"
+        return status_code in self.config[key]
+
+    def backoff(self, attempt):
+        """指数退避 + 全随机抖动，避免多个批量线程同时重试"""
+        cap = min(self.config["backoff_max"], self.config["backoff_base"] * 2 ** (attempt - 1))
+        return random.uniform(0, cap)
+
+    def retry_after(self, headers):
+        """429/503的Retry-After（秒），不超过backoff_max"""
+        value = headers.get("Retry-After")
+        if value and value.isdigit():
+            return min(float(value), self.config["backoff_max"])
+        return None
+
+
+def admit(breaker):
+    """发送前经过熔断器：批量处理中等待恢复，其他情况熔断时直接抛出CircuitOpenError"""
+    if _wait_for_circuit.get():
+        while not breaker.allow():
+            breaker.wait_ready()
+    else:
+        breaker.check()
+
+
+def record_outcome(breaker, started_at, status_code=None):
+    """
+    记录一次发送结果，status_code为None表示请求异常；连接失败、超时和5xx计为失败
+    :param started_at: 发送开始时的time.monotonic()，用于向当前观测者报告延迟
+    """
+    breaker.record(status_code is not None and status_code < 500)
+    counter = _send_counter.get()
+    if counter is not None:
+        counter.sends += 1
+    recorder = _status_recorder.get()
+    if recorder is not None:
+        recorder.status_code = status_code
+    observer = _request_observer.get()
+    if observer is not None:
+        observer.record(time.monotonic() - started_at, status_code)
+
+
+def log_retry(vendor, attempt, max_retries, delay, reason, url):
+    vendor_logger(vendor, "transport").warning(
+        "↻ %s retry %d/%d in %.2fs (%s): %s", vendor, attempt, max_retries, delay, reason, url,
+        extra={"fields": {"attempt": attempt, "delay": round(delay, 3), "reason": reason, "url": url}})
+
+
+class VendorTransport:
+    """
+    供应商HTTP传输
+    每个供应商一个持久化的requests.Session，单次请求和批量线程共用同一keep-alive连接池，
+    避免每次请求重新建立TCP+TLS连接；请求经过供应商熔断器，并按端点幂等类别自动重试
+    """
+
+    def __init__(self, vendor, pool_size, connect_timeout, read_timeout):
+        self.vendor = vendor
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.session = requests.Session()
+        # pool_connections为缓存的主机数，pool_maxsize为每个主机保持的连接数
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.breaker = get_breaker(vendor)
+        self.retry = RetryPolicy(vendor)
+        # 被替换后（retire）在最后一个在途请求完成时关闭Session
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._retired = False
+
+    @property
+    def timeout(self):
+        return (self.connect_timeout, self.read_timeout)
+
+    def post(self, url, idempotency=MUTATING, **kwargs):
+        """
+        发送POST请求，未指定timeout时使用配置的连接/读取超时
+        :param idempotency: 端点幂等类别，query可在连接失败、超时和5xx时重试，mutating只在确定未发送时重试
+        :return: requests.Response，attempts属性为实际发送次数
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        attempt = 0
+        while True:
+            attempt += 1
+            can_retry = attempt <= self.retry.max_retries
+            try:
+                response = self._send(url, kwargs)
+            except requests.exceptions.RequestException as e:
+                if not (can_retry and self.retry.retryable_error(_failure_kind(e), idempotency)):
+                    raise
+                reason = type(e).__name__
+                delay = self.retry.backoff(attempt)
+            else:
+                if not (can_retry and self.retry.retryable_status(response.status_code, idempotency)):
+                    response.attempts = attempt
+                    return response
+                reason = f"HTTP {response.status_code}"
+                delay = self.retry.retry_after(response.headers) or self.retry.backoff(attempt)
+                response.close()
+            log_retry(self.vendor, attempt, self.retry.max_retries, delay, reason, url)
+            time.sleep(delay)
+
+    def _send(self, url, kwargs):
+        """经熔断器发送一次请求"""
+        admit(self.breaker)
+        started_at = time.monotonic()
+        with self._lock:
+            self._in_flight += 1
+        try:
+            response = self.session.post(url, **kwargs)
+        except Exception:
+            record_outcome(self.breaker, started_at)
+            raise
+        finally:
+            self._release()
+        record_outcome(self.breaker, started_at, response.status_code)
+        return response
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+            idle = self._retired and not self._in_flight
+        if idle:
+            self.session.close()
+
+    def retire(self):
+        """已被新的传输替换：没有在途请求时立即关闭Session，否则在最后一个在途请求完成后关闭"""
+        with self._lock:
+            self._retired = True
+            idle = not self._in_flight
+        if idle:
+            self.session.close()
+
+    def close(self):
+        self.session.close()
+
+
+def _failure_kind(error):
+    """requests异常的失败类型：无法建立连接为PRE_SEND（修改类请求也可安全重试），其他连接错误和超时为TRANSIENT"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return PRE_SEND
+    if isinstance(error, requests.exceptions.ConnectionError):
+        if error.args and isinstance(getattr(error.args[0], "reason", None), NewConnectionError):
+            return PRE_SEND
+        return TRANSIENT
+    if isinstance(error, requests.exceptions.Timeout):
+        return TRANSIENT
+    return None
+
+
+def base_url_for(vendor, default):
+    """供应商base URL，可通过环境变量 <VENDOR>_BASE_URL 覆盖（如指向本地模拟服务器 modules/mock_vendors.py）"""
+    return os.environ.get(f"{vendor.upper()}_BASE_URL") or default
+
+
+def idempotency_of(endpoint_config, endpoint):
+    """从供应商端点配置中读取幂等类别"""
+    return endpoint_config.get(endpoint, {}).get("idempotency", MUTATING)
+
+
+_transports = {}
+_transports_lock = threading.Lock()
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+@contextmanager
+def wait_for_circuit():
+    """在此范围内（当前线程，或在此范围内创建的asyncio任务）熔断时暂停等待恢复，用于批量处理"""
+    token = _wait_for_circuit.set(True)
+    try:
+        yield
+    finally:
+        _wait_for_circuit.reset(token)
+
+
+def waits_for_circuit():
+    """当前上下文是否在熔断时等待恢复"""
+    return _wait_for_circuit.get()
+
+
+@contextmanager
+def observe_requests(observer):
+    """在此范围内的每次发送都调用observer.record(latency, status_code)"""
+    token = _request_observer.set(observer)
+    try:
+        yield
+    finally:
+        _request_observer.reset(token)
+
+
+class SendCounter:
+    __slots__ = ("sends",)
+
+    def __init__(self):
+        self.sends = 0
+
+
+@contextmanager
+def count_sends():
+    """统计此范围内实际发出的请求次数（含重试）：with count_sends() as counter: ...; counter.sends"""
+    counter = SendCounter()
+    token = _send_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _send_counter.reset(token)
+
+
+class StatusRecorder:
+    __slots__ = ("status_code",)
+
+    def __init__(self):
+        self.status_code = None
+
+
+@contextmanager
+def record_status():
+    """
+    记录此范围内最后一次发送的状态码（含重试后的最终结果，请求异常或未发送时为None）
+    with record_status() as recorder: ...; recorder.status_code
+    """
+    recorder = StatusRecorder()
+    token = _status_recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _status_recorder.reset(token)
+
+
+def get_breaker(vendor):
+    """获取供应商熔断器（连接池重建时保持不变）"""
+    with _breakers_lock:
+        breaker = _breakers.get(vendor)
+        if breaker is None:
+            config = dict(CIRCUIT_BREAKER_CONFIG["default"])
+            config.update(CIRCUIT_BREAKER_CONFIG.get(vendor, {}))
+            breaker = CircuitBreaker(vendor, **config)
+            _breakers[vendor] = breaker
+        return breaker
+
+
+def circuit_status():
+    """所有已配置供应商的熔断器状态"""
+    vendors = [vendor for vendor in CIRCUIT_BREAKER_CONFIG if vendor != "default"]
+    return {vendor: get_breaker(vendor).snapshot() for vendor in vendors}
+
+
+# /metrics 中熔断状态的数值
+CIRCUIT_STATE_VALUES = {'closed': 0, 'half_open': 1, 'open': 2}
+
+
+def _circuit_metrics():
+    snapshots = circuit_status()
+    return [
+        ("vendor_circuit_state", "gauge", "Circuit breaker state (0=closed, 1=half_open, 2=open)", ("vendor",),
+         [((vendor,), CIRCUIT_STATE_VALUES[snapshot['state']]) for vendor, snapshot in snapshots.items()]),
+        ("vendor_circuit_trips_total", "counter", "Times the circuit breaker opened", ("vendor",),
+         [((vendor,), snapshot['trip_count']) for vendor, snapshot in snapshots.items()])
+    ]
+
+
+registry.add_collector(_circuit_metrics)
+
+
+def _vendor_config(vendor, overrides):
+    config = dict(HTTP_CONNECTION_CONFIG["default"])
+    config.update(HTTP_CONNECTION_CONFIG.get(vendor, {}))
+    config.update({key: value for key, value in overrides.items() if value is not None})
+    return config
+
+
+def get_transport(vendor):
+    """获取供应商的HTTP传输（首次使用时按配置创建）"""
+    with _transports_lock:
+        transport = _transports.get(vendor)
+        if transport is None:
+            config = _vendor_config(vendor, {})
+            transport = VendorTransport(vendor, config["pool_size"], config["connect_timeout"], config["read_timeout"])
+            _transports[vendor] = transport
+        return transport
+
+
+def configure_transport(vendor, pool_size=None, connect_timeout=None, read_timeout=None):
+    """
+    调整供应商的连接池大小或超时，未指定的参数沿用配置文件
+    连接池只增不减：变大时重建Session，旧Session在其在途请求完成后关闭
+    """
+    config = _vendor_config(vendor, {
+        "pool_size": pool_size,
+        "connect_timeout": connect_timeout,
+        "read_timeout": read_timeout
+    })
+    with _transports_lock:
+        transport = _transports.get(vendor)
+        if transport is not None and transport.pool_size >= config["pool_size"]:
+            transport.connect_timeout = config["connect_timeout"]
+            transport.read_timeout = config["read_timeout"]
+            return transport
+        return _replace_transport(vendor, transport, config["pool_size"], config["connect_timeout"],
+                                  config["read_timeout"])
+
+
+def ensure_pool_size(vendor, pool_size):
+    """
+    连接池不小于pool_size（只增不减，超时不变），用于按批量并发数扩大连接池
+    多个批量同时运行时取其中最大的并发数，不会缩小其他批量正在使用的连接池
+    """
+    transport = get_transport(vendor)
+    if transport.pool_size >= pool_size:
+        return transport
+    with _transports_lock:
+        transport = _transports[vendor]
+        if transport.pool_size >= pool_size:
+            return transport
+        return _replace_transport(vendor, transport, pool_size, transport.connect_timeout, transport.read_timeout)
+
+
+def _replace_transport(vendor, old, pool_size, connect_timeout, read_timeout):
+    """创建新的传输替换old（调用时持有_transports_lock），old的Session在其在途请求完成后关闭"""
+    _transports[vendor] = VendorTransport(vendor, pool_size, connect_timeout, read_timeout)
+    if old is not None:
+        old.retire()
+    return _transports[vendor]
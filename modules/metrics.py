@@ -0,0 +1,310 @@
+import bisect
+import math
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+# 进程内指标注册表，/metrics 以Prometheus文本格式输出
+# 计数器和直方图按线程分片：每个线程只写自己的分片，记录时不加锁；
+# 抓取时在锁内合并各分片，已结束线程的分片并入基础分片后释放
+
+# 延迟直方图的桶上限（秒）
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def exponential_buckets(start, factor, count):
+    """count个按factor倍递增的桶上限，从start开始"""
+    return tuple(start * factor ** i for i in range(count))
+
+
+def histogram_quantile(q, buckets, counts):
+    """
+    由分桶计数估算分位数：在所在桶的上下限之间线性插值（与Prometheus的histogram_quantile相同）
+    :param q: 分位数（0~1）
+    :param buckets: 桶上限（不含+Inf）
+    :param counts: 各桶的非累计计数，最后一个为+Inf桶
+    :return: 估算值；没有样本时返回None，落在+Inf桶时返回最大的桶上限
+    """
+    total = sum(counts)
+    if not total:
+        return None
+    rank = q * total
+    cumulative = 0
+    for i, count in enumerate(counts):
+        if count and cumulative + count >= rank:
+            if i == len(buckets):
+                return buckets[-1]
+            lower = buckets[i - 1] if i else 0.0
+            return lower + (buckets[i] - lower) * (rank - cumulative) / count
+        cumulative += count
+    return buckets[-1]
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _ShardedMetric:
+    """按线程分片的指标基类；分片为 {标签值元组: 值}"""
+
+    metric_type = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # (线程弱引用, 分片)；线程结束后其分片在抓取时并入_base
+        self._shards = []
+        self._base = {}
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append((weakref.ref(threading.current_thread()), shard))
+        return shard
+
+    def _merge_into(self, target, shard):
+        raise NotImplementedError
+
+    def _collect(self):
+        """合并所有分片，返回 {标签值元组: 值}"""
+        with self._lock:
+            alive = []
+            for thread_ref, shard in self._shards:
+                thread = thread_ref()
+                if thread is None or not thread.is_alive():
+                    self._merge_into(self._base, shard)
+                else:
+                    alive.append((thread_ref, shard))
+            self._shards = alive
+            merged = {}
+            self._merge_into(merged, self._base)
+            for _, shard in alive:
+                self._merge_into(merged, dict(shard))
+        return merged
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.metric_type}"]
+        for key, value in sorted(self._collect().items()):
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value):
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"]
+
+
+class Counter(_ShardedMetric):
+    metric_type = "counter"
+
+    def inc(self, *label_values, amount=1):
+        shard = self._shard()
+        shard[label_values] = shard.get(label_values, 0) + amount
+
+    def _merge_into(self, target, shard):
+        for key, value in shard.items():
+            target[key] = target.get(key, 0) + value
+
+
+class Gauge(Counter):
+    """
+    可增减的计量值（如在途请求数）
+    inc/dec 按线程分片累加，合并后即为当前值，同一请求的inc和dec可以在不同线程
+    """
+
+    metric_type = "gauge"
+
+    def dec(self, *label_values, amount=1):
+        self.inc(*label_values, amount=-amount)
+
+
+class Histogram(_ShardedMetric):
+    """分桶直方图；分片中每个标签组合为 [各桶计数..., 总和, 总数]"""
+
+    metric_type = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *label_values):
+        shard = self._shard()
+        counts = shard.get(label_values)
+        if counts is None:
+            counts = shard[label_values] = [0] * (len(self.buckets) + 3)
+        # 最后一个桶为+Inf
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-2] += value
+        counts[-1] += 1
+
+    @contextmanager
+    def time(self, *label_values):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+    def _merge_into(self, target, shard):
+        for key, counts in shard.items():
+            merged = target.get(key)
+            if merged is None:
+                target[key] = list(counts)
+            else:
+                for i, value in enumerate(counts):
+                    merged[i] += value
+
+    def snapshot(self):
+        """{标签值元组: (各桶非累计计数, 总和, 总数)}，用于计算分位数"""
+        return {key: (counts[:-2], counts[-2], counts[-1]) for key, counts in self._collect().items()}
+
+    def _render_sample(self, key, counts):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), counts[:-2]):
+            cumulative += count
+            labels = _format_labels(self.labels, key, f'le="{_format_value(float(bound))}"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labels, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(counts[-2])}")
+        lines.append(f"{self.name}_count{labels} {counts[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+        self.lock = threading.Lock()
+
+    def register(self, metric):
+        with self.lock:
+            self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self.register(Counter(name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=()):
+        return self.register(Gauge(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def add_collector(self, collector):
+        """
+        注册抓取时调用的采集函数，返回 [(名称, 类型, 说明, 标签名, [(标签值元组, 值)])]
+        用于批量任务进度、熔断状态等直接读取现有对象的指标
+        """
+        with self.lock:
+            self.collectors.append(collector)
+
+    def render(self):
+        """Prometheus文本格式（0.0.4）"""
+        with self.lock:
+            metrics, collectors = list(self.metrics), list(self.collectors)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            for name, metric_type, help_text, labels, samples in collector():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for key, value in samples:
+                    lines.append(f"{name}{_format_labels(labels, key)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# 供应商调用：endpoint为供应商端点路径（如 quadcell / v2/addpack）
+vendor_requests = registry.counter(
+    "vendor_requests_total", "Vendor API calls", ("vendor", "endpoint"))
+vendor_errors = registry.counter(
+    "vendor_request_errors_total", "Vendor API calls that failed (exception or non-200 status)",
+    ("vendor", "endpoint", "kind"))
+vendor_phase_seconds = registry.histogram(
+    "vendor_request_phase_seconds", "Vendor API call latency by phase (encode, network, decode)",
+    ("vendor", "endpoint", "phase"))
+vendor_in_flight = registry.gauge(
+    "vendor_requests_in_flight", "Vendor API calls in progress", ("vendor",))
+
+# 批量任务
+batch_jobs_finished = registry.counter(
+    "batch_jobs_total", "Finished batch jobs", ("vendor", "status"))
+batch_rows = registry.counter(
+    "batch_rows_total", "Rows processed by finished batch jobs", ("vendor", "status"))
+batch_stage_seconds = registry.histogram(
+    "batch_stage_seconds", "Batch pipeline stage duration (validate, read, expand, send, write)", ("vendor", "stage"))
+
+# Flask路由，route为路由规则（如 /api/quadcell/batch）
+route_seconds = registry.histogram(
+    "http_route_seconds", "Flask route latency", ("route", "method", "status"))
+
+
+class VendorCall:
+    """
+    一次供应商调用的指标：phase()计时各阶段，response()/error()记录失败，结束时调用done()
+    """
+
+    __slots__ = ("vendor", "endpoint")
+
+    def __init__(self, vendor, endpoint):
+        self.vendor = vendor
+        self.endpoint = endpoint
+        vendor_requests.inc(vendor, endpoint)
+        vendor_in_flight.inc(vendor)
+
+    def phase(self, name):
+        """计时一个阶段：with call.phase("network"): ..."""
+        return _Phase(self, name)
+
+    def response(self, response):
+        """记录响应状态，非200计为错误"""
+        if response.status_code != 200:
+            vendor_errors.inc(self.vendor, self.endpoint, f"http_{response.status_code}")
+
+    def error(self, error):
+        vendor_errors.inc(self.vendor, self.endpoint, type(error).__name__)
+
+    def done(self):
+        vendor_in_flight.dec(self.vendor)
+
+
+class _Phase:
+    __slots__ = ("call", "name", "start")
+
+    def __init__(self, call, name):
+        self.call = call
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        vendor_phase_seconds.observe(time.perf_counter() - self.start, self.call.vendor, self.call.endpoint,
+                                     self.name)
+
+
+def vendor_call(vendor, endpoint):
+    """开始记录一次供应商调用"""
+    return VendorCall(vendor, endpoint.lstrip("/"))
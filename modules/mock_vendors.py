@@ -0,0 +1,376 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import random
+import threading
+from aiohttp import web
+from modules.async_transport import AsyncRuntime
+from modules.batch_executor import TokenBucket
+from modules import quadcell_api, montnet_api, simlessly_api, worldmove_api
+
+# 本地模拟供应商服务器：按各供应商的真实协议解密/验签请求并返回加密/签名一致的响应，
+# 可配置延迟分布、错误注入和吞吐上限，用于压测和基准测试，不访问真实供应商
+
+VENDORS = ("quadcell", "montnet", "simlessly", "worldmove")
+
+# 各供应商在模拟服务器上的路径前缀（与真实base URL的路径部分对应）
+VENDOR_PATHS = {
+    "quadcell": "/quadcell/qccl/v2",
+    "montnet": "/montnet/httpApi/v1/quadcell",
+    "simlessly": "/simlessly/api/v1",
+    "worldmove": "/worldmove/Api"
+}
+
+
+class LatencyModel:
+    """
+    响应延迟分布（毫秒）
+    - fixed: 固定mean_ms
+    - uniform: mean_ms ± jitter_ms 均匀分布
+    - normal: 均值mean_ms、标准差jitter_ms
+    - lognormal: 中位数mean_ms、对数标准差由jitter_ms/mean_ms换算，长尾
+    - exponential: 均值mean_ms
+    """
+
+    def __init__(self, distribution="fixed", mean_ms=20, jitter_ms=0, max_ms=None):
+        if distribution not in ("fixed", "uniform", "normal", "lognormal", "exponential"):
+            raise ValueError(f"未知的延迟分布: {distribution}")
+        self.distribution = distribution
+        self.mean_ms = mean_ms
+        self.jitter_ms = jitter_ms
+        self.max_ms = max_ms
+
+    def sample(self):
+        """返回一次响应的延迟（秒）"""
+        mean, jitter = self.mean_ms, self.jitter_ms
+        if self.distribution == "uniform":
+            value = random.uniform(mean - jitter, mean + jitter)
+        elif self.distribution == "normal":
+            value = random.gauss(mean, jitter)
+        elif self.distribution == "lognormal":
+            value = mean * random.lognormvariate(0, jitter / mean if mean else 0)
+        elif self.distribution == "exponential":
+            value = random.expovariate(1 / mean) if mean else 0
+        else:
+            value = mean
+        if self.max_ms is not None:
+            value = min(value, self.max_ms)
+        return max(value, 0) / 1000
+
+
+class MockBehavior:
+    """
+    模拟服务器的延迟、错误和容量设置
+    :param error_rate: 返回error_statuses中随机状态码的比例
+    :param timeout_rate: 挂起timeout_seconds秒再响应的比例（模拟读取超时）
+    :param disconnect_rate: 不响应直接断开连接的比例
+    :param max_rps: 每秒请求数上限，超出时返回429（Retry-After: 1）
+    :param max_concurrency: 同时处理的请求数上限，超出的请求排队，延迟随负载上升
+    """
+
+    def __init__(self, latency=None, error_rate=0.0, error_statuses=(500, 502, 503), timeout_rate=0.0,
+                 timeout_seconds=60, disconnect_rate=0.0, max_rps=None, max_concurrency=None):
+        self.latency = latency or LatencyModel()
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.timeout_rate = timeout_rate
+        self.timeout_seconds = timeout_seconds
+        self.disconnect_rate = disconnect_rate
+        self.max_rps = max_rps
+        self.max_concurrency = max_concurrency
+
+    @classmethod
+    def from_dict(cls, config):
+        config = dict(config)
+        latency = config.pop("latency", None)
+        return cls(latency=LatencyModel(**latency) if latency else None, **config)
+
+
+class MockStats:
+    """各供应商的请求计数，GET /_stats 返回"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {vendor: {} for vendor in VENDORS}
+
+    def incr(self, vendor, key):
+        with self.lock:
+            self.counts[vendor][key] = self.counts[vendor].get(key, 0) + 1
+
+    def snapshot(self):
+        with self.lock:
+            return {vendor: dict(counts) for vendor, counts in self.counts.items()}
+
+
+class ProtocolError(Exception):
+    """请求不符合供应商协议（解密、MAC或签名校验失败）"""
+
+    def __init__(self, message, status=400):
+        self.status = status
+        super().__init__(message)
+
+
+def _success_body(endpoint, payload):
+    """模拟的成功响应内容，data回显请求参数（不含认证字段）"""
+    data = {key: value for key, value in payload.items() if key not in ("authKey", "encStr", "token")}
+    return {"code": "0", "message": "success", "endpoint": endpoint, "data": data, "mock": True}
+
+
+class QuadcellProtocol:
+    """请求为固定密钥索引05的3DES + MAC报文，响应以密钥01加密"""
+
+    vendor = "quadcell"
+
+    def handle(self, endpoint, body, headers):
+        codec = quadcell_api.HttpApiCodec
+        if endpoint not in quadcell_api.QUADCELL_ENDPOINT_CONFIG:
+            raise ProtocolError(f"unknown endpoint: {endpoint}", 404)
+        if body[4:6] != "05":
+            raise ProtocolError(f"unexpected key index: {body[4:6]}")
+        try:
+            payload = json.loads(codec.decode(body, verbose=False))
+        except Exception as e:
+            raise ProtocolError(f"decrypt failed: {e}")
+        if not payload.get("authKey"):
+            raise ProtocolError("authKey missing")
+        return 200, codec.encode(json.dumps(_success_body(endpoint, payload)), hex_sec_idx="01")
+
+
+class MontNetProtocol:
+    """请求和响应都是随机密钥索引的3DES报文，附gen_mac计算的MAC"""
+
+    vendor = "montnet"
+
+    def handle(self, endpoint, body, headers):
+        codec = montnet_api.HttpApiCodec
+        if endpoint not in montnet_api.MONTNET_ENDPOINT_CONFIG:
+            raise ProtocolError(f"unknown endpoint: {endpoint}", 404)
+        try:
+            payload = json.loads(codec.decode(body))
+        except Exception as e:
+            raise ProtocolError(f"decrypt failed: {e}")
+        if not payload.get("authKey"):
+            raise ProtocolError("authKey missing")
+        return 200, codec.encode(json.dumps(_success_body(endpoint, payload)))
+
+
+class SimlesslyProtocol:
+    """校验Timestamp/RequestID/AccessKey/Signature请求头的HMAC-SHA256签名"""
+
+    vendor = "simlessly"
+
+    def handle(self, endpoint, body, headers):
+        client = simlessly_api.HmacApiClient
+        if endpoint not in simlessly_api.SIMLESSLY_ENDPOINT_CONFIG:
+            raise ProtocolError(f"unknown endpoint: {endpoint}", 404)
+        timestamp = headers.get("Timestamp")
+        request_id = headers.get("RequestID")
+        access_key = headers.get("AccessKey")
+        if not (timestamp and request_id and access_key and headers.get("Signature")):
+            raise ProtocolError("missing authentication headers", 401)
+        if access_key != client.ACCESS_KEY:
+            raise ProtocolError("invalid AccessKey", 401)
+        expected = client.generate_signature(f"{timestamp}{request_id}{access_key}{body}", client.SECRET_KEY)
+        if headers["Signature"] != expected:
+            raise ProtocolError("signature mismatch", 401)
+        try:
+            payload = json.loads(body) if body else {}
+        except json.JSONDecodeError as e:
+            raise ProtocolError(f"invalid JSON: {e}")
+        return 200, json.dumps({"success": True, **_success_body(endpoint, payload)})
+
+
+class WorldMoveProtocol:
+    """按端点的签名参数顺序重新计算encStr（SHA1）并比对"""
+
+    vendor = "worldmove"
+
+    def handle(self, endpoint, body, headers):
+        client = worldmove_api.Sha1ApiClient
+        if endpoint not in client.ENDPOINT_CONFIG:
+            raise ProtocolError(f"unknown endpoint: {endpoint}", 404)
+        try:
+            payload = json.loads(body)
+        except json.JSONDecodeError as e:
+            raise ProtocolError(f"invalid JSON: {e}")
+        enc_str = payload.pop("encStr", None)
+        if not enc_str:
+            raise ProtocolError("encStr missing")
+        expected = client.compute_signature(endpoint, payload)
+        if enc_str != expected:
+            return 200, json.dumps({"statusCode": "9999", "message": "encStr mismatch", "mock": True})
+        return 200, json.dumps({"statusCode": "0000", **_success_body(endpoint, payload)})
+
+
+PROTOCOLS = {
+    "quadcell": QuadcellProtocol,
+    "montnet": MontNetProtocol,
+    "simlessly": SimlesslyProtocol,
+    "worldmove": WorldMoveProtocol
+}
+
+
+class MockVendorServer:
+    """
+    在一个端口上模拟所有供应商，各供应商的base URL为 http://host:port + VENDOR_PATHS[vendor]
+    GET /_stats 返回各供应商的请求计数
+    """
+
+    def __init__(self, behaviors=None, host="127.0.0.1", port=0):
+        """
+        :param behaviors: {供应商: MockBehavior}，"default"为未单独设置的供应商使用的设置
+        """
+        behaviors = behaviors or {}
+        default = behaviors.get("default") or MockBehavior()
+        self.behaviors = {vendor: behaviors.get(vendor) or default for vendor in VENDORS}
+        self.host = host
+        self.port = port
+        self.stats = MockStats()
+        self.runtime = None
+        self.runner = None
+        self._buckets = {}
+        self._semaphores = {}
+
+    def base_urls(self):
+        return {vendor: f"http://{self.host}:{self.port}{path}" for vendor, path in VENDOR_PATHS.items()}
+
+    def _make_app(self):
+        app = web.Application(client_max_size=16 * 1024 * 1024)
+        for vendor, path in VENDOR_PATHS.items():
+            app.router.add_post(path + "/{endpoint:.+}", self._handler(vendor))
+        app.router.add_get("/_stats", self._stats)
+        return app
+
+    async def _stats(self, request):
+        return web.json_response(self.stats.snapshot())
+
+    def _handler(self, vendor):
+        protocol = PROTOCOLS[vendor]()
+        behavior = self.behaviors[vendor]
+        if behavior.max_rps:
+            self._buckets[vendor] = TokenBucket(behavior.max_rps)
+
+        async def handle(request):
+            self.stats.incr(vendor, "requests")
+            bucket = self._buckets.get(vendor)
+            if bucket is not None and bucket.try_acquire():
+                self.stats.incr(vendor, "throttled")
+                return web.json_response({"code": "429", "message": "too many requests", "mock": True},
+                                         status=429, headers={"Retry-After": "1"})
+
+            semaphore = self._semaphores.get(vendor)
+            if semaphore is None and behavior.max_concurrency:
+                semaphore = self._semaphores[vendor] = asyncio.Semaphore(behavior.max_concurrency)
+            async with semaphore or contextlib.nullcontext():
+                return await self._respond(vendor, protocol, behavior, request)
+
+        return handle
+
+    async def _respond(self, vendor, protocol, behavior, request):
+        body = await request.text()
+        await asyncio.sleep(behavior.latency.sample())
+
+        roll = random.random()
+        if roll < behavior.disconnect_rate:
+            self.stats.incr(vendor, "disconnected")
+            request.transport.close()
+            raise asyncio.CancelledError()
+        roll -= behavior.disconnect_rate
+        if roll < behavior.timeout_rate:
+            self.stats.incr(vendor, "timed_out")
+            await asyncio.sleep(behavior.timeout_seconds)
+        elif roll - behavior.timeout_rate < behavior.error_rate:
+            status = random.choice(behavior.error_statuses)
+            self.stats.incr(vendor, f"error_{status}")
+            return web.json_response({"code": str(status), "message": "injected error", "mock": True}, status=status)
+
+        try:
+            status, text = protocol.handle(request.match_info["endpoint"], body, request.headers)
+        except ProtocolError as e:
+            self.stats.incr(vendor, "protocol_errors")
+            return web.json_response({"code": str(e.status), "message": str(e), "mock": True}, status=e.status)
+        self.stats.incr(vendor, "ok")
+        return web.Response(text=text, status=status, content_type="application/json")
+
+    async def _start(self):
+        self.runner = web.AppRunner(self._make_app(), access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+        # 端口为0时取实际监听的端口
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    def start(self):
+        """在后台线程的事件循环上启动，返回 {供应商: base URL}"""
+        self.runtime = AsyncRuntime(name="mock-vendors")
+        self.runtime.run(self._start())
+        return self.base_urls()
+
+    def stop(self):
+        if self.runtime is not None:
+            self.runtime.run(self.runner.cleanup())
+            self.runtime.stop()
+            self.runtime = None
+
+    async def serve_forever(self):
+        """在当前事件循环上运行（命令行模式）"""
+        await self._start()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await self.runner.cleanup()
+
+
+def point_clients_at(base_urls):
+    """把当前进程中的供应商客户端指向指定的base URL（如模拟服务器）"""
+    targets = {
+        "quadcell": (quadcell_api.HttpApiClient, quadcell_api.QuadcellAPI),
+        "montnet": (montnet_api.MHttpApiClient, montnet_api.MontNetAPI),
+        "simlessly": (simlessly_api.HttpApiClient, simlessly_api.SimlesslyAPI),
+        "worldmove": (worldmove_api.Sha1ApiClient,)
+    }
+    for vendor, url in base_urls.items():
+        for cls in targets[vendor]:
+            cls.BASE_URL = url
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟供应商服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--latency", default="fixed", help="延迟分布: fixed/uniform/normal/lognormal/exponential")
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--disconnect-rate", type=float, default=0.0)
+    parser.add_argument("--max-rps", type=float, default=None)
+    parser.add_argument("--max-concurrency", type=int, default=None)
+    parser.add_argument("--config", help="JSON文件，按供应商设置 {vendor: {latency: {...}, error_rate: ...}}")
+    args = parser.parse_args()
+
+    behaviors = {"default": MockBehavior(
+        latency=LatencyModel(args.latency, args.latency_ms, args.jitter_ms),
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        disconnect_rate=args.disconnect_rate,
+        max_rps=args.max_rps,
+        max_concurrency=args.max_concurrency
+    )}
+    if args.config:
+        with open(args.config, "r", encoding="utf-8") as f:
+            behaviors.update({vendor: MockBehavior.from_dict(config) for vendor, config in json.load(f).items()})
+
+    server = MockVendorServer(behaviors, args.host, args.port)
+    print("▶ Mock vendor servers (set these before starting app.py):")
+    for vendor, url in server.base_urls().items():
+        print(f"   {vendor.upper()}_BASE_URL={url}")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
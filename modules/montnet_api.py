@@ -1,24 +1,32 @@
-import requests
 import json
 import random
-import pandas as pd
-import time
-import os
-import re
-from datetime import datetime
-from Crypto.Cipher import DES3
-from Crypto.Util.Padding import pad, unpad
-from tqdm import tqdm
+from modules.http_transport import base_url_for, get_transport, idempotency_of
+from modules.async_transport import get_async_transport
+from modules.des3_codec import ff_pad, ff_pad_last_block, ff_unpad, get_cipher, to_bytes
+from modules.batch_pipeline import BatchStages
+from modules.batch_rows import iter_payloads
+from modules.batch_checkpoint import INTERRUPTED_RESPONSE
+from modules.app_logging import mask_secret, vendor_logger
+from modules.metrics import vendor_call
+from modules.request_validation import EndpointValidator
+from modules.response_cache import VendorResponseCache
 from config.montnet_config import MONTNET_ENDPOINT_CONFIG, MONTNET_ENDPOINT_DESCRIPTIONS
 
+logger = vendor_logger("montnet")
+
+# 查询类端点的响应缓存（单条和批量请求共用）
+query_cache = VendorResponseCache("montnet", MONTNET_ENDPOINT_CONFIG)
+# 由端点配置编译的参数校验器（单条和批量请求共用）
+request_validator = EndpointValidator("montnet", MONTNET_ENDPOINT_CONFIG)
+
 class MHttpApiClient:
     """
     HTTP API Client for Montnets VMS Integration
     Handles encrypted communication with Montnets API
     """
     
-    # Fixed base URL
-    BASE_URL = "https://gtsapi.int-montnets.com/httpApi/v1/quadcell"
+    # Fixed base URL (MONTNET_BASE_URL environment variable overrides it, e.g. for the mock server)
+    BASE_URL = base_url_for("montnet", "https://gtsapi.int-montnets.com/httpApi/v1/quadcell")
     
     # Fixed authKey
     FIXED_AUTH_KEY = "A10000000167"
@@ -49,48 +57,98 @@ class MHttpApiClient:
         :param verbose: Whether to print detailed logs
         :return: Decrypted JSON response or raw response for non-200 status
         """
-        # Construct full URL
-        full_url = f"{MHttpApiClient.BASE_URL}/{endpoint.lstrip('/')}"
-        if verbose:
-            print(f"[HttpApi-Send] {full_url}")
-            print(f"[HttpApi-Send] {http_req}")
-        
+        full_url = MHttpApiClient._full_url(endpoint, http_req, verbose)
+        call = vendor_call("montnet", endpoint)
         try:
-            # Encrypt request payload
-            encrypted_req = HttpApiCodec.encode(http_req)
-            if verbose:
-                print(f"[Encrypted Request] {encrypted_req}")
-            
-            # Set request headers
-            headers = {
-                'Content-Type': 'application/json',
-                'Accept': 'application/json'
-            }
-            
-            # Send HTTP POST request
-            response = requests.post(
-                full_url, 
-                data=encrypted_req, 
-                headers=headers,
-                timeout=30
-            )
+            with call.phase("encode"):
+                encrypted_req, headers = MHttpApiClient._encrypt_request(http_req, verbose)
             
+            # Send HTTP POST request (pooled keep-alive connection)
+            with call.phase("network"):
+                response = get_transport("montnet").post(
+                    full_url, 
+                    idempotency=idempotency_of(MONTNET_ENDPOINT_CONFIG, endpoint),
+                    data=encrypted_req, 
+                    headers=headers
+                )
+            call.response(response)
+            with call.phase("decode"):
+                return MHttpApiClient._handle_response(response, verbose)
+        
+        except Exception as e:
+            call.error(e)
             if verbose:
-                print(f"[HTTP Status] {response.status_code}")
-                print(f"[Raw Response] {response.text}")
-            
-            # Handle response
-            if response.status_code == 200:
-                decrypted_ret = HttpApiCodec.decode(response.text)
-                if verbose:
-                    print(f"[Decrypted Response] {decrypted_ret}")
-                return decrypted_ret
-            return response.text
+                logger.error("Request failed: %s", e)
+            raise
+        finally:
+            call.done()
+    
+    @staticmethod
+    async def do_encrypt_post_async(endpoint, http_req, verbose=True):
+        """
+        Async version of do_encrypt_post (aiohttp), same encryption and response handling
+        :return: Decrypted JSON response or raw response for non-200 status
+        """
+        full_url = MHttpApiClient._full_url(endpoint, http_req, verbose)
+        call = vendor_call("montnet", endpoint)
+        try:
+            with call.phase("encode"):
+                encrypted_req, headers = MHttpApiClient._encrypt_request(http_req, verbose)
+            with call.phase("network"):
+                response = await get_async_transport("montnet").post(
+                    full_url,
+                    idempotency=idempotency_of(MONTNET_ENDPOINT_CONFIG, endpoint),
+                    data=encrypted_req,
+                    headers=headers
+                )
+            call.response(response)
+            with call.phase("decode"):
+                return MHttpApiClient._handle_response(response, verbose)
         
         except Exception as e:
+            call.error(e)
             if verbose:
-                print(f"Request failed: {str(e)}")
+                logger.error("Request failed: %s", e)
             raise
+        finally:
+            call.done()
+    
+    @staticmethod
+    def _full_url(endpoint, http_req, verbose):
+        # Construct full URL
+        full_url = f"{MHttpApiClient.BASE_URL}/{endpoint.lstrip('/')}"
+        if verbose:
+            logger.debug("[HttpApi-Send] %s", full_url)
+            logger.debug("[HttpApi-Send] %s", http_req)
+        return full_url
+    
+    @staticmethod
+    def _encrypt_request(http_req, verbose):
+        """Encrypt request payload, returns (encrypted_req, headers)"""
+        encrypted_req = HttpApiCodec.encode(http_req)
+        if verbose:
+            logger.debug("[Encrypted Request] %s", encrypted_req)
+        
+        # Set request headers
+        headers = {
+            'Content-Type': 'application/json',
+            'Accept': 'application/json'
+        }
+        return encrypted_req, headers
+    
+    @staticmethod
+    def _handle_response(response, verbose):
+        """Decrypt sync or async response"""
+        if verbose:
+            logger.debug("[HTTP Status] %s", response.status_code)
+            logger.debug("[Raw Response] %s", response.text)
+        
+        if response.status_code == 200:
+            decrypted_ret = HttpApiCodec.decode(response.text)
+            if verbose:
+                logger.debug("[Decrypted Response] %s", decrypted_ret)
+            return decrypted_ret
+        return response.text
 
 class HttpApiCodec:
     """Handles encryption/decryption for Montnets API communication"""
@@ -108,7 +166,7 @@ class HttpApiCodec:
     def encode(plain_text, hex_sec_idx=None):
         """
         Encrypts plain text using random or specified key index
-        :param plain_text: JSON payload to encrypt
+        :param plain_text: JSON payload to encrypt (str, or UTF-8 bytes/memoryview)
         :param hex_sec_idx: Optional key index in hex (01-05)
         :return: Encrypted message in hex format
         """
@@ -116,29 +174,41 @@ class HttpApiCodec:
         if hex_sec_idx is None:
             hex_sec_idx = format(random.randint(1, 5), '02X')
         
-        # Get secret key based on index
-        secret_key = HttpApiCodec.get_secret_key(hex_sec_idx)
+        # Get cached cipher for the key (key parsing/expansion done once per key)
+        cipher = get_cipher(HttpApiCodec.get_secret_key(hex_sec_idx))
         
         # Encrypt payload
-        hex_encrypted = HttpApiCodec.encrypt_text(plain_text, secret_key)
+        encrypted = cipher.encrypt(ff_pad(to_bytes(plain_text)))
         
         # Generate MAC for message integrity
-        hex_mac = HttpApiCodec.gen_mac(hex_sec_idx, secret_key, hex_encrypted)
+        hex_mac = HttpApiCodec._mac(cipher, bytes.fromhex(hex_sec_idx) + encrypted)
         
         # Calculate message length: key index (1 byte) + cipher text + MAC (8 bytes)
-        length = 1 + (len(hex_encrypted) // 2) + 8
+        length = 1 + len(encrypted) + 8
         hex_length = format(length, '04X')
         
         # Format: [length][key index][cipher text][MAC]
-        return hex_length + hex_sec_idx + hex_encrypted + hex_mac
+        return hex_length + hex_sec_idx + encrypted.hex().upper() + hex_mac
+
+    @staticmethod
+    def encode_many(plain_texts, hex_sec_idx=None):
+        """
+        Encrypts multiple payloads (each with a random key index unless one is specified)
+        :param plain_texts: Iterable of payloads (str, or UTF-8 bytes/memoryview)
+        :return: List of encrypted messages in hex format
+        """
+        return [HttpApiCodec.encode(plain_text, hex_sec_idx) for plain_text in plain_texts]
 
     @staticmethod
     def decode(hex_encoded):
         """
         Decrypts Montnets API response
-        :param hex_encoded: Encrypted response from API
+        :param hex_encoded: Encrypted response from API (str, or ASCII bytes/memoryview)
         :return: Decrypted JSON response
         """
+        if not isinstance(hex_encoded, str):
+            hex_encoded = bytes(hex_encoded).decode('ascii')
+        
         # Minimum length check (2B length + 1B index + 8B MAC = 11B = 22 hex chars)
         if len(hex_encoded) < 22:
             raise ValueError("Invalid message length")
@@ -162,18 +232,27 @@ class HttpApiCodec:
         # Parse MAC (last 16 hex chars = 8 bytes)
         hex_mac = hex_encoded[-16:]
         
-        # Parse encrypted content (middle section)
-        hex_encrypted = hex_encoded[6:-16]
+        # Parse key index + encrypted content (everything between length and MAC)
+        signed = memoryview(bytes.fromhex(hex_encoded[4:-16]))
         
         # Verify MAC integrity
-        secret_key = HttpApiCodec.SECRET_KEY_POOL[key_index]
-        computed_mac = HttpApiCodec.gen_mac(hex_sec_idx, secret_key, hex_encrypted)
+        cipher = get_cipher(HttpApiCodec.SECRET_KEY_POOL[key_index])
+        computed_mac = HttpApiCodec._mac(cipher, signed)
         
         if computed_mac != hex_mac:
             raise ValueError("MAC verification failed")
         
-        # Decrypt content
-        return HttpApiCodec.decrypt_text(hex_encrypted, secret_key)
+        # Decrypt content and remove custom 0xFF padding
+        return ff_unpad(cipher.decrypt(signed[1:])).decode('utf-8')
+
+    @staticmethod
+    def decode_many(hex_messages):
+        """
+        Decrypts multiple Montnets API responses
+        :param hex_messages: Iterable of encrypted responses
+        :return: List of decrypted responses
+        """
+        return [HttpApiCodec.decode(hex_encoded) for hex_encoded in hex_messages]
 
     @staticmethod
     def encrypt_text(plain_text, secret_key):
@@ -183,15 +262,8 @@ class HttpApiCodec:
         :param secret_key: 16-byte hex secret key
         :return: Encrypted hex string
         """
-        # Convert to bytes and add custom 0xFF padding
-        input_bytes = plain_text.encode('utf-8')
-        padded_bytes = HttpApiCodec.custom_pad(input_bytes)
-        
-        # Perform 3DES encryption
-        key_bytes = HttpApiCodec.expand_key(bytes.fromhex(secret_key))
-        cipher = DES3.new(key_bytes, DES3.MODE_ECB)
-        encrypted = cipher.encrypt(padded_bytes)
-        
+        # Add custom 0xFF padding and perform 3DES encryption
+        encrypted = get_cipher(secret_key).encrypt(ff_pad(to_bytes(plain_text)))
         return encrypted.hex().upper()
 
     @staticmethod
@@ -202,18 +274,9 @@ class HttpApiCodec:
         :param secret_key: 16-byte hex secret key
         :return: Decrypted text
         """
-        # Convert hex to bytes
-        encrypted_bytes = bytes.fromhex(hex_encrypted)
-        
-        # Perform 3DES decryption
-        key_bytes = HttpApiCodec.expand_key(bytes.fromhex(secret_key))
-        cipher = DES3.new(key_bytes, DES3.MODE_ECB)
-        decrypted = cipher.decrypt(encrypted_bytes)
-        
-        # Remove custom 0xFF padding
-        unpadded = HttpApiCodec.custom_unpad(decrypted)
-        
-        return unpadded.decode('utf-8')
+        # Perform 3DES decryption and remove custom 0xFF padding
+        decrypted = get_cipher(secret_key).decrypt(bytes.fromhex(hex_encrypted))
+        return ff_unpad(decrypted).decode('utf-8')
 
     @staticmethod
     def gen_mac(secret_idx, secret_key, hex_encrypted):
@@ -225,19 +288,17 @@ class HttpApiCodec:
         :return: MAC hex string
         """
         # Combine key index and encrypted data
-        data = secret_idx + hex_encrypted
-        input_bytes = bytes.fromhex(data)
-        
-        # Add custom padding
-        padded_bytes = HttpApiCodec.custom_pad(input_bytes)
-        
-        # Encrypt and take last 8 bytes as MAC
-        key_bytes = HttpApiCodec.expand_key(bytes.fromhex(secret_key))
-        cipher = DES3.new(key_bytes, DES3.MODE_ECB)
-        encrypted = cipher.encrypt(padded_bytes)
-        mac = encrypted[-8:]
-        
-        return mac.hex().upper()
+        return HttpApiCodec._mac(get_cipher(secret_key), bytes.fromhex(secret_idx + hex_encrypted))
+
+    @staticmethod
+    def _mac(cipher, data):
+        """
+        MAC = last 8 bytes of 3DES-ECB(custom_pad(key index + encrypted content))
+        ECB blocks are independent, so only the last padded block is encrypted
+        """
+        if not data:
+            return ""
+        return cipher.encrypt(ff_pad_last_block(data)).hex().upper()
 
     @staticmethod
     def expand_key(key_bytes):
@@ -278,15 +339,24 @@ class HttpApiCodec:
             end_index -= 1
         return data[:end_index]
 
-class MontNetAPI:
+class MontNetAPI(BatchStages):
     """MontNet API 封装类"""
     
+    vendor = "montnet"
+    range_fields = {'imsi': None}
+    validator = request_validator
+    endpoint_config = MONTNET_ENDPOINT_CONFIG
+    
     FIXED_AUTH_KEY = MHttpApiClient.FIXED_AUTH_KEY
     BASE_URL = MHttpApiClient.BASE_URL
     
     def __init__(self):
+        super().__init__()
         self.client = MHttpApiClient()
-        self.processed_count = 0
+    
+    @property
+    def base_url(self):
+        return MHttpApiClient.BASE_URL
     
     def get_endpoints(self):
         """获取所有可用的端点"""
@@ -300,165 +370,86 @@ class MontNetAPI:
         """获取端点的描述键"""
         return MHttpApiClient.get_endpoint_description_key(endpoint)
     
-    def single_request(self, endpoint, payload_dict):
-        """发送单条API请求"""
+    def single_request(self, endpoint, payload_dict, bypass_cache=False):
+        """
+        发送单条API请求
+        :param bypass_cache: 不读取响应缓存
+        """
         try:
             # 确保包含authKey
             if 'authKey' not in payload_dict:
                 payload_dict['authKey'] = MHttpApiClient.FIXED_AUTH_KEY
                 
             payload_json = json.dumps(payload_dict)
-            response = MHttpApiClient.do_encrypt_post(endpoint, payload_json, verbose=False)
+            response = query_cache.call(
+                endpoint, payload_dict, lambda: MHttpApiClient.do_encrypt_post(endpoint, payload_json, verbose=False),
+                bypass=bypass_cache)
             return response
         except Exception as e:
             return {"error": str(e)}
     
-    def batch_process(self, input_path, delay=0.5):
-        """批量处理Excel文件中的请求"""
-        # 重置处理计数
-        self.processed_count = 0
-        
-        # 读取Excel数据
-        df = pd.read_excel(input_path)
-        
-        # 扩展IMSI范围
-        expanded_df = self.expand_imsi_ranges(df)
-        
-        # 准备结果目录
-        log_dir = os.path.join(os.path.dirname(input_path), "Log")
-        os.makedirs(log_dir, exist_ok=True)
-        
-        # 生成输出文件名
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        output_path = os.path.join(log_dir, f"{timestamp}.xlsx")
-        
-        # 准备结果列表
-        results = []
-        
-        # 只显示基本的开始信息
-        print(f"▶ MontNet批量处理开始: {len(expanded_df)}条请求, 间隔{delay}秒")
-        print(f"▶ 使用API: MontNet, AuthKey: {MHttpApiClient.FIXED_AUTH_KEY}")
-        
-        # 处理每个请求
-        for index, row in tqdm(expanded_df.iterrows(), total=len(expanded_df)):
-            # 构建payload - 确保使用MontNet的authKey
-            payload = {}
-            
-            # 添加非空列
-            for col in expanded_df.columns:
-                if col == "endpoint":
-                    continue
-                
-                if pd.isna(row[col]) or (isinstance(row[col], str) and row[col].strip() == ""):
-                    continue
-                
-                payload[col] = row[col]
-            
-            # 确保包含MontNet的authKey
+    def build_requests(self, rows):
+        """逐行构建 (endpoint, payload)，使用MontNet的authKey"""
+        for endpoint, payload in iter_payloads(rows):
             payload['authKey'] = MHttpApiClient.FIXED_AUTH_KEY
-            
-            # 发送请求 - 关闭详细日志
-            try:
-                payload_json = json.dumps(payload, ensure_ascii=False)
-                response = MHttpApiClient.do_encrypt_post(
-                    endpoint=row['endpoint'],
-                    http_req=payload_json,
-                    verbose=False  # 关闭详细日志输出
-                )
-                
-                # 提取响应信息
-                if isinstance(response, dict):
-                    message = response.get("message", "No message")
-                else:
-                    message = str(response)
-                
-                status = "SUCCESS"
-                response_record = str(response)
-                
-            except Exception as e:
-                error_msg = f"ERROR: {str(e)}"
-                status = "FAILED"
-                response_record = error_msg
-            
-            # 记录结果
-            results.append({
-                "Endpoint": row['endpoint'],
-                "JSON": json.dumps(payload, ensure_ascii=False),
-                "Response": response_record,
-                "Status": status
-            })
-            
-            # 增加处理计数
-            self.processed_count += 1
-            
-            time.sleep(delay)
-        
-        # 计算统计信息
-        success_count = sum(1 for r in results if r["Status"] == "SUCCESS")
-        failed_count = sum(1 for r in results if r["Status"] == "FAILED")
-        
-        # 只显示最终统计信息
-        print(f"✅ MontNet批量处理完成!")
-        print(f"   成功: {success_count}条")
-        print(f"   失败: {failed_count}条")
-        print(f"   结果文件: {output_path}")
-        
-        # 保存结果
-        result_df = pd.DataFrame(results, columns=["Endpoint", "JSON", "Response", "Status"])
-        
-        # 使用ExcelWriter确保正确关闭文件
-        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-            result_df.to_excel(writer, index=False, sheet_name='Results')
-            
-            # 添加摘要信息
-            summary_data = {
-                '总请求数': [len(expanded_df)],
-                '成功数': [success_count],
-                '失败数': [failed_count],
-                '处理时间': [datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
-                '使用的API': ['MontNet'],
-                'Base URL': [MHttpApiClient.BASE_URL]
-            }
-            summary_df = pd.DataFrame(summary_data)
-            summary_df.to_excel(writer, index=False, sheet_name='Summary')
-        
-        return output_path
+            yield endpoint, payload
+    
+    def log_batch_start(self, rows):
+        logger.info("▶ 使用API: MontNet, AuthKey: %s", mask_secret(MHttpApiClient.FIXED_AUTH_KEY))
+    
+    def batch_summary(self, rows):
+        return {
+            '使用的API': ['MontNet'],
+            'Base URL': [MHttpApiClient.BASE_URL]
+        }
+    
+    def _interrupted_batch_record(self, item):
+        """请求发送期间中断时该行的结果记录"""
+        return {
+            **self.request_record(item),
+            "Response": INTERRUPTED_RESPONSE,
+            "Status": "FAILED"
+        }
+    
+    def _send_batch_request(self, item):
+        """发送批量中的单条请求（关闭详细日志），返回结果记录"""
+        endpoint, payload = item
+        try:
+            response = query_cache.call(endpoint, payload, lambda: MHttpApiClient.do_encrypt_post(
+                endpoint=endpoint,
+                http_req=json.dumps(payload, ensure_ascii=False),
+                verbose=False  # 关闭详细日志输出
+            ), bypass=self.bypass_cache)
+        except Exception as e:
+            return self._batch_record(endpoint, payload, error=e)
+        return self._batch_record(endpoint, payload, response)
+    
+    async def _send_batch_request_async(self, item):
+        """_send_batch_request的异步版本"""
+        endpoint, payload = item
+        try:
+            response = await query_cache.call_async(endpoint, payload, lambda: MHttpApiClient.do_encrypt_post_async(
+                endpoint=endpoint,
+                http_req=json.dumps(payload, ensure_ascii=False),
+                verbose=False
+            ), bypass=self.bypass_cache)
+        except Exception as e:
+            return self._batch_record(endpoint, payload, error=e)
+        return self._batch_record(endpoint, payload, response)
     
     @staticmethod
-    def expand_imsi_ranges(df):
-        """扩展IMSI范围"""
-        expanded_rows = []
-        range_column = None
-        
-        # 查找IMSI列
-        for col in df.columns:
-            if "imsi" in col.lower():
-                range_column = col
-                break
-        
-        if range_column is None:
-            return df
-        
-        # 处理每一行
-        for index, row in df.iterrows():
-            imsi_value = row[range_column]
-            
-            # 检查是否为范围格式
-            if isinstance(imsi_value, str) and re.match(r'^\d+-\d+$', imsi_value.strip()):
-                try:
-                    start, end = map(int, imsi_value.split('-'))
-                    
-                    # 为范围内的每个IMSI创建新行
-                    for imsi in range(start, end + 1):
-                        new_row = row.copy()
-                        new_row[range_column] = str(imsi)
-                        expanded_rows.append(new_row)
-                    
-                    continue
-                except Exception as e:
-                    print(f"Error expanding IMSI range: {str(e)}")
-            
-            # 非范围值直接添加
-            expanded_rows.append(row)
-        
-        return pd.DataFrame(expanded_rows)
\ No newline at end of file
+    def _batch_record(endpoint, payload, response=None, error=None):
+        """由响应或异常生成结果记录"""
+        if error is None:
+            status = "SUCCESS"
+            response_record = str(response)
+        else:
+            status = "FAILED"
+            response_record = f"ERROR: {str(error)}"
+        
+        return {
+            "Endpoint": endpoint,
+            "JSON": json.dumps(payload, ensure_ascii=False),
+            "Response": response_record,
+            "Status": status
+        }
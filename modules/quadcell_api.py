@@ -1,24 +1,35 @@
-import requests
 import json
 import random
-import pandas as pd
-import time
 import os
-import re
 from datetime import datetime
-from Crypto.Cipher import DES3
-from Crypto.Util.Padding import pad, unpad
-from tqdm import tqdm
+from modules.http_transport import base_url_for, get_transport, idempotency_of
+from modules.async_transport import get_async_transport
+from modules.des3_codec import ff_pad, ff_unpad, get_cipher, to_bytes
+from modules.batch_pipeline import BatchPipeline, BatchStages
+from modules.batch_rows import iter_payloads
+from modules.batch_checkpoint import INTERRUPTED_RESPONSE
+from modules.app_logging import mask_secret, vendor_logger
+from modules.metrics import vendor_call
+from modules.request_validation import EndpointValidator
+from modules.response_cache import VendorResponseCache
 from config.quadcell_config import QUADCELL_ENDPOINT_CONFIG, QUADCELL_ENDPOINT_DESCRIPTIONS
 
+logger = vendor_logger("quadcell")
+codec_logger = vendor_logger("quadcell", "codec")
+
+# 查询类端点的响应缓存（单条和批量请求共用）
+query_cache = VendorResponseCache("quadcell", QUADCELL_ENDPOINT_CONFIG)
+# 由端点配置编译的参数校验器（单条和批量请求共用）
+request_validator = EndpointValidator("quadcell", QUADCELL_ENDPOINT_CONFIG)
+
 class HttpApiClient:
     """
     HTTP API Client for Quadcell VMS Integration
     Handles encrypted communication with Quadcell API
     """
     
-    # Fixed base URL
-    BASE_URL = "https://srservice.quadcell.com/qccl/v2"
+    # Fixed base URL (QUADCELL_BASE_URL environment variable overrides it, e.g. for the mock server)
+    BASE_URL = base_url_for("quadcell", "https://srservice.quadcell.com/qccl/v2")
     # BASE_URL = "https://apiv2.imc-networks.com.hk/qccl/v2" ## UAT
     # BASE_URL = "http://api.quadcell.com:8080/v2" ## SaiYun
 
@@ -49,65 +60,116 @@ class HttpApiClient:
         :param suppress_decrypt_logs: Whether to suppress decryption debug logs
         :return: Decrypted JSON response or raw response for non-200 status
         """
-        # Construct full URL
-        full_url = f"{HttpApiClient.BASE_URL}/{endpoint.lstrip('/')}"
-        if verbose:
-            print(f"[HttpApi-Send] {full_url}")
-            print(f"[HttpApi-Send] {http_req}")
-        
+        full_url = HttpApiClient._full_url(endpoint, http_req, verbose)
+        call = vendor_call("quadcell", endpoint)
         try:
-            # Encrypt request payload using fixed key index '05'
-            encrypted_req = HttpApiCodec.encode(http_req, hex_sec_idx='05')
-            if verbose:
-                print(f"[Encrypted Request] {encrypted_req}")
-            
-            # Set request headers
-            headers = {
-                'Content-Type': 'application/json',
-                'Accept': 'application/json'
-            }
-            
-            # Send HTTP POST request
-            response = requests.post(
-                full_url, 
-                data=encrypted_req, 
-                headers=headers,
-                timeout=30
-            )
+            with call.phase("encode"):
+                encrypted_req, headers = HttpApiClient._encrypt_request(http_req, verbose)
             
+            # Send HTTP POST request (pooled keep-alive connection)
+            with call.phase("network"):
+                response = get_transport("quadcell").post(
+                    full_url, 
+                    idempotency=idempotency_of(QUADCELL_ENDPOINT_CONFIG, endpoint),
+                    data=encrypted_req, 
+                    headers=headers
+                )
+            call.response(response)
+            with call.phase("decode"):
+                return HttpApiClient._handle_response(response, verbose, suppress_decrypt_logs)
+        
+        except Exception as e:
+            call.error(e)
             if verbose:
-                print(f"[HTTP Status] {response.status_code}")
-                print(f"[Raw Response] {response.text}")
-            
-            # Handle response - support both encrypted and plaintext responses
-            if response.status_code == 200:
-                # First try to parse as JSON (plaintext error responses)
-                try:
-                    json_response = response.json()
-                    if verbose:
-                        print(f"[API Plaintext Response] {json_response}")
-                    return json_response
-                except:
-                    # If not JSON, try to decrypt using fixed key index
-                    try:
-                        decrypted_ret = HttpApiCodec.decode(
-                            response.text, 
-                            force_key_idx=0,
-                            verbose=not suppress_decrypt_logs  # Control debug logs
-                        )
-                        if verbose:
-                            print(f"[Decrypted Response] {decrypted_ret}")
-                        return decrypted_ret
-                    except Exception as e:
-                        if verbose:
-                            print(f"Decryption failed but returning raw response: {str(e)}")
-                        return response.text
-            return response.text
+                logger.error("Request failed: %s", e)
+            raise
+        finally:
+            call.done()
+    
+    @staticmethod
+    async def do_encrypt_post_async(endpoint, http_req, verbose=True, suppress_decrypt_logs=False):
+        """
+        Async version of do_encrypt_post (aiohttp), same encryption and response handling
+        :return: Decrypted JSON response or raw response for non-200 status
+        """
+        full_url = HttpApiClient._full_url(endpoint, http_req, verbose)
+        call = vendor_call("quadcell", endpoint)
+        try:
+            with call.phase("encode"):
+                encrypted_req, headers = HttpApiClient._encrypt_request(http_req, verbose)
+            with call.phase("network"):
+                response = await get_async_transport("quadcell").post(
+                    full_url,
+                    idempotency=idempotency_of(QUADCELL_ENDPOINT_CONFIG, endpoint),
+                    data=encrypted_req,
+                    headers=headers
+                )
+            call.response(response)
+            with call.phase("decode"):
+                return HttpApiClient._handle_response(response, verbose, suppress_decrypt_logs)
         
         except Exception as e:
+            call.error(e)
             if verbose:
-                print(f"Request failed: {str(e)}")
+                logger.error("Request failed: %s", e)
             raise
+        finally:
+            call.done()
+    
+    @staticmethod
+    def _full_url(endpoint, http_req, verbose):
+        # Construct full URL
+        full_url = f"{HttpApiClient.BASE_URL}/{endpoint.lstrip('/')}"
+        if verbose:
+            logger.debug("[HttpApi-Send] %s", full_url)
+            logger.debug("[HttpApi-Send] %s", http_req)
+        return full_url
+    
+    @staticmethod
+    def _encrypt_request(http_req, verbose):
+        """Encrypt request payload, returns (encrypted_req, headers)"""
+        # Encrypt request payload using fixed key index '05'
+        encrypted_req = HttpApiCodec.encode(http_req, hex_sec_idx='05')
+        if verbose:
+            logger.debug("[Encrypted Request] %s", encrypted_req)
+        
+        # Set request headers
+        headers = {
+            'Content-Type': 'application/json',
+            'Accept': 'application/json'
+        }
+        return encrypted_req, headers
+    
+    @staticmethod
+    def _handle_response(response, verbose, suppress_decrypt_logs):
+        """Parse sync or async response - support both encrypted and plaintext responses"""
+        if verbose:
+            logger.debug("[HTTP Status] %s", response.status_code)
+            logger.debug("[Raw Response] %s", response.text)
+        
+        if response.status_code == 200:
+            # First try to parse as JSON (plaintext error responses)
+            try:
+                json_response = response.json()
+                if verbose:
+                    logger.debug("[API Plaintext Response] %s", json_response)
+                return json_response
+            except:
+                # If not JSON, try to decrypt using fixed key index
+                try:
+                    decrypted_ret = HttpApiCodec.decode(
+                        response.text, 
+                        force_key_idx=0,
+                        verbose=not suppress_decrypt_logs  # Control debug logs
+                    )
+                    if verbose:
+                        logger.debug("[Decrypted Response] %s", decrypted_ret)
+                    return decrypted_ret
+                except Exception as e:
+                    if verbose:
+                        logger.warning("Decryption failed but returning raw response: %s", e)
+                    return response.text
+        return response.text
 
 class HttpApiCodec:
     """Handles encryption/decryption for Quadcell API communication"""
@@ -125,7 +187,7 @@ class HttpApiCodec:
     def encode(plain_text, hex_sec_idx=None):
         """
         Encrypts plain text using specified key index
-        :param plain_text: JSON payload to encrypt
+        :param plain_text: JSON payload to encrypt (str, or UTF-8 bytes/memoryview)
         :param hex_sec_idx: Optional key index in hex (01-05)
         :return: Encrypted message in hex format
         """
@@ -133,30 +195,16 @@ class HttpApiCodec:
         if hex_sec_idx is None:
             hex_sec_idx = '01'
         
-        # Get secret key
-        secret_key = HttpApiCodec.get_secret_key(hex_sec_idx)
-        key_bytes = HttpApiCodec.expand_key(bytes.fromhex(secret_key))
-        
-        # Step 1: Convert JSON to HEX
-        hex_data = plain_text.encode('utf-8').hex().upper()
+        # Get cached cipher for the key (key parsing/expansion done once per key)
+        cipher = get_cipher(HttpApiCodec.get_secret_key(hex_sec_idx))
         
-        # Step 2: Apply custom padding
-        data_bytes = bytes.fromhex(hex_data)
-        padded_data = HttpApiCodec.custom_pad(data_bytes)
-        
-        # Step 3: 3DES-ECB encryption
-        cipher = DES3.new(key_bytes, DES3.MODE_ECB)
-        encrypted_body = cipher.encrypt(padded_data)
-        hex_encrypted = encrypted_body.hex().upper()
+        # Step 1-3: Apply custom padding and 3DES-ECB encryption
+        encrypted_body = cipher.encrypt(ff_pad(to_bytes(plain_text)))
         
         # Step 4: Generate MAC
-        # Take last byte of encrypted body
-        last_byte = encrypted_body[-1:]
-        # Create MAC block: last_byte + 7 * 0xFF
-        mac_block = last_byte + b'\xFF' * 7
-        cipher_mac = DES3.new(key_bytes, DES3.MODE_ECB)
-        encrypted_mac = cipher_mac.encrypt(mac_block)
-        hex_mac = encrypted_mac.hex().lower()  # Note: MAC is lowercase in examples
+        # Create MAC block: last byte of encrypted body + 7 * 0xFF
+        mac_block = encrypted_body[-1:] + b'\xFF' * 7
+        hex_mac = cipher.encrypt(mac_block).hex()  # Note: MAC is lowercase in examples
         
         # Step 5: Prepare Header
         # Calculate total length = 1 (key ID) + len(encrypted_body) + 8 (MAC)
@@ -164,17 +212,29 @@ class HttpApiCodec:
         hex_length = format(total_len, '04X')  # 2-byte length
         
         # Step 6: Combine all components
-        return hex_length + hex_sec_idx + hex_encrypted + hex_mac
+        return hex_length + hex_sec_idx + encrypted_body.hex().upper() + hex_mac
+
+    @staticmethod
+    def encode_many(plain_texts, hex_sec_idx=None):
+        """
+        Encrypts multiple payloads with the same key index
+        :param plain_texts: Iterable of payloads (str, or UTF-8 bytes/memoryview)
+        :return: List of encrypted messages in hex format
+        """
+        return [HttpApiCodec.encode(plain_text, hex_sec_idx) for plain_text in plain_texts]
 
     @staticmethod
     def decode(hex_encoded, force_key_idx=None, verbose=True):
         """
         Decrypts Quadcell API response
-        :param hex_encoded: Encrypted response from API
+        :param hex_encoded: Encrypted response from API (str, or ASCII bytes/memoryview)
         :param force_key_idx: Force specific key index (0-4) for decryption
         :param verbose: Whether to print debug information during decryption
         :return: Decrypted JSON response
         """
+        if not isinstance(hex_encoded, str):
+            hex_encoded = bytes(hex_encoded).decode('ascii')
+        
         # Handle plaintext JSON responses directly
         if hex_encoded.strip().startswith("{"):
             try:
@@ -202,16 +262,16 @@ class HttpApiCodec:
         if force_key_idx is not None:
             key_index = force_key_idx
             if verbose:
-                print(f"⚠️ Using forced key index: {key_index} (ignoring header index {hex_sec_idx})")
+                codec_logger.debug("⚠️ Using forced key index: %s (ignoring header index %s)", key_index, hex_sec_idx)
         else:
             key_index = int(hex_sec_idx, 16) - 1
         
         if key_index < 0 or key_index > 4:
             raise ValueError(f"Invalid key index: {key_index + 1}")
         
-        # Get secret key
+        # Get cached cipher for the key
         secret_key = HttpApiCodec.SECRET_KEY_POOL[key_index]
-        key_bytes = HttpApiCodec.expand_key(bytes.fromhex(secret_key))
+        cipher = get_cipher(secret_key)
         
         # Parse encrypted body and MAC
         # MAC is last 16 characters (8 bytes)
@@ -221,39 +281,37 @@ class HttpApiCodec:
         encrypted_bytes = bytes.fromhex(hex_encrypted)
         
         # Verify MAC
-        # Take last byte of encrypted body
-        last_byte = encrypted_bytes[-1:]
-        # Create MAC block: last_byte + 7 * 0xFF
-        mac_block = last_byte + b'\xFF' * 7
-        cipher_mac = DES3.new(key_bytes, DES3.MODE_ECB)
-        computed_mac = cipher_mac.encrypt(mac_block).hex().lower()
+        # Create MAC block: last byte of encrypted body + 7 * 0xFF
+        mac_block = encrypted_bytes[-1:] + b'\xFF' * 7
+        computed_mac = cipher.encrypt(mac_block).hex()
         
-        # Print debug info only if verbose
+        # Debug info only if verbose (key material is never logged, only the key index)
         if verbose:
-            print(f"Computed MAC: {computed_mac}")
-            print(f"Received MAC: {hex_mac}")
-            print(f"Key used: {secret_key}")
-            print(f"Key index: {key_index}")
-            print(f"Encrypted body: {hex_encrypted}")
+            codec_logger.debug("Computed MAC: %s, received MAC: %s, key index: %s, encrypted body: %s",
+                               computed_mac, hex_mac, key_index, hex_encrypted)
         
         if computed_mac != hex_mac:
             raise ValueError("MAC verification failed")
         
-        # Decrypt content
-        cipher = DES3.new(key_bytes, DES3.MODE_ECB)
-        decrypted = cipher.decrypt(encrypted_bytes)
+        # Decrypt content and remove padding
+        unpadded = ff_unpad(cipher.decrypt(encrypted_bytes))
         
-        # Remove padding
-        unpadded = HttpApiCodec.custom_unpad(decrypted)
-        
-        # Convert HEX back to original JSON
+        # Convert back to original JSON
         try:
-            # Convert HEX back to original bytes
-            original_bytes = bytes.fromhex(unpadded.hex())
-            return original_bytes.decode('utf-8')
+            return unpadded.decode('utf-8')
         except Exception as e:
             raise ValueError(f"HEX to JSON conversion failed: {str(e)}")
 
+    @staticmethod
+    def decode_many(hex_messages, force_key_idx=None, verbose=False):
+        """
+        Decrypts multiple Quadcell API responses
+        :param hex_messages: Iterable of encrypted responses
+        :return: List of decrypted responses
+        """
+        return [HttpApiCodec.decode(hex_encoded, force_key_idx=force_key_idx, verbose=verbose)
+                for hex_encoded in hex_messages]
+
     @staticmethod
     def expand_key(key_bytes):
         """Expands 16-byte key to 24-byte 3DES key (K1 + K2 + K1)"""
@@ -284,11 +342,13 @@ class HttpApiCodec:
             end_index -= 1
         return data[:end_index]
 
-class QuadcellAPI:
+class QuadcellAPI(BatchStages):
     """Quadcell API 封装类"""
     
+    vendor = "quadcell"
+    
     # Fixed base URL
-    BASE_URL = "https://srservice.quadcell.com/qccl/v2"
+    BASE_URL = HttpApiClient.BASE_URL
     
     # Default authKey
     DEFAULT_AUTH_KEY = "SYtest21"
@@ -296,6 +356,19 @@ class QuadcellAPI:
     # 公司映射文件路径
     COMPANY_MAPPINGS_FILE = "config/company_mappings.json"
     
+    # 批量处理时需要保持为字符串类型的字段
+    string_fields = ['packCode', 'imsi', 'iccid', 'msisdn', 'extOrderId', 'remark']
+    
+    # 批量处理时展开的范围字段及其最大长度
+    range_fields = {
+        'imsi': None,  # 长度不固定
+        'iccid': 20,   # 最多20位
+        'msisdn': 15   # 最多15位
+    }
+    skip_columns = ("endpoint", "QC packCode")
+    validator = request_validator
+    endpoint_config = QUADCELL_ENDPOINT_CONFIG
+    
     def get_endpoint_params(self, endpoint):
         """获取指定端点的参数信息"""
         return HttpApiClient.get_endpoint_params(endpoint)
@@ -350,11 +423,19 @@ class QuadcellAPI:
         return self.client.get_endpoint_params(endpoint)
     
     def __init__(self):
+        super().__init__()
         self.client = HttpApiClient()
-        self.processed_count = 0
+        self.company_name = None
+    
+    @property
+    def base_url(self):
+        return self.client.BASE_URL
     
-    def single_request(self, endpoint, payload_dict, debug=False):
-        """發送單條API請求，支持調試模式"""
+    def single_request(self, endpoint, payload_dict, debug=False, bypass_cache=False):
+        """
+        發送單條API請求，支持調試模式
+        :param bypass_cache: 不讀取響應緩存（調試模式總是實際發送）
+        """
         try:
             payload_json = json.dumps(payload_dict, ensure_ascii=False)
             
@@ -375,12 +456,12 @@ class QuadcellAPI:
                     encrypted_req = f"加密失敗: {str(e)}"
                 
                 # 正常發送請求
-                response = self.client.do_encrypt_post(
+                response = query_cache.call(endpoint, payload_dict, lambda: self.client.do_encrypt_post(
                     endpoint, 
                     payload_json, 
                     verbose=False,
                     suppress_decrypt_logs=True
-                )
+                ), bypass=True)
                 
                 # 嘗試獲取加密後的響應（如果有的話）
                 # 注意：實際響應可能已經是解密的，我們需要原始響應
@@ -402,12 +483,12 @@ class QuadcellAPI:
                 
             else:
                 # 正常模式
-                response = self.client.do_encrypt_post(
+                response = query_cache.call(endpoint, payload_dict, lambda: self.client.do_encrypt_post(
                     endpoint, 
                     payload_json, 
                     verbose=False,
                     suppress_decrypt_logs=True
-                )
+                ), bypass=bypass_cache)
                 return response
                 
         except Exception as e:
@@ -422,197 +503,101 @@ class QuadcellAPI:
             else:
                 return {"error": str(e)}
     
-    def batch_process(self, input_path, delay=0.5, company_name=None):
-        """批量处理Excel文件中的请求"""
-        # 重置处理计数
-        self.processed_count = 0
-        
-        # 根据优先级确定authKey
-        default_auth_key = self.DEFAULT_AUTH_KEY
-        company_auth_key = self.get_company_authkey(company_name) if company_name else None
-        
-        # 读取Excel数据
-        df = pd.read_excel(input_path)
-        
-        # 检查Excel中是否有authKey列
-        has_authkey_in_excel = any(col.lower() == 'authkey' for col in df.columns)
-        
-        # 扩展IMSI、ICCID和MSISDN范围
-        expanded_df = self.expand_sim_ranges(df)
-        
-        # 准备结果目录
-        log_dir = os.path.join(os.path.dirname(input_path), "Log")
-        os.makedirs(log_dir, exist_ok=True)
-        
-        # 生成输出文件名
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        output_path = os.path.join(log_dir, f"{timestamp}.xlsx")
-        
-        # 准备结果列表
-        results = []
-        
-        print(f"▶ Processing {len(expanded_df)} requests with {delay}s delay...")
-        if company_name:
-            print(f"▶ Using authKey from company: {company_name}")
-        elif has_authkey_in_excel:
-            print("▶ Using authKey from Excel file")
-        else:
-            print(f"▶ Using default authKey: {default_auth_key}")
-        
-        # 处理每个请求
-        for index, row in tqdm(expanded_df.iterrows(), total=len(expanded_df)):
-            # 构建payload
-            payload = {}
-            
-            # 定义需要保持为字符串类型的字段
-            string_fields = ['packCode', 'imsi', 'iccid', 'msisdn', 'extOrderId', 'remark']
-            
-            # 添加非空列
-            for col in expanded_df.columns:
-                if col == "endpoint" or col == "QC packCode":
-                    continue
-                
-                if pd.isna(row[col]) or (isinstance(row[col], str) and row[col].strip() == ""):
-                    continue
-                
-                # 特殊处理：确保特定字段作为字符串发送
-                if col.lower() in [field.lower() for field in string_fields]:
-                    # 确保转换为字符串，同时去除可能的空格
-                    val = row[col]
-                    if isinstance(val, (int, float)):
-                        # 对于数值类型，转换为字符串但不保留小数位（如果原本是整数）
-                        if isinstance(val, float) and val.is_integer():
-                            val = str(int(val))
-                        else:
-                            val = str(val)
-                    else:
-                        val = str(val).strip()
-                    payload[col] = val
-                else:
-                    payload[col] = row[col]
-            
-            # 根据优先级设置authKey
+    def batch_process(self, input_path, delay=0.5, company_name=None, max_workers=1, rate_limit=None,
+                      resume_run_id=None, async_io=False, adaptive=False, bypass_cache=False, retry_failed=False):
+        """
+        批量处理Excel文件中的请求，参数同BatchStages.batch_process
+        :param company_name: 使用该公司映射的authKey（优先于Excel中的authKey列和默认authKey；重试时沿用原请求中的authKey）
+        """
+        self.company_name = company_name
+        params = {'delay': delay, 'company_name': company_name,
+                  'max_workers': max_workers, 'rate_limit': rate_limit, 'async_io': async_io,
+                  'adaptive': adaptive, 'bypass_cache': bypass_cache, 'retry_failed': retry_failed}
+        return BatchPipeline(self).run(input_path, params, resume_run_id)
+    
+    @staticmethod
+    def _has_authkey_column(rows):
+        """Excel中是否有authKey列"""
+        return any(str(col).lower() == 'authkey' for col in rows.columns)
+    
+    def build_requests(self, rows):
+        """逐行构建 (endpoint, payload)，按优先级设置authKey"""
+        company_auth_key = self.get_company_authkey(self.company_name) if self.company_name else None
+        has_authkey_in_excel = self._has_authkey_column(rows)
+        for endpoint, payload in iter_payloads(rows, skip_columns=self.skip_columns):
             if company_auth_key:
                 # 优先级1: 使用公司映射的authKey
                 payload["authKey"] = company_auth_key
             elif "authKey" not in payload and not has_authkey_in_excel:
                 # 优先级3: 使用默认authKey (优先级2在Excel中已有authKey时自动使用)
-                payload["authKey"] = default_auth_key
-            
-            # 发送请求
-            try:
-                response = self.client.do_encrypt_post(
-                    endpoint=row['endpoint'],
-                    http_req=json.dumps(payload, ensure_ascii=False),
-                    verbose=False,
-                    suppress_decrypt_logs=True
-                )
-                
-                # 提取响应信息
-                if isinstance(response, dict):
-                    message = response.get("message", "No message")
-                else:
-                    message = str(response)
-                
-                status = "SUCCESS"
-                response_record = str(response)
-                
-            except Exception as e:
-                error_msg = f"ERROR: {str(e)}"
-                status = "FAILED"
-                response_record = error_msg
-            
-            # 记录结果
-            results.append({
-                "Endpoint": row['endpoint'],
-                "JSON": json.dumps(payload, ensure_ascii=False),
-                "Response": response_record,
-                "Status": status
-            })
-            
-            # 增加处理计数
-            self.processed_count += 1
+                payload["authKey"] = self.DEFAULT_AUTH_KEY
             
-            time.sleep(delay)
-        
-        # 保存结果
-        result_df = pd.DataFrame(results, columns=["Endpoint", "JSON", "Response", "Status"])
-        
-        # 使用ExcelWriter确保正确关闭文件
-        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-            result_df.to_excel(writer, index=False, sheet_name='Results')
-            
-            # 添加摘要信息
-            summary_data = {
-                '总请求数': [len(expanded_df)],
-                '成功数': [sum(1 for r in results if r["Status"] == "SUCCESS")],
-                '失败数': [sum(1 for r in results if r["Status"] == "FAILED")],
-                '处理时间': [datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
-                '使用的AuthKey来源': [f"公司: {company_name}" if company_name else 
-                                ("Excel文件" if has_authkey_in_excel else "默认值")]
-            }
-            summary_df = pd.DataFrame(summary_data)
-            summary_df.to_excel(writer, index=False, sheet_name='Summary')
-        
-        return output_path
+            yield endpoint, payload
+    
+    def log_batch_start(self, rows):
+        if self.company_name:
+            logger.info("▶ Using authKey from company: %s", self.company_name)
+        elif self._has_authkey_column(rows):
+            logger.info("▶ Using authKey from Excel file")
+        else:
+            logger.info("▶ Using default authKey: %s", mask_secret(self.DEFAULT_AUTH_KEY))
+    
+    def batch_summary(self, rows):
+        return {
+            '使用的AuthKey来源': [f"公司: {self.company_name}" if self.company_name else
+                            ("Excel文件" if self._has_authkey_column(rows) else "默认值")]
+        }
+    
+    def _interrupted_batch_record(self, item):
+        """请求发送期间中断时该行的结果记录"""
+        return {
+            **self.request_record(item),
+            "Response": INTERRUPTED_RESPONSE,
+            "Status": "FAILED"
+        }
+    
+    def _send_batch_request(self, item):
+        """发送批量中的单条请求，返回结果记录"""
+        endpoint, payload = item
+        try:
+            response = query_cache.call(endpoint, payload, lambda: self.client.do_encrypt_post(
+                endpoint=endpoint,
+                http_req=json.dumps(payload, ensure_ascii=False),
+                verbose=False,
+                suppress_decrypt_logs=True
+            ), bypass=self.bypass_cache)
+        except Exception as e:
+            return self._batch_record(endpoint, payload, error=e)
+        return self._batch_record(endpoint, payload, response)
+    
+    async def _send_batch_request_async(self, item):
+        """_send_batch_request的异步版本"""
+        endpoint, payload = item
+        try:
+            response = await query_cache.call_async(endpoint, payload, lambda: self.client.do_encrypt_post_async(
+                endpoint=endpoint,
+                http_req=json.dumps(payload, ensure_ascii=False),
+                verbose=False,
+                suppress_decrypt_logs=True
+            ), bypass=self.bypass_cache)
+        except Exception as e:
+            return self._batch_record(endpoint, payload, error=e)
+        return self._batch_record(endpoint, payload, response)
     
     @staticmethod
-    def expand_sim_ranges(df):
-        """扩展IMSI、ICCID和MSISDN范围"""
-        expanded_rows = []
-        
-        # 定义需要检查的范围字段及其最大长度
-        range_columns = {
-            'imsi': None,  # 长度不固定
-            'iccid': 20,   # 最多20位
-            'msisdn': 15   # 最多15位
+    def _batch_record(endpoint, payload, response=None, error=None):
+        """由响应或异常生成结果记录"""
+        if error is None:
+            status = "SUCCESS"
+            response_record = str(response)
+        else:
+            status = "FAILED"
+            response_record = f"ERROR: {str(error)}"
+        
+        return {
+            "Endpoint": endpoint,
+            "JSON": json.dumps(payload, ensure_ascii=False),
+            "Response": response_record,
+            "Status": status
         }
-        
-        # 查找数据框中存在的范围字段
-        found_range_columns = {}
-        for col_name in range_columns.keys():
-            for df_col in df.columns:
-                if col_name in df_col.lower():
-                    found_range_columns[col_name] = df_col
-                    break
-        
-        # 如果没有找到任何范围字段，直接返回原始数据框
-        if not found_range_columns:
-            return df
-        
-        # 处理每一行
-        for index, row in df.iterrows():
-            # 检查每个可能存在的范围字段
-            expanded = False
-            
-            for col_type, col_name in found_range_columns.items():
-                value = row[col_name]
-                
-                # 检查是否为范围格式 (数字-数字)
-                if isinstance(value, str) and re.match(r'^\d+-\d+$', value.strip()):
-                    try:
-                        start, end = map(int, value.split('-'))
-                        max_length = range_columns[col_type]
-                        
-                        # 为范围内的每个值创建新行
-                        for num in range(start, end + 1):
-                            new_row = row.copy()
-                            # 确保数字长度不超过最大限制
-                            num_str = str(num)
-                            if max_length and len(num_str) > max_length:
-                                print(f"Warning: {col_type} value {num_str} exceeds maximum length {max_length}")
-                                continue
-                            
-                            new_row[col_name] = num_str
-                            expanded_rows.append(new_row)
-                        
-                        expanded = True
-                        break  # 一次只处理一个范围字段
-                    except Exception as e:
-                        print(f"Error expanding {col_type} range: {str(e)}")
-            
-            # 如果没有找到范围值，直接添加原行
-            if not expanded:
-                expanded_rows.append(row)
-        
-        return pd.DataFrame(expanded_rows)
\ No newline at end of file
+    
@@ -0,0 +1,247 @@
+import json
+import numpy as np
+import pandas as pd
+
+# 按端点配置（required、type、fields）校验请求参数，发送前拒绝缺少必填参数或类型错误的请求
+# 批量文件按列向量化校验，单条请求校验表单参数；只检查配置中声明的参数，其他列原样发送
+
+# 数值类型: 是否必须为整数
+NUMERIC_TYPES = {"int": True, "integer": True, "number": False}
+
+# 批量校验报告最多保留的错误行数（总错误行数另行统计）
+MAX_REPORTED_ROWS = 1000
+
+
+class BatchValidationError(ValueError):
+    """批量文件校验失败；errors为 [{"row": 行号, "endpoint": 端点, "errors": [错误信息]}]"""
+
+    def __init__(self, invalid_rows, errors):
+        self.invalid_rows = invalid_rows
+        self.errors = errors
+        preview = "; ".join(f"第{item['row']}行({item['endpoint']}): {', '.join(item['errors'])}"
+                            for item in errors[:5])
+        more = f" 等{invalid_rows}行" if invalid_rows > 5 else ""
+        super().__init__(f"文件校验失败，未发送任何请求：{preview}{more}")
+
+
+def _is_blank(value):
+    if value is None:
+        return True
+    if isinstance(value, float) and np.isnan(value):
+        return True
+    return isinstance(value, str) and not value.strip()
+
+
+def _numeric_error(name, value, integer):
+    """单个值的数值校验，返回错误信息或None"""
+    try:
+        number = float(str(value).strip())
+    except ValueError:
+        number = None
+    if number is None or np.isnan(number):
+        return f"{name} 必须为{'整数' if integer else '数字'}"
+    if integer and not number.is_integer():
+        return f"{name} 必须为整数"
+    return None
+
+
+class _ArrayRule:
+    """数组参数：值为列表或JSON数组字符串，元素为对象时按fields校验"""
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.required = [field["name"] for field in fields if field.get("required")]
+        self.numeric = {field["name"]: NUMERIC_TYPES[field.get("type")]
+                        for field in fields if field.get("type") in NUMERIC_TYPES}
+
+    def check(self, value):
+        if isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except json.JSONDecodeError:
+                value = None
+        if not isinstance(value, list):
+            return [f"{self.name} 必须为JSON数组"]
+        errors = []
+        for i, item in enumerate(value):
+            if not (self.required or self.numeric):
+                break
+            if not isinstance(item, dict):
+                errors.append(f"{self.name}[{i}] 必须为对象")
+                continue
+            for field in self.required:
+                if _is_blank(item.get(field)):
+                    errors.append(f"{self.name}[{i}] 缺少必填字段: {field}")
+            for field, integer in self.numeric.items():
+                if not _is_blank(item.get(field)):
+                    error = _numeric_error(f"{self.name}[{i}].{field}", item[field], integer)
+                    if error:
+                        errors.append(error)
+        return errors
+
+
+class _EndpointRules:
+    """单个端点编译后的规则"""
+
+    __slots__ = ("required", "numeric", "arrays")
+
+    def __init__(self, params):
+        self.required = [param["name"] for param in params if param.get("required")]
+        self.numeric = {param["name"]: NUMERIC_TYPES[param.get("type")]
+                        for param in params if param.get("type") in NUMERIC_TYPES}
+        self.arrays = {param["name"]: _ArrayRule(param["name"], param.get("fields", []))
+                       for param in params if param.get("type") == "array"}
+
+
+class _RowErrors:
+    """按行收集错误，行位置 -> [错误信息]"""
+
+    def __init__(self):
+        self.rows = {}
+
+    def add(self, positions, message):
+        for position in positions:
+            self.rows.setdefault(position, []).append(message)
+
+    def add_mask(self, mask, message):
+        """mask为按行位置对齐的布尔数组"""
+        self.add(np.flatnonzero(mask), message)
+
+
+def _normalize_endpoint(endpoint):
+    return str(endpoint).strip().strip("/")
+
+
+class _BlankMasks(dict):
+    """按需计算各列的空值掩码（缺失值或空白字符串）；号码等列重复值多，只对去重后的值判断"""
+
+    def __init__(self, df):
+        super().__init__()
+        self.df = df
+
+    def __missing__(self, col):
+        codes, values = pd.factorize(self.df[col], use_na_sentinel=True)
+        blank_values = np.fromiter((_is_blank(value) for value in values), dtype=bool, count=len(values))
+        # 缺失值的code为-1，对应追加的True
+        mask = np.append(blank_values, True)[codes]
+        self[col] = mask
+        return mask
+
+
+def _to_numbers(series):
+    """转为浮点数组，无法解析的值为NaN"""
+    codes, values = pd.factorize(series, use_na_sentinel=True)
+    numbers = pd.to_numeric(pd.Series(values, dtype="string").str.strip(), errors="coerce")
+    return np.append(numbers.to_numpy(dtype=float, na_value=np.nan), np.nan)[codes]
+
+
+class EndpointValidator:
+    """
+    由供应商端点配置一次性编译的参数校验器
+    - required: 必填参数不能缺失或为空
+    - type: int/integer必须为整数，number必须为数字，array必须为数组（元素按fields校验）
+    参数名不区分大小写匹配批量文件的列名
+    """
+
+    def __init__(self, vendor, endpoint_config):
+        self.vendor = vendor
+        self.rules = {_normalize_endpoint(endpoint): _EndpointRules(config.get("params", []))
+                      for endpoint, config in endpoint_config.items()}
+
+    def validate_payload(self, endpoint, payload):
+        """
+        校验单条请求
+        :param payload: 扁平的参数字典（Simlessly为点号分隔的参数名）
+        :return: 错误信息列表，没有错误时为空列表
+        """
+        if _is_blank(endpoint):
+            return ["缺少endpoint"]
+        rules = self.rules.get(_normalize_endpoint(endpoint))
+        if rules is None:
+            return [f"未知端点: {endpoint}"]
+        errors = []
+        for name in rules.required:
+            if _is_blank(payload.get(name)):
+                errors.append(f"缺少必填参数: {name}")
+        for name, integer in rules.numeric.items():
+            if not _is_blank(payload.get(name)):
+                error = _numeric_error(name, payload[name], integer)
+                if error:
+                    errors.append(error)
+        for name, rule in rules.arrays.items():
+            if not _is_blank(payload.get(name)):
+                errors.extend(rule.check(payload[name]))
+        return errors
+
+    def validate_frame(self, df, endpoint_column="endpoint"):
+        """
+        按列向量化校验一块批量数据（尚未规整和展开范围）
+        :return: [(行位置, 端点, [错误信息])]，行位置为df中的第几行（从0开始）
+        """
+        errors = _RowErrors()
+        columns = {str(col).lower(): col for col in df.columns}
+        blank = _BlankMasks(df)
+        # 按不同的端点值分组，只对去重后的端点值做规整
+        codes, values = pd.factorize(df[endpoint_column], use_na_sentinel=False)
+        groups = {}
+        for code, value in enumerate(values):
+            endpoint = "" if _is_blank(value) else _normalize_endpoint(value)
+            groups.setdefault(endpoint, []).append(code)
+
+        for endpoint, group_codes in groups.items():
+            in_endpoint = np.isin(codes, group_codes)
+            if not endpoint:
+                errors.add_mask(in_endpoint, "缺少endpoint")
+                continue
+            rules = self.rules.get(endpoint)
+            if rules is None:
+                errors.add_mask(in_endpoint, f"未知端点: {endpoint}")
+                continue
+
+            for name in rules.required:
+                col = columns.get(name.lower())
+                missing = in_endpoint if col is None else in_endpoint & blank[col]
+                errors.add_mask(missing, f"缺少必填参数: {name}")
+
+            for name, integer in rules.numeric.items():
+                col = columns.get(name.lower())
+                if col is None:
+                    continue
+                present = in_endpoint & ~blank[col]
+                if not present.any():
+                    continue
+                positions = np.flatnonzero(present)
+                numbers = _to_numbers(df[col].iloc[positions])
+                bad = np.isnan(numbers)
+                errors.add(positions[bad], f"{name} 必须为{'整数' if integer else '数字'}")
+                if integer:
+                    errors.add(positions[~bad & (np.mod(numbers, 1) != 0)], f"{name} 必须为整数")
+
+            # 数组参数逐个解析（批量文件中为JSON字符串，极少使用）
+            for name, rule in rules.arrays.items():
+                col = columns.get(name.lower())
+                if col is None:
+                    continue
+                for position in np.flatnonzero(in_endpoint & ~blank[col]):
+                    for message in rule.check(df[col].iat[position]):
+                        errors.add([position], message)
+
+        raw_endpoints = df[endpoint_column]
+        return [(int(position), "" if _is_blank(raw_endpoints.iat[position]) else str(raw_endpoints.iat[position]).strip(),
+                 messages) for position, messages in sorted(errors.rows.items())]
+
+    def validate_source(self, source, endpoint_column="endpoint"):
+        """
+        逐块校验整个批量文件
+        :param source: BatchFileReader（块的索引为数据行序号，+2即表格中的行号）
+        :raises BatchValidationError: 有错误行时抛出
+        """
+        invalid_rows = 0
+        report = []
+        for chunk in source:
+            for position, endpoint, messages in self.validate_frame(chunk, endpoint_column):
+                invalid_rows += 1
+                if len(report) < MAX_REPORTED_ROWS:
+                    report.append({"row": int(chunk.index[position]) + 2, "endpoint": endpoint, "errors": messages})
+        if invalid_rows:
+            raise BatchValidationError(invalid_rows, report)
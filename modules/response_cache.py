@@ -0,0 +1,285 @@
+import copy
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from config.cache_config import RESPONSE_CACHE_CONFIG
+from modules.http_transport import MUTATING, QUERY, idempotency_of, record_status
+from modules.metrics import registry
+
+# 查询类端点的读穿透缓存：未命中时发送请求并缓存成功（HTTP 200且不是错误）的响应，修改类请求使相同号码的缓存失效
+
+cache_lookups = registry.counter(
+    "response_cache_lookups_total", "Response cache lookups (hit, miss or bypass)", ("vendor", "endpoint", "result"))
+cache_invalidations = registry.counter(
+    "response_cache_invalidations_total", "Cached responses removed by mutating requests", ("vendor",))
+
+
+def _normalize(value):
+    """规整参数值：字符串去除首尾空白，数值转为字符串（整数值的浮点数不保留小数位），空值去掉"""
+    if isinstance(value, dict):
+        items = ((str(k), _normalize(v)) for k, v in value.items())
+        return {k: v for k, v in sorted(items) if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip() or None
+
+
+def cache_key(vendor, endpoint, params, auth=None):
+    """
+    缓存键：供应商 + 端点 + authKey + 规整后的参数（与参数顺序、空白和数值类型无关）
+    :param auth: 凭据，为None时取params中的authKey
+    """
+    params = dict(params)
+    auth_key = params.pop("authKey", None)
+    if auth is None:
+        auth = auth_key
+    return (vendor, endpoint.strip("/"), _normalize(auth),
+            json.dumps(_normalize(params), ensure_ascii=False, separators=(",", ":")))
+
+
+def identifiers_of(vendor, params, fields):
+    """请求参数（含嵌套字典和列表）中的号码，返回 {(供应商, 字段, 值)}"""
+    found = set()
+
+    def visit(value):
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if str(key).lower() in fields and not isinstance(item, (dict, list)):
+                    item = _normalize(item)
+                    if item is not None:
+                        found.add((vendor, str(key).lower(), item))
+                else:
+                    visit(item)
+        elif isinstance(value, list):
+            for item in value:
+                visit(item)
+
+    visit(params)
+    return found
+
+
+def _is_success_body(value):
+    """响应体是否为不含error的JSON对象；Quadcell和MontNet的客户端返回解密后的JSON字符串"""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return False
+    return isinstance(value, dict) and "error" not in value
+
+
+class ResponseCache:
+    """
+    带TTL的LRU缓存，条目为 键 -> (过期时间, 响应, 号码集合)，按号码建立索引用于失效
+    回源期间（miss()范围内）相同号码被失效时，回源结果不写入缓存，避免写回修改前的旧数据
+    """
+
+    def __init__(self, max_entries, enabled=False):
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.entries = OrderedDict()
+        self.by_identifier = {}
+        self.lock = threading.Lock()
+        self.evictions = 0
+        # 失效计数；回源开始时记录，写入时与号码最近一次失效比较
+        self.generation = 0
+        self.invalidated_at = {}
+        # 早于此计数开始的回源一律不写入（invalidated_at过大时清空后的保守处理）
+        self.floor = 0
+        self.in_flight = 0
+
+    def get(self, key):
+        """返回 (是否命中, 响应副本)，过期条目在此删除"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return False, None
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                return False, None
+            self.entries.move_to_end(key)
+            value = entry[1]
+        return True, copy.deepcopy(value)
+
+    @contextmanager
+    def miss(self):
+        """
+        一次回源：with cache.miss() as store: value = send(); store(key, value, ttl, identifiers)
+        """
+        with self.lock:
+            self.in_flight += 1
+            generation = self.generation
+
+        def store(key, value, ttl, identifiers):
+            self._put(key, copy.deepcopy(value), ttl, identifiers, generation)
+
+        try:
+            yield store
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+                if not self.in_flight:
+                    self.invalidated_at.clear()
+
+    def _put(self, key, value, ttl, identifiers, generation):
+        with self.lock:
+            if generation < self.floor or any(self.invalidated_at.get(i, 0) > generation for i in identifiers):
+                return
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (time.monotonic() + ttl, value, identifiers)
+            for identifier in identifiers:
+                self.by_identifier.setdefault(identifier, set()).add(key)
+            while len(self.entries) > self.max_entries:
+                self._remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        _, _, identifiers = self.entries.pop(key)
+        for identifier in identifiers:
+            keys = self.by_identifier.get(identifier)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.by_identifier[identifier]
+
+    def invalidate(self, identifiers):
+        """删除带有这些号码的缓存，返回删除的条目数"""
+        removed = 0
+        with self.lock:
+            self.generation += 1
+            for identifier in identifiers:
+                if self.in_flight:
+                    self.invalidated_at[identifier] = self.generation
+                for key in list(self.by_identifier.get(identifier, ())):
+                    self._remove(key)
+                    removed += 1
+            if len(self.invalidated_at) > self.max_entries:
+                self.invalidated_at.clear()
+                self.floor = self.generation
+        return removed
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.by_identifier.clear()
+            self.generation += 1
+            self.floor = self.generation
+
+    def stats(self):
+        with self.lock:
+            return {"enabled": self.enabled, "entries": len(self.entries), "max_entries": self.max_entries,
+                    "evictions": self.evictions}
+
+
+response_cache = ResponseCache(
+    RESPONSE_CACHE_CONFIG["max_entries"],
+    enabled=RESPONSE_CACHE_CONFIG["enabled"] or os.environ.get("RESPONSE_CACHE_ENABLED", "") in ("1", "true"))
+
+
+class VendorResponseCache:
+    """
+    单个供应商的缓存入口，单条请求和批量请求都经过call()/call_async()发送
+    缓存关闭时直接发送；查询类端点按ttl_seconds配置缓存，修改类端点发送后使相同号码的缓存失效
+    """
+
+    def __init__(self, vendor, endpoint_config, cache=None):
+        self.vendor = vendor
+        self.endpoint_config = endpoint_config
+        self.cache = cache or response_cache
+        self.ttl_seconds = RESPONSE_CACHE_CONFIG["ttl_seconds"].get(vendor, {})
+        fields = RESPONSE_CACHE_CONFIG["identifier_fields"]
+        self.identifier_fields = {field.lower() for field in fields.get(vendor, fields["default"])}
+
+    def ttl(self, endpoint):
+        """端点的缓存秒数，不可缓存时返回None"""
+        endpoint = endpoint.strip("/")
+        if idempotency_of(self.endpoint_config, endpoint) != QUERY:
+            return None
+        return self.ttl_seconds.get(endpoint)
+
+    def _lookup(self, endpoint, params, bypass, auth):
+        """返回 (缓存键, 是否命中, 响应)；不可缓存时缓存键为None"""
+        ttl = self.ttl(endpoint)
+        if ttl is None:
+            return None, False, None
+        key = cache_key(self.vendor, endpoint, params, auth)
+        if bypass:
+            cache_lookups.inc(self.vendor, key[1], "bypass")
+            return key, False, None
+        hit, value = self.cache.get(key)
+        cache_lookups.inc(self.vendor, key[1], "hit" if hit else "miss")
+        return key, hit, value
+
+    def _store(self, store, key, params, value, status_code):
+        # 只缓存HTTP 200且为JSON对象的响应；客户端的 {"error": ...} 和非200的响应体不缓存
+        if status_code == 200 and _is_success_body(value):
+            store(key, value, self.ttl(key[1]), frozenset(identifiers_of(self.vendor, params, self.identifier_fields)))
+
+    def _invalidate(self, endpoint, params):
+        if idempotency_of(self.endpoint_config, endpoint.strip("/")) != MUTATING:
+            return
+        identifiers = identifiers_of(self.vendor, params, self.identifier_fields)
+        if identifiers:
+            removed = self.cache.invalidate(identifiers)
+            if removed:
+                cache_invalidations.inc(self.vendor, amount=removed)
+
+    def call(self, endpoint, params, send, bypass=False, auth=None):
+        """
+        经缓存发送请求
+        :param params: 请求参数字典（用于缓存键和号码）
+        :param send: 无参函数，实际发送请求并返回响应
+        :param bypass: 不读缓存，但以新结果更新缓存
+        :param auth: 不在params中的凭据（如Simlessly的AccessKey）
+        """
+        if not self.cache.enabled:
+            return send()
+        key, hit, value = self._lookup(endpoint, params, bypass, auth)
+        if hit:
+            return value
+        if key is None:
+            try:
+                return send()
+            finally:
+                self._invalidate(endpoint, params)
+        with self.cache.miss() as store, record_status() as recorder:
+            value = send()
+            self._store(store, key, params, value, recorder.status_code)
+        return value
+
+    async def call_async(self, endpoint, params, send, bypass=False, auth=None):
+        """call的异步版本，send为无参协程函数"""
+        if not self.cache.enabled:
+            return await send()
+        key, hit, value = self._lookup(endpoint, params, bypass, auth)
+        if hit:
+            return value
+        if key is None:
+            try:
+                return await send()
+            finally:
+                self._invalidate(endpoint, params)
+        with self.cache.miss() as store, record_status() as recorder:
+            value = await send()
+            self._store(store, key, params, value, recorder.status_code)
+        return value
+
+
+def _cache_metrics():
+    stats = response_cache.stats()
+    return [
+        ("response_cache_entries", "gauge", "Cached vendor responses", (), [((), stats["entries"])]),
+        ("response_cache_evictions_total", "counter", "Cached responses evicted by the LRU limit", (),
+         [((), stats["evictions"])])
+    ]
+
+
+registry.add_collector(_cache_metrics)
@@ -2,6 +2,9 @@ import json
 import os
 from flask import current_app
 from models.sim_resource import SimResource, db
+from modules.app_logging import get_logger
+
+logger = get_logger("sim_resources")
 
 class SimConfigManager:
     CONFIG_FILE = 'config/sim_general_config.json'
@@ -52,7 +55,7 @@ class SimConfigManager:
                 "low_stock_threshold": 1000
             }
         except Exception as e:
-            print(f"DB Init Warning: {e}")
+            logger.warning("DB Init Warning: %s", e)
             return {
                 "providers": [], "card_types": [], "resources_types": [], 
                 "provider_mapping": {}, "low_stock_threshold": 1000
@@ -74,7 +77,7 @@ class SimConfigManager:
             mapping = config.get('provider_mapping', {})
             for prov, value in mapping.items():
                 if isinstance(value, list): # 舊結構偵測
-                    print("Detected old config format, regenerating from DB...")
+                    logger.info("Detected old config format, regenerating from DB...")
                     new_config = SimConfigManager._get_initial_config_from_db()
                     # 保留用戶設置的閾值
                     new_config['low_stock_threshold'] = config.get('low_stock_threshold', 1000)
@@ -83,7 +86,7 @@ class SimConfigManager:
                     
             return config
         except Exception as e:
-            print(f"Config load error: {e}")
+            logger.error("Config load error: %s", e)
             return SimConfigManager._get_initial_config_from_db()
 
     @staticmethod
@@ -6,6 +6,9 @@ from sqlalchemy import asc, desc, func, case, text, or_, and_
 from sqlalchemy.sql.expression import cast
 from models.sim_resource import SimResource, db
 from .config_manager import SimConfigManager
+from modules.app_logging import get_logger
+
+logger = get_logger("sim_resources")
 
 class PaginationResult:
     def __init__(self, items, page, per_page, total, total_records=None):
@@ -263,7 +266,7 @@ class SimResourceManager:
                 'low_stock_threshold': config.get('low_stock_threshold', 1000)
             }
         except Exception as e:
-            print(f"Error getting options: {e}")
+            logger.error("Error getting options: %s", e)
             return {
                 'providers': [], 'card_types': [], 'resources_types': [],
                 'customers': [], 'batches': [], 'received_dates': [], 'assigned_dates': []
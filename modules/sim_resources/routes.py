@@ -10,6 +10,7 @@ import os
 from .manager import SimResourceManager
 from models.sim_resource import SimResource, db
 from .config_manager import SimConfigManager
+from modules.app_logging import get_logger
 from PIL import Image, ImageDraw, ImageFont
 
 # 引入 OpenPyXL 樣式組件 (用於 Excel 美化)
@@ -23,6 +24,8 @@ try:
 except ImportError:
     HAS_OPENPYXL_STYLES = False
 
+logger = get_logger("sim_resources")
+
 sim_resources_bp = Blueprint('sim_resources', __name__, url_prefix='/resources')
 
 # SIM資源管理頁面 - 使用全寬模式
@@ -603,7 +606,7 @@ def export_custom_resources():
                         continue
                 
                 if font is None:
-                    print("Warning: No system font found, falling back to default.")
+                    logger.warning("No system font found, falling back to default.")
                     font = ImageFont.load_default()
 
                 for res in resources:
@@ -669,7 +672,7 @@ def export_custom_resources():
                             zf.writestr(fname, img_byte_arr.getvalue())
                             
                         except Exception as e:
-                            print(f"QR Gen Error Resource ID {res.id}: {e}")
+                            logger.error("QR Gen Error Resource ID %s: %s", res.id, e)
                             continue
             
             zip_io.seek(0)
@@ -681,8 +684,7 @@ def export_custom_resources():
             )
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("QR export failed: %s", e)
         return jsonify({'error': f'導出處理失敗: {str(e)}'}), 500
     
 @sim_resources_bp.route('/api/batch/operation', methods=['POST'])
@@ -1,16 +1,26 @@
 import hmac
 import hashlib
 import uuid
-import requests
 import json
-import pandas as pd
 import time
-import os
-import re
-from datetime import datetime
-from tqdm import tqdm
+from modules.http_transport import base_url_for, get_transport, idempotency_of
+from modules.async_transport import get_async_transport
+from modules.batch_pipeline import BatchStages
+from modules.batch_rows import iter_payloads
+from modules.batch_checkpoint import INTERRUPTED_RESPONSE
+from modules.app_logging import vendor_logger
+from modules.metrics import vendor_call
+from modules.request_validation import EndpointValidator
+from modules.response_cache import VendorResponseCache
 from config.simlessly_config import SIMLESSLY_ENDPOINT_CONFIG, SIMLESSLY_ENDPOINT_DESCRIPTIONS
 
+logger = vendor_logger("simlessly")
+
+# 查询类端点的响应缓存（单条和批量请求共用），凭据为AccessKey
+query_cache = VendorResponseCache("simlessly", SIMLESSLY_ENDPOINT_CONFIG)
+# 由端点配置编译的参数校验器（单条和批量请求共用）
+request_validator = EndpointValidator("simlessly", SIMLESSLY_ENDPOINT_CONFIG)
+
 class HmacApiClient:
     """
     HMAC-SHA256 API Client
@@ -67,6 +77,65 @@ class HmacApiClient:
         :param verbose: Whether to print detailed logs
         :return: JSON response
         """
+        call = vendor_call("simlessly", endpoint)
+        try:
+            with call.phase("encode"):
+                full_url, headers = HmacApiClient._sign_request(base_url, endpoint, request_body,
+                                                                request_id, timestamp, verbose)
+            # Send HTTP POST request (pooled keep-alive connection)
+            with call.phase("network"):
+                response = get_transport("simlessly").post(
+                    full_url, 
+                    idempotency=idempotency_of(SIMLESSLY_ENDPOINT_CONFIG, endpoint),
+                    data=request_body, 
+                    headers=headers
+                )
+            call.response(response)
+            with call.phase("decode"):
+                return HmacApiClient._handle_response(response, verbose)
+        
+        except Exception as e:
+            call.error(e)
+            if verbose:
+                logger.error("Request failed: %s", e)
+            raise
+        finally:
+            call.done()
+    
+    @staticmethod
+    async def do_hmac_post_async(base_url, endpoint, request_body,
+                                 request_id=None, timestamp=None, verbose=True):
+        """
+        Async version of do_hmac_post (aiohttp), same signing and response handling
+        :return: JSON response
+        """
+        call = vendor_call("simlessly", endpoint)
+        try:
+            with call.phase("encode"):
+                full_url, headers = HmacApiClient._sign_request(base_url, endpoint, request_body,
+                                                                request_id, timestamp, verbose)
+            with call.phase("network"):
+                response = await get_async_transport("simlessly").post(
+                    full_url,
+                    idempotency=idempotency_of(SIMLESSLY_ENDPOINT_CONFIG, endpoint),
+                    data=request_body,
+                    headers=headers
+                )
+            call.response(response)
+            with call.phase("decode"):
+                return HmacApiClient._handle_response(response, verbose)
+        
+        except Exception as e:
+            call.error(e)
+            if verbose:
+                logger.error("Request failed: %s", e)
+            raise
+        finally:
+            call.done()
+    
+    @staticmethod
+    def _sign_request(base_url, endpoint, request_body, request_id, timestamp, verbose):
+        """Build full URL and signed headers, returns (full_url, headers)"""
         # Generate timestamp and request ID if not provided
         timestamp = timestamp or str(int(time.time() * 1000))
         request_id = request_id or str(uuid.uuid4())
@@ -75,7 +144,7 @@ class HmacApiClient:
         sign_data = f"{timestamp}{request_id}{HmacApiClient.ACCESS_KEY}{request_body}"
         
         if verbose:
-            print(f"[Sign Data] {sign_data}")
+            logger.debug("[Sign Data] %s", sign_data)
         
         # Generate signature
         signature = HmacApiClient.generate_signature(sign_data, HmacApiClient.SECRET_KEY)
@@ -84,9 +153,9 @@ class HmacApiClient:
         full_url = f"{base_url.rstrip('/')}/{endpoint.lstrip('/')}"
         
         if verbose:
-            print(f"[HMAC-Send] {full_url}")
-            print(f"[HMAC-Send] {request_body}")
-            print(f"[HMAC-Signature] {signature}")
+            logger.debug("[HMAC-Send] %s", full_url)
+            logger.debug("[HMAC-Send] %s", request_body)
+            logger.debug("[HMAC-Signature] %s", signature)
         
         # Set request headers
         headers = {
@@ -97,38 +166,27 @@ class HmacApiClient:
             'AccessKey': HmacApiClient.ACCESS_KEY,
             'Signature': signature
         }
+        return full_url, headers
+    
+    @staticmethod
+    def _handle_response(response, verbose):
+        if verbose:
+            logger.debug("[HTTP Status] %s", response.status_code)
+            logger.debug("[Response] %s", response.text)
         
+        # Try to parse JSON if possible, otherwise return text
         try:
-            # Send HTTP POST request
-            response = requests.post(
-                full_url, 
-                data=request_body, 
-                headers=headers,
-                timeout=30
-            )
-            
-            if verbose:
-                print(f"[HTTP Status] {response.status_code}")
-                print(f"[Response] {response.text}")
-            
-            # Try to parse JSON if possible, otherwise return text
-            try:
-                return response.json()
-            except:
-                return response.text
-        
-        except Exception as e:
-            if verbose:
-                print(f"Request failed: {str(e)}")
-            raise
+            return response.json()
+        except:
+            return response.text
 
 class HttpApiClient:
     """
     HTTP API Client for HMAC-SHA256 APIs
     """
     
-    # Fixed base URL
-    BASE_URL = "https://rsp.simlessly.com/api/v1/"
+    # Fixed base URL (SIMLESSLY_BASE_URL environment variable overrides it, e.g. for the mock server)
+    BASE_URL = base_url_for("simlessly", "https://rsp.simlessly.com/api/v1/")
     
     @staticmethod
     def do_post(endpoint, http_req, verbose=True):
@@ -145,6 +203,19 @@ class HttpApiClient:
             request_body=http_req,
             verbose=verbose
         )
+    
+    @staticmethod
+    async def do_post_async(endpoint, http_req, verbose=True):
+        """
+        Async version of do_post
+        :return: JSON response or raw response
+        """
+        return await HmacApiClient.do_hmac_post_async(
+            base_url=HttpApiClient.BASE_URL,
+            endpoint=endpoint,
+            request_body=http_req,
+            verbose=verbose
+        )
 
 def build_nested_dict(flat_dict):
     """
@@ -202,11 +273,22 @@ def get_key_from_response(response, key_paths):
     
     return None
 
-class SimlesslyAPI:
+class SimlesslyAPI(BatchStages):
     """Simlessly API 封装类"""
     
+    vendor = "simlessly"
+    result_columns = ("Endpoint", "JSON", "Response", "Status", "Success")
+    range_fields = {'iccid': None}
+    validator = request_validator
+    endpoint_config = SIMLESSLY_ENDPOINT_CONFIG
+    request_auth = HmacApiClient.ACCESS_KEY
+    
     # Fixed base URL
-    BASE_URL = "https://rsp.simlessly.com/api/v1/"
+    BASE_URL = HttpApiClient.BASE_URL
+    
+    @property
+    def base_url(self):
+        return HttpApiClient.BASE_URL
 
     def get_endpoints(self):
         """获取所有可用的端点"""
@@ -221,11 +303,14 @@ class SimlesslyAPI:
         return HmacApiClient.get_endpoint_description_key(endpoint)
     
     def __init__(self):
+        super().__init__()
         self.client = HttpApiClient()
-        self.processed_count = 0
     
-    def single_request(self, endpoint, payload_dict):
-        """发送单条API请求"""
+    def single_request(self, endpoint, payload_dict, bypass_cache=False):
+        """
+        发送单条API请求
+        :param bypass_cache: 不读取响应缓存
+        """
         try:
             # 处理列表类型的参数（将字符串转换为JSON数组）
             list_params = ['hplmnList', 'ehplmnList', 'oplmnList', 'fplmnList', 'multiImsiDataList']
@@ -244,175 +329,79 @@ class SimlesslyAPI:
             nested_payload = build_nested_dict(payload_dict)
             payload_json = json.dumps(nested_payload, ensure_ascii=False)
             
-            response = self.client.do_post(
+            response = query_cache.call(endpoint, nested_payload, lambda: self.client.do_post(
                 endpoint, 
                 payload_json, 
                 verbose=False  # 设置为False关闭详细日志
-            )
+            ), bypass=bypass_cache, auth=HmacApiClient.ACCESS_KEY)
             return response
         except Exception as e:
             return {"error": str(e)}
     
-    def batch_process(self, input_path, delay=0.5):
-        """批量处理Excel文件中的请求"""
-        # 重置处理计数
-        self.processed_count = 0
-        
-        # 读取Excel数据
-        df = pd.read_excel(input_path)
-        
-        # 扩展ICCID范围
-        expanded_df = self.expand_iccid_ranges(df)
-        
-        # 准备结果目录
-        log_dir = os.path.join(os.path.dirname(input_path), "Log")
-        os.makedirs(log_dir, exist_ok=True)
-        
-        # 生成输出文件名
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        output_path = os.path.join(log_dir, f"{timestamp}.xlsx")
-        
-        # 准备结果列表
-        results = []
-        
-        # 显示处理信息
-        print(f"▶ Processing {len(expanded_df)} requests with {delay}s delay...")
-        
-        # 处理每个请求，使用tqdm显示进度条
-        for index, row in tqdm(expanded_df.iterrows(), total=len(expanded_df)):
-            # 构建flat payload字典
-            flat_payload = {}
-            
-            # 添加非空列
-            for col in expanded_df.columns:
-                if col == "endpoint":
-                    continue
-                
-                if pd.isna(row[col]) or (isinstance(row[col], str) and row[col].strip() == ""):
-                    continue
-                
-                flat_payload[col] = row[col]
-            
+    def build_requests(self, rows):
+        """逐行构建 (endpoint, 嵌套payload)"""
+        for endpoint, flat_payload in iter_payloads(rows):
             # 转换为嵌套结构
-            nested_payload = build_nested_dict(flat_payload)
-            
-            # 发送请求
-            try:
-                response = self.client.do_post(
-                    endpoint=row['endpoint'],
-                    http_req=json.dumps(nested_payload, ensure_ascii=False),
-                    verbose=False
-                )
-                
-                # 定义可能的响应字段路径
-                success_paths = ['success']
-                
-                iccid_paths = [
-                    'obj.iccid',
-                    'obj.profileLogs.0.iccid'
-                ]
-                
-                status_paths = [
-                    'obj.status',
-                    'obj.profileLogs.0.status'
-                ]
-                
-                device_name_paths = [
-                    'obj.deviceName',
-                    'obj.profileLogs.0.deviceName'
-                ]
-                
-                install_location_paths = [
-                    'obj.installLocation',
-                    'obj.profileLogs.0.installLocation'
-                ]
-                
-                # 提取值
-                success = get_key_from_response(response, success_paths)
-                
-                # 为日志文件创建完整消息
-                full_message = json.dumps(response, indent=2, ensure_ascii=False)
-                
-                status_flag = "SUCCESS" if success else "FAILED"
-                
-                # 记录完整响应
-                response_record = full_message
-                
-            except Exception as e:
-                error_msg = f"ERROR: {str(e)}"
-                status_flag = "FAILED"
-                response_record = error_msg
-                success = False
-            
-            # 记录结果
-            results.append({
-                "Endpoint": row['endpoint'],
-                "JSON": json.dumps(nested_payload, ensure_ascii=False),
-                "Response": response_record,
-                "Status": status_flag,
-                "Success": success
-            })
-            
-            # 增加处理计数
-            self.processed_count += 1
-            
-            time.sleep(delay)
-        
-        # 保存结果
-        result_df = pd.DataFrame(results, columns=["Endpoint", "JSON", "Response", "Status", "Success"])
-        
-        # 使用ExcelWriter确保正确关闭文件
-        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-            result_df.to_excel(writer, index=False, sheet_name='Results')
-            
-            # 添加摘要信息
-            success_count = sum(1 for r in results if r["Status"] == "SUCCESS")
-            summary_data = {
-                '总请求数': [len(expanded_df)],
-                '成功数': [success_count],
-                '失败数': [len(expanded_df) - success_count],
-                '处理时间': [datetime.now().strftime("%Y-%m-%d %H:%M:%S")]
-            }
-            summary_df = pd.DataFrame(summary_data)
-            summary_df.to_excel(writer, index=False, sheet_name='Summary')
-        
-        return output_path
+            yield endpoint, build_nested_dict(flat_payload)
+    
+    def _interrupted_batch_record(self, item):
+        """请求发送期间中断时该行的结果记录"""
+        return {
+            **self.request_record(item),
+            "Response": INTERRUPTED_RESPONSE,
+            "Status": "FAILED",
+            "Success": False
+        }
+    
+    def _send_batch_request(self, item):
+        """发送批量中的单条请求，返回结果记录"""
+        endpoint, nested_payload = item
+        try:
+            response = query_cache.call(endpoint, nested_payload, lambda: self.client.do_post(
+                endpoint=endpoint,
+                http_req=json.dumps(nested_payload, ensure_ascii=False),
+                verbose=False
+            ), bypass=self.bypass_cache, auth=HmacApiClient.ACCESS_KEY)
+        except Exception as e:
+            return self._batch_record(endpoint, nested_payload, error=e)
+        return self._batch_record(endpoint, nested_payload, response)
+    
+    async def _send_batch_request_async(self, item):
+        """_send_batch_request的异步版本"""
+        endpoint, nested_payload = item
+        try:
+            response = await query_cache.call_async(endpoint, nested_payload, lambda: self.client.do_post_async(
+                endpoint=endpoint,
+                http_req=json.dumps(nested_payload, ensure_ascii=False),
+                verbose=False
+            ), bypass=self.bypass_cache, auth=HmacApiClient.ACCESS_KEY)
+        except Exception as e:
+            return self._batch_record(endpoint, nested_payload, error=e)
+        return self._batch_record(endpoint, nested_payload, response)
     
     @staticmethod
-    def expand_iccid_ranges(df):
-        """扩展ICCID范围"""
-        expanded_rows = []
-        range_column = None
-        
-        # 查找ICCID列
-        for col in df.columns:
-            if "iccid" in col.lower():
-                range_column = col
-                break
-        
-        if range_column is None:
-            return df
-        
-        # 处理每一行
-        for index, row in df.iterrows():
-            iccid_value = row[range_column]
+    def _batch_record(endpoint, nested_payload, response=None, error=None):
+        """由响应或异常生成结果记录"""
+        if error is None:
+            # 定义可能的响应字段路径
+            success_paths = ['success']
             
-            # 检查是否为范围格式
-            if isinstance(iccid_value, str) and re.match(r'^\d+-\d+$', iccid_value.strip()):
-                try:
-                    start, end = map(int, iccid_value.split('-'))
-                    
-                    # 为范围内的每个ICCID创建新行
-                    for iccid in range(start, end + 1):
-                        new_row = row.copy()
-                        new_row[range_column] = str(iccid)
-                        expanded_rows.append(new_row)
-                    
-                    continue
-                except Exception as e:
-                    print(f"Error expanding ICCID range: {str(e)}")
+            # 提取值
+            success = get_key_from_response(response, success_paths)
             
-            # 非范围值直接添加
-            expanded_rows.append(row)
+            status_flag = "SUCCESS" if success else "FAILED"
+            
+            # 记录完整响应
+            response_record = json.dumps(response, indent=2, ensure_ascii=False)
+        else:
+            status_flag = "FAILED"
+            response_record = f"ERROR: {str(error)}"
+            success = False
         
-        return pd.DataFrame(expanded_rows)
\ No newline at end of file
+        return {
+            "Endpoint": endpoint,
+            "JSON": json.dumps(nested_payload, ensure_ascii=False),
+            "Response": response_record,
+            "Status": status_flag,
+            "Success": success
+        }
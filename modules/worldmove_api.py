@@ -1,18 +1,33 @@
-import requests
 import json
+import logging
 import random
 import pandas as pd
 import time
 import os
 import re
-import hashlib
 from datetime import datetime
 from tqdm import tqdm
+from modules.http_transport import base_url_for, get_transport, idempotency_of
+from modules.async_transport import get_async_transport
+from modules.batch_pipeline import BatchStages
+from modules.batch_checkpoint import INTERRUPTED_RESPONSE
+from modules.worldmove_signer import compile_signers
+from modules.app_logging import vendor_logger
+from modules.metrics import vendor_call
+from modules.request_validation import EndpointValidator
+from modules.response_cache import VendorResponseCache
 from config.worldmove_config import WORLDMOVE_ENDPOINT_CONFIG, WORLDMOVE_ENDPOINT_DESCRIPTIONS, WORLDMOVE_ENCRYPTION_CONFIG
 import urllib3
 # Disable SSL warnings
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+logger = vendor_logger("worldmove")
+
+# 查询类端点的响应缓存（单条和批量请求共用），凭据为merchantId
+query_cache = VendorResponseCache("worldmove", WORLDMOVE_ENDPOINT_CONFIG)
+# 由端点配置编译的参数校验器（单条和批量请求共用）
+request_validator = EndpointValidator("worldmove", WORLDMOVE_ENDPOINT_CONFIG)
+
 class Sha1ApiClient:
     # 使用加密配置
     ENDPOINT_CONFIG = WORLDMOVE_ENCRYPTION_CONFIG
@@ -24,8 +39,11 @@ class Sha1ApiClient:
         "token": "f3d9dcba278dd2f8494ac507d82c2628"
     }
     
-    # Base URL
-    BASE_URL = "https://tfmshippingsys.fastmove.com.tw/Api"
+    # 各端点的签名规则在导入时编译一次
+    SIGNERS = compile_signers(ENDPOINT_CONFIG, FIXED_PARAM_VALUES)
+    
+    # Base URL (WORLDMOVE_BASE_URL environment variable overrides it, e.g. for the mock server)
+    BASE_URL = base_url_for("worldmove", "https://tfmshippingsys.fastmove.com.tw/Api")
     
     @staticmethod
     def get_endpoints():
@@ -44,121 +62,19 @@ class Sha1ApiClient:
         """获取端点的描述键"""
         return WORLDMOVE_ENDPOINT_DESCRIPTIONS.get(endpoint, "")    
 
-    # compute_signature 方法保持不变，使用 Sha1ApiClient.ENDPOINT_CONFIG
     @staticmethod
-    def compute_signature(endpoint, payload):
+    def compute_signature(endpoint, payload, trace=None):
         """
         Compute SHA1 signature for the API request based on endpoint-specific rules
         :param endpoint: API endpoint to determine encryption rules
         :param payload: Request payload to extract parameters from
+        :param trace: Optional dict, filled with the signing steps for debugging
         :return: SHA1 hash as hex string
         """
-        if endpoint not in Sha1ApiClient.ENDPOINT_CONFIG:
+        signer = Sha1ApiClient.SIGNERS.get(endpoint)
+        if signer is None:
             raise ValueError(f"Unknown endpoint: {endpoint}")
-        
-        config = Sha1ApiClient.ENDPOINT_CONFIG[endpoint]
-        enc_params = config["enc_params"]
-        
-        # Debug output
-        print(f"Computing signature for endpoint: {endpoint}")
-        print(f"Encryption parameters: {enc_params}")
-        print(f"Payload: {json.dumps(payload, indent=2)}")
-        
-        # Build the signature string based on the encryption parameters
-        signature_parts = []
-        
-        for param in enc_params:
-            print(f"Processing parameter: {param}")
-            
-            # Handle fixed parameters - always use fixed values
-            if param in Sha1ApiClient.FIXED_PARAM_VALUES:
-                signature_parts.append(Sha1ApiClient.FIXED_PARAM_VALUES[param])
-                print(f"Added fixed parameter {param}: {Sha1ApiClient.FIXED_PARAM_VALUES[param]}")
-            # Handle special list parameters
-            elif param == "prodList" and param in payload:
-                prod_list = payload[param]
-                if isinstance(prod_list, list):
-                    # For each product in the list, add the specified fields in order
-                    for i, product in enumerate(prod_list):
-                        print(f"Processing product {i}: {product}")
-                        
-                        if "wmproductId+qty" in config.get("prodList_format", ""):
-                            # 确保字段存在，否则使用空字符串
-                            wmproductId = str(product.get("wmproductId", ""))
-                            qty = str(product.get("qty", ""))
-                            signature_parts.append(wmproductId)
-                            signature_parts.append(qty)
-                            print(f"Added wmproductId: {wmproductId}, qty: {qty}")
-                        elif "productid+productName+qty" in config.get("prodList_format", ""):
-                            productId = str(product.get("productId", ""))
-                            productName = str(product.get("productName", ""))
-                            qty = str(product.get("qty", ""))
-                            signature_parts.append(productId)
-                            signature_parts.append(productName)
-                            signature_parts.append(qty)
-                            print(f"Added productId: {productId}, productName: {productName}, qty: {qty}")
-                        elif "wmproductId+day+simNum" in config.get("prodList_format", ""):
-                            wmproductId = str(product.get("wmproductId", ""))
-                            day = str(product.get("day", ""))
-                            simNum = str(product.get("simNum", ""))
-                            signature_parts.append(wmproductId)
-                            signature_parts.append(day)
-                            signature_parts.append(simNum)
-                            print(f"Added wmproductId: {wmproductId}, day: {day}, simNum: {simNum}")
-            elif param == "itemList" and param in payload:
-                item_list = payload[param]
-                if isinstance(item_list, list):
-                    # For each item in the list, add the specified fields in order
-                    for i, item in enumerate(item_list):
-                        print(f"Processing item {i}: {item}")
-                        
-                        if "iccid+productName+redemptionCode" in config.get("itemList_format", ""):
-                            iccid = str(item.get("iccid", ""))
-                            productName = str(item.get("productName", ""))
-                            redemptionCode = str(item.get("redemptionCode", ""))
-                            signature_parts.append(iccid)
-                            signature_parts.append(productName)
-                            signature_parts.append(redemptionCode)
-                            print(f"Added iccid: {iccid}, productName: {productName}, redemptionCode: {redemptionCode}")
-                        elif "iccid+productName+rcode+qrcodeType+qrcode" in config.get("itemList_format", ""):
-                            iccid = str(item.get("iccid", ""))
-                            productName = str(item.get("productName", ""))
-                            rcode = str(item.get("rcode", ""))
-                            qrcodeType = str(item.get("qrcodeType", ""))
-                            qrcode = str(item.get("qrcode", ""))
-                            signature_parts.append(iccid)
-                            signature_parts.append(productName)
-                            signature_parts.append(rcode)
-                            signature_parts.append(qrcodeType)
-                            signature_parts.append(qrcode)
-                            print(f"Added iccid: {iccid}, productName: {productName}, rcode: {rcode}, qrcodeType: {qrcodeType}, qrcode: {qrcode}")
-                        elif "wmproductId+day+simNum" in config.get("itemList_format", ""):
-                            wmproductId = str(item.get("wmproductId", ""))
-                            day = str(item.get("day", ""))
-                            simNum = str(item.get("simNum", ""))
-                            signature_parts.append(wmproductId)
-                            signature_parts.append(day)
-                            signature_parts.append(simNum)
-                            print(f"Added wmproductId: {wmproductId}, day: {day}, simNum: {simNum}")
-            # Handle regular parameters from payload (excluding non-encryption parameters)
-            elif param in payload and param not in config.get("non_enc_params", []):
-                value = str(payload[param])
-                signature_parts.append(value)
-                print(f"Added regular parameter {param}: {value}")
-        
-        # Concatenate all parts
-        signature_string = "".join(signature_parts)
-        
-        # Debug output
-        print(f"Signature string: {signature_string}")
-        
-        # Compute SHA1 hash
-        hash_object = hashlib.sha1(signature_string.encode())
-        hex_dig = hash_object.hexdigest()
-        
-        print(f"Computed signature: {hex_dig}")
-        
-        return hex_dig
+        return signer.sign(payload, trace)
 
     @staticmethod
     def do_post_request(endpoint, payload, verbose=True):
@@ -169,11 +85,71 @@ class Sha1ApiClient:
         :param verbose: Whether to print detailed logs
         :return: JSON response or raw response for non-200 status
         """
+        call = vendor_call("worldmove", endpoint)
+        try:
+            with call.phase("encode"):
+                full_url, body, headers = Sha1ApiClient._build_request(endpoint, payload, verbose)
+            # Send HTTP POST request with SSL verification disabled (pooled keep-alive connection)
+            with call.phase("network"):
+                response = get_transport("worldmove").post(
+                    full_url, 
+                    idempotency=idempotency_of(WORLDMOVE_ENDPOINT_CONFIG, endpoint),
+                    data=body, 
+                    headers=headers,
+                    verify=False  # Disable SSL verification
+                )
+            call.response(response)
+            with call.phase("decode"):
+                return Sha1ApiClient._handle_response(response, verbose)
+        
+        except Exception as e:
+            call.error(e)
+            if verbose:
+                logger.error("Request failed: %s", e)
+            raise
+        finally:
+            call.done()
+
+    @staticmethod
+    async def do_post_request_async(endpoint, payload, verbose=True):
+        """
+        Async version of do_post_request (aiohttp), same signature and response handling
+        :return: JSON response or raw response for non-200 status
+        """
+        call = vendor_call("worldmove", endpoint)
+        try:
+            with call.phase("encode"):
+                full_url, body, headers = Sha1ApiClient._build_request(endpoint, payload, verbose)
+            with call.phase("network"):
+                response = await get_async_transport("worldmove").post(
+                    full_url,
+                    idempotency=idempotency_of(WORLDMOVE_ENDPOINT_CONFIG, endpoint),
+                    data=body,
+                    headers=headers,
+                    verify=False  # Disable SSL verification
+                )
+            call.response(response)
+            with call.phase("decode"):
+                return Sha1ApiClient._handle_response(response, verbose)
+        
+        except Exception as e:
+            call.error(e)
+            if verbose:
+                logger.error("Request failed: %s", e)
+            raise
+        finally:
+            call.done()
+
+    @staticmethod
+    def _build_request(endpoint, payload, verbose):
+        """Sign payload, returns (full_url, request body, headers)"""
         # Construct full URL
         full_url = f"{Sha1ApiClient.BASE_URL}/{endpoint}"
         
-        # Compute signature
-        signature = Sha1ApiClient.compute_signature(endpoint, payload)
+        # Compute signature (signing steps are traced only in verbose mode with DEBUG logging enabled)
+        debug = verbose and logger.isEnabledFor(logging.DEBUG)
+        trace = {} if debug else None
+        signature = Sha1ApiClient.compute_signature(endpoint, payload, trace)
         
         # Create the final payload with the signature
         full_payload = {
@@ -182,54 +158,53 @@ class Sha1ApiClient:
         }
         
         # Add fixed parameters if they are required by the endpoint
-        config = Sha1ApiClient.ENDPOINT_CONFIG[endpoint]
-        for param in config["enc_params"]:
-            if param in Sha1ApiClient.FIXED_PARAM_VALUES:
-                full_payload[param] = Sha1ApiClient.FIXED_PARAM_VALUES[param]
+        full_payload.update(Sha1ApiClient.SIGNERS[endpoint].fixed_params)
         
-        if verbose:
-            print(f"[API-Send] {full_url}")
-            print(f"[API-Send] {json.dumps(full_payload, indent=2)}")
+        if debug:
+            logger.debug("[API-Sign] %s", json.dumps(trace, ensure_ascii=False))
+            logger.debug("[API-Send] %s", full_url)
+            logger.debug("[API-Send] %s", json.dumps(full_payload, ensure_ascii=False))
         
-        try:
-            # Set request headers
-            headers = {
-                'Content-Type': 'application/json',
-                'Accept': 'application/json'
-            }
-            
-            # Send HTTP POST request with SSL verification disabled
-            response = requests.post(
-                full_url, 
-                data=json.dumps(full_payload), 
-                headers=headers,
-                timeout=30,
-                verify=False  # Disable SSL verification
-            )
-            
-            if verbose:
-                print(f"[HTTP Status] {response.status_code}")
-                print(f"[Raw Response] {response.text}")
-            
-            # Handle response
-            if response.status_code == 200:
-                try:
-                    return response.json()
-                except json.JSONDecodeError:
-                    return response.text
-            return response.text
+        # Set request headers
+        headers = {
+            'Content-Type': 'application/json',
+            'Accept': 'application/json'
+        }
+        return full_url, json.dumps(full_payload), headers
+
+    @staticmethod
+    def _handle_response(response, verbose):
+        if verbose:
+            logger.debug("[HTTP Status] %s", response.status_code)
+            logger.debug("[Raw Response] %s", response.text)
         
-        except Exception as e:
-            if verbose:
-                print(f"Request failed: {str(e)}")
-            raise
+        # Handle response
+        if response.status_code == 200:
+            try:
+                return response.json()
+            except json.JSONDecodeError:
+                return response.text
+        return response.text
 
-class WorldMoveAPI:
+class WorldMoveAPI(BatchStages):
     """WorldMove API 封装类"""
     
+    vendor = "worldmove"
+    result_columns = ("Endpoint", "Payload", "Response", "Status", "StatusCode")
+    range_fields = {'imsi': None}
+    output_prefix = "worldmove_result_"
+    validator = request_validator
+    endpoint_config = WORLDMOVE_ENDPOINT_CONFIG
+    request_auth = Sha1ApiClient.FIXED_PARAM_VALUES["merchantId"]
+    payload_column = "Payload"
+    
     def __init__(self):
+        super().__init__()
         self.client = Sha1ApiClient()
-        self.processed_count = 0
+    
+    @property
+    def base_url(self):
+        return Sha1ApiClient.BASE_URL
         
     def get_endpoints():
         """获取所有可用的端点"""
@@ -243,8 +218,11 @@ class WorldMoveAPI:
         """获取端点的描述键"""
         return Sha1ApiClient.get_endpoint_description_key(endpoint)
     
-    def single_request(self, endpoint, payload_dict):
-        """发送单条API请求"""
+    def single_request(self, endpoint, payload_dict, bypass_cache=False):
+        """
+        发送单条API请求
+        :param bypass_cache: 不读取响应缓存
+        """
         try:
             # 验证prodList参数
             if "prodList" in payload_dict:
@@ -259,154 +237,74 @@ class WorldMoveAPI:
                         if "wmproductId" not in product or "qty" not in product:
                             return {"error": f"Product at index {i} is missing required fields (wmproductId, qty)"}
             
-            response = self.client.do_post_request(
+            response = query_cache.call(endpoint, payload_dict, lambda: self.client.do_post_request(
                 endpoint, 
                 payload_dict, 
                 verbose=True  # 启用详细日志以便调试
-            )
+            ), bypass=bypass_cache, auth=Sha1ApiClient.FIXED_PARAM_VALUES["merchantId"])
             return response
         except Exception as e:
             return {"error": str(e)}
     
-    def batch_process(self, input_path, delay=0.5):
-        """批量处理Excel文件中的请求"""
-        # 重置处理计数
-        self.processed_count = 0
-        
-        # 读取Excel数据
-        df = pd.read_excel(input_path)
-        
-        # 检查endpoint列是否存在
-        if 'endpoint' not in df.columns:
-            raise ValueError("Excel文件必须包含'endpoint'列")
-        
-        # 扩展IMSI范围
-        expanded_df = self.expand_imsi_ranges(df)
-        
-        # 准备结果目录
-        log_dir = os.path.join(os.path.dirname(input_path), "Log")
-        os.makedirs(log_dir, exist_ok=True)
-        
-        # 生成输出文件名
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        output_path = os.path.join(log_dir, f"worldmove_result_{timestamp}.xlsx")
-        
-        # 准备结果列表
-        results = []
-        
-        print(f"▶ Processing {len(expanded_df)} requests with {delay}s delay...")
-        
-        # 处理每个请求
-        for index, row in tqdm(expanded_df.iterrows(), total=len(expanded_df)):
-            # 构建payload
-            payload = {}
-            
-            # 添加非空列
-            for col in expanded_df.columns:
-                if col == "endpoint":
-                    continue
-                
-                if pd.isna(row[col]) or (isinstance(row[col], str) and row[col].strip() == ""):
-                    continue
-                
-                payload[col] = row[col]
-            
-            # 发送请求
-            try:
-                response = self.client.do_post_request(
-                    endpoint=row['endpoint'],
-                    payload=payload,
-                    verbose=True  # 启用详细日志以便调试
-                )
-                
-                # 提取响应信息
-                if isinstance(response, dict):
-                    message = response.get("message", "No message")
-                    status_code = response.get("statusCode", "No status code")
-                else:
-                    message = str(response)
-                    status_code = "N/A"
-                
-                status = "SUCCESS"
-                response_record = str(response)
-                
-            except Exception as e:
-                error_msg = f"ERROR: {str(e)}"
-                status = "FAILED"
-                status_code = "N/A"
-                response_record = error_msg
-            
-            # 记录结果
-            results.append({
-                "Endpoint": row['endpoint'],
-                "Payload": json.dumps(payload, ensure_ascii=False),
-                "Response": response_record,
-                "Status": status,
-                "StatusCode": status_code
-            })
-            
-            # 增加处理计数
-            self.processed_count += 1
-            
-            time.sleep(delay)
-        
-        # 保存结果
-        result_df = pd.DataFrame(results, columns=["Endpoint", "Payload", "Response", "Status", "StatusCode"])
-        
-        # 使用ExcelWriter确保正确关闭文件
-        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-            result_df.to_excel(writer, index=False, sheet_name='Results')
-            
-            # 添加摘要信息
-            summary_data = {
-                '总请求数': [len(expanded_df)],
-                '成功数': [sum(1 for r in results if r["Status"] == "SUCCESS")],
-                '失败数': [sum(1 for r in results if r["Status"] == "FAILED")],
-                '处理时间': [datetime.now().strftime("%Y-%m-%d %H:%M:%S")]
-            }
-            summary_df = pd.DataFrame(summary_data)
-            summary_df.to_excel(writer, index=False, sheet_name='Summary')
-        
-        return output_path
+    def _interrupted_batch_record(self, item):
+        """请求发送期间中断时该行的结果记录"""
+        return {
+            **self.request_record(item),
+            "Response": INTERRUPTED_RESPONSE,
+            "Status": "FAILED",
+            "StatusCode": "N/A"
+        }
+    
+    def _send_batch_request(self, item):
+        """发送批量中的单条请求，返回结果记录"""
+        endpoint, payload = item
+        try:
+            response = query_cache.call(endpoint, payload, lambda: self.client.do_post_request(
+                endpoint=endpoint,
+                payload=payload,
+                verbose=True  # 启用详细日志以便调试
+            ), bypass=self.bypass_cache, auth=Sha1ApiClient.FIXED_PARAM_VALUES["merchantId"])
+        except Exception as e:
+            return self._batch_record(endpoint, payload, error=e)
+        return self._batch_record(endpoint, payload, response)
+    
+    async def _send_batch_request_async(self, item):
+        """_send_batch_request的异步版本"""
+        endpoint, payload = item
+        try:
+            response = await query_cache.call_async(endpoint, payload, lambda: self.client.do_post_request_async(
+                endpoint=endpoint,
+                payload=payload,
+                verbose=True
+            ), bypass=self.bypass_cache, auth=Sha1ApiClient.FIXED_PARAM_VALUES["merchantId"])
+        except Exception as e:
+            return self._batch_record(endpoint, payload, error=e)
+        return self._batch_record(endpoint, payload, response)
     
     @staticmethod
-    def expand_imsi_ranges(df):
-        """扩展IMSI范围"""
-        expanded_rows = []
-        range_column = None
-        
-        # 查找IMSI列
-        for col in df.columns:
-            if "imsi" in col.lower():
-                range_column = col
-                break
-        
-        if range_column is None:
-            return df
-        
-        # 处理每一行
-        for index, row in df.iterrows():
-            imsi_value = row[range_column]
-            
-            # 检查是否为范围格式
-            if isinstance(imsi_value, str) and re.match(r'^\d+-\d+$', imsi_value.strip()):
-                try:
-                    start, end = map(int, imsi_value.split('-'))
-                    
-                    # 为范围内的每个IMSI创建新行
-                    for imsi in range(start, end + 1):
-                        new_row = row.copy()
-                        new_row[range_column] = str(imsi)
-                        expanded_rows.append(new_row)
-                    
-                    continue
-                except Exception as e:
-                    print(f"Error expanding IMSI range: {str(e)}")
+    def _batch_record(endpoint, payload, response=None, error=None):
+        """由响应或异常生成结果记录"""
+        if error is None:
+            # 提取响应信息
+            if isinstance(response, dict):
+                status_code = response.get("statusCode", "No status code")
+            else:
+                status_code = "N/A"
             
-            # 非范围值直接添加
-            expanded_rows.append(row)
-        
-        return pd.DataFrame(expanded_rows)
+            status = "SUCCESS"
+            response_record = str(response)
+        else:
+            status = "FAILED"
+            status_code = "N/A"
+            response_record = f"ERROR: {str(error)}"
+        
+        return {
+            "Endpoint": endpoint,
+            "Payload": json.dumps(payload, ensure_ascii=False),
+            "Response": response_record,
+            "Status": status,
+            "StatusCode": status_code
+        }
     
     @staticmethod
     def get_endpoints():
@@ -1,7 +1,11 @@
 from flask import Flask, request, Response
 import json
+import logging
 import os
 from datetime import datetime
+from modules.app_logging import vendor_logger
+
+logger = vendor_logger("worldmove", "callback")
 
 class WorldMoveCallback:
     """WorldMove回调处理器"""
@@ -54,5 +58,7 @@ class WorldMoveCallback:
         with open(filepath, 'w', encoding='utf-8') as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
         
-        print(f"Callback received from {endpoint} and saved to {filepath}")
-        print(f"Callback data: {json.dumps(data, ensure_ascii=False, indent=2)}")
\ No newline at end of file
+        logger.info("Callback received from %s and saved to %s", endpoint, filepath,
+                    extra={"fields": {"endpoint": endpoint, "file": filepath}})
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Callback data: %s", json.dumps(data, ensure_ascii=False))
\ No newline at end of file
@@ -0,0 +1,93 @@
+import hashlib
+
+# 列表参数每个元素参与签名的字段：(格式字符串, 字段)，按顺序匹配端点配置的<参数>_format（包含即匹配）
+LIST_FORMATS = {
+    "prodList": (
+        ("wmproductId+qty", ("wmproductId", "qty")),
+        ("productid+productName+qty", ("productId", "productName", "qty")),
+        ("wmproductId+day+simNum", ("wmproductId", "day", "simNum"))
+    ),
+    "itemList": (
+        ("iccid+productName+redemptionCode", ("iccid", "productName", "redemptionCode")),
+        ("iccid+productName+rcode+qrcodeType+qrcode", ("iccid", "productName", "rcode", "qrcodeType", "qrcode")),
+        ("wmproductId+day+simNum", ("wmproductId", "day", "simNum"))
+    )
+}
+
+FIXED = "fixed"
+VALUE = "value"
+LIST = "list"
+
+
+def _list_fields(param, list_format):
+    """列表参数的元素字段，格式不匹配时返回None（该列表不参与签名）"""
+    for pattern, fields in LIST_FORMATS[param]:
+        if pattern in list_format:
+            return fields
+    return None
+
+
+class EndpointSigner:
+    """
+    单个端点编译后的SHA1签名规则
+    签名串 = 按enc_params顺序拼接：固定参数取固定值，列表参数逐个元素取格式字段，其余取请求中的值
+    """
+
+    def __init__(self, endpoint, config, fixed_values):
+        self.endpoint = endpoint
+        non_enc_params = set(config.get("non_enc_params", []))
+        steps = []
+        # 请求体中需要写入的固定参数（按enc_params顺序）
+        self.fixed_params = {}
+        for param in config["enc_params"]:
+            if param in fixed_values:
+                steps.append((FIXED, param, fixed_values[param]))
+                self.fixed_params[param] = fixed_values[param]
+            elif param in LIST_FORMATS:
+                steps.append((LIST, param, _list_fields(param, config.get(f"{param}_format", ""))))
+            elif param not in non_enc_params:
+                steps.append((VALUE, param, None))
+        self.steps = tuple(steps)
+
+    def sign(self, payload, trace=None):
+        """
+        计算签名
+        :param trace: 可选dict，传入时填入签名过程（各部分来源、签名串和结果），用于调试
+        :return: SHA1十六进制字符串
+        """
+        parts = []
+        labels = [] if trace is not None else None
+        for kind, param, arg in self.steps:
+            if kind is FIXED:
+                parts.append(arg)
+                if labels is not None:
+                    labels.append(param)
+            elif param in payload:
+                value = payload[param]
+                if kind is VALUE:
+                    parts.append(str(value))
+                    if labels is not None:
+                        labels.append(param)
+                elif arg and isinstance(value, list):
+                    for i, entry in enumerate(value):
+                        for field in arg:
+                            parts.append(str(entry.get(field, "")))
+                            if labels is not None:
+                                labels.append(f"{param}[{i}].{field}")
+
+        signature_string = "".join(parts)
+        signature = hashlib.sha1(signature_string.encode()).hexdigest()
+        if trace is not None:
+            trace.update({
+                "endpoint": self.endpoint,
+                "parts": [{"param": label, "value": part} for label, part in zip(labels, parts)],
+                "signature_string": signature_string,
+                "signature": signature
+            })
+        return signature
+
+
+def compile_signers(encryption_config, fixed_values):
+    """导入时把各端点的加密配置编译为EndpointSigner，签名时不再解析配置"""
+    return {endpoint: EndpointSigner(endpoint, config, fixed_values)
+            for endpoint, config in encryption_config.items()}
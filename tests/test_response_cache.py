@@ -0,0 +1,54 @@
+import unittest
+from modules.mock_vendors import MockVendorServer, point_clients_at
+from modules.montnet_api import MontNetAPI
+from modules.quadcell_api import QuadcellAPI
+from modules.response_cache import response_cache
+
+# 经模拟供应商服务器验证查询类响应的缓存命中和修改类请求的失效
+
+
+class ResponseCacheMockServerTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockVendorServer()
+        point_clients_at(cls.server.start())
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.enabled = response_cache.enabled
+        response_cache.enabled = True
+        response_cache.clear()
+
+    def tearDown(self):
+        response_cache.enabled = self.enabled
+        response_cache.clear()
+
+    def sent(self, vendor):
+        return self.server.stats.snapshot()[vendor].get("requests", 0)
+
+    def assert_cached_until_mutated(self, vendor, api, query, mutation):
+        first = api.single_request("qrysub", dict(query))
+        self.assertEqual(self.sent(vendor), 1)
+        self.assertEqual(api.single_request("qrysub", dict(query)), first)
+        self.assertEqual(self.sent(vendor), 1, "second qrysub should be a cache hit")
+
+        api.single_request("suspend", dict(mutation))
+        self.assertEqual(self.sent(vendor), 2)
+        api.single_request("qrysub", dict(query))
+        self.assertEqual(self.sent(vendor), 3, "suspend should invalidate the cached qrysub")
+
+    def test_quadcell_decrypted_response_is_cached(self):
+        self.assert_cached_until_mutated("quadcell", QuadcellAPI(), {"imsi": "454120000000001", "authKey": "test"},
+                                         {"imsi": "454120000000001", "authKey": "test"})
+
+    def test_montnet_decrypted_response_is_cached(self):
+        self.assert_cached_until_mutated("montnet", MontNetAPI(), {"imsi": "454120000000002"},
+                                         {"imsi": "454120000000002"})
+
+
+if __name__ == "__main__":
+    unittest.main()